@@ -1,80 +1,104 @@
 import streamlit as st
-from modules.recorder import list_microphones, get_input_level, record_audio
-from modules.transcribe import transcribe_audio
-from modules.speaker_diarization import load_hf_token
+from modules.recorder import list_microphones, get_input_monitor, record_audio, StreamRecorder
+from modules.transcribe import format_segment_line
+from modules.anonymize import anonymize_texts, get_nlp
+from modules.live import LiveTranscriber, LiveSession, MicrophoneChunks
+from modules.speaker_diarization import get_pipeline, select_engine
+from modules.config import load_hf_token, save_config, is_offline, get_token_validator
+from modules import model_registry, result_cache, startup
+from modules.jobs import get_job_manager, QueueFullError
+from modules.export import export_bytes, export_filename, export_mime
+from modules.tuning import resolve_whisper_settings
+from modules.ingest import ingest_upload
+from modules.workspace import SessionWorkspace
 import time
 import threading
-import tempfile
-import json
-import os
+
+startup.mark("imports")
 
 st.set_page_config(page_title="Transkriptor", layout="wide")
 st.title("🤖 Transkript Automatisierung")
 
+WHISPER_MODEL_SIZE = "auto"  # aus dem Tuning-Profil (python tune.py), sonst "large"
+LIVE_TAIL_LINES = 50  # Anzahl Zeilen in der Live-Ansicht während der Transkription
+LIVE_MODEL_SIZES = ["tiny", "base", "small", "medium"]
+LIVE_REFRESH_S = 0.5
+JOB_POLL_S = 1.0  # Abfrageintervall für den Status laufender Aufträge
+UPLOAD_DECODE = True  # Uploads beim Übernehmen direkt zu 16 kHz mono dekodieren
+
 # ---------------------------------------------------------
 # HILFSFUNKTIONEN
 # ---------------------------------------------------------
-def validate_hf_token(token):
-    """Überprüft ob der HF Token gültig ist"""
+def load_diarization_pipeline(token):
+    """Lädt die pyannote-Pipeline (für das Warm-up; Fehler statt Fallback)."""
     if not token:
-        return False, "Kein Token vorhanden"
-    
-    if len(token) < 20:
-        return False, "Token ist unvollständig (zu kurz)"
-    
-    if not token.startswith("hf_"):
-        return False, "Token hat falsches Format (sollte mit 'hf_' beginnen)"
-    
-    # Versuche echte API-Validierung
+        raise RuntimeError("Kein HF Token vorhanden")
+    if get_pipeline(token) is None:
+        raise RuntimeError("pyannote-Pipeline konnte nicht geladen werden")
+
+def start_warmups(anonymizer, diarization, token):
+    """
+    Lädt die aktivierten Modelle im Hintergrund vor; jedes höchstens einmal
+    pro Prozess. Die UI wartet nicht darauf – ein Auftrag, der vorher startet,
+    wartet auf denselben Ladevorgang.
+    """
+    # Dieselben Einstellungen wie transcribe_audio, sonst träfe das Warm-up nicht
+    whisper = resolve_whisper_settings(WHISPER_MODEL_SIZE)
+    startup.warm_up("Whisper", lambda: model_registry.get_model(
+        whisper["model_size"], compute_type=whisper["compute_type"],
+        cpu_threads=whisper["cpu_threads"], num_workers=whisper["num_workers"]
+    ))
+    if anonymizer:
+        startup.warm_up("spaCy", get_nlp)
+    if diarization and token:
+        startup.warm_up("pyannote", lambda: load_diarization_pipeline(token))
+
+def save_token(token):
+    """Speichert den Token in config.json (andere Einstellungen bleiben erhalten)"""
     try:
-        from huggingface_hub import HfApi
-        api = HfApi()
-        api.whoami(token=token)
-        return True, "Token ist gültig ✓"
-    except ImportError:
-        return None, "huggingface_hub nicht installiert - Format scheint OK"
-    except Exception as e:
-        return False, f"Token ist ungültig: {str(e)}"
-
-def save_config(token):
-    """Speichert den Token in config.json"""
-    config_path = os.path.join(os.path.dirname(__file__), "config.json")
-    try:
-        with open(config_path, "w") as f:
-            json.dump({"HF_TOKEN": token}, f, indent=2)
+        save_config({"HF_TOKEN": token})
         return True
     except Exception as e:
         st.error(f"Fehler beim Speichern: {e}")
         return False
 
-def export_transcript(text, format_type):
-    """Exportiert das Transkript als Download"""
+EXPORT_LABELS = {"txt": "TXT", "json": "JSON", "srt": "SRT (Untertitel)", "vtt": "WebVTT (Untertitel)"}
+
+def build_export(format_type):
+    """
+    Erzeugt den Download erst auf Anforderung. TXT entspricht dem angezeigten
+    Text; JSON/SRT/WebVTT entstehen aus den strukturierten Segmenten.
+    """
+    text = st.session_state.transcript_result
     if format_type == "txt":
-        return text.encode('utf-8'), "text/plain", "transkript.txt"
-    elif format_type == "json":
-        lines = text.split("\n")
-        json_data = {"segments": []}
-        for line in lines:
-            if line.strip():
-                json_data["segments"].append({"text": line})
-        json_str = json.dumps(json_data, ensure_ascii=False, indent=2)
-        return json_str.encode('utf-8'), "application/json", "transkript.json"
+        data = text.encode("utf-8")
+    else:
+        entries = (st.session_state.debug_info or {}).get("final_transcript", [])
+        data = export_bytes(entries, format_type)
+    # Bezug auf den Ergebnis-String (keine Kopie), um veraltete Exporte zu erkennen
+    return {"format": format_type, "source": text, "data": data}
 
 # ---------------------------------------------------------
 # TOKEN-VERWALTUNG IN SIDEBAR
 # ---------------------------------------------------------
 st.sidebar.header("🔑 Huggingface Token")
 
+# config.json wird nur nach Änderungen neu gelesen; die Online-Prüfung läuft
+# im Hintergrund und ihr Ergebnis bleibt eine Weile gültig (kein Netz pro Rerun)
 try:
     current_token = load_hf_token(require_token=False)
 except Exception:
     current_token = None
+token_validator = get_token_validator()
+
+if is_offline():
+    st.sidebar.caption("📴 Offline-Modus: keine Token-Prüfung, Modelle nur aus dem lokalen Cache")
 
 if current_token:
     masked_token = current_token[:7] + "..." + current_token[-4:] if len(current_token) > 11 else "***"
     st.sidebar.text(f"Token: {masked_token}")
     
-    is_valid, msg = validate_hf_token(current_token)
+    is_valid, msg = token_validator.check(current_token)
     if is_valid:
         st.sidebar.success(msg)
     elif is_valid is False:
@@ -89,7 +113,7 @@ if st.sidebar.button("🔍 Token überprüfen"):
     if current_token:
         with st.sidebar:
             with st.spinner("Validiere Token..."):
-                is_valid, msg = validate_hf_token(current_token)
+                is_valid, msg = token_validator.wait(current_token, refresh=True)
                 if is_valid:
                     st.success(msg)
                 elif is_valid is False:
@@ -104,7 +128,7 @@ with st.sidebar.expander("Token bearbeiten"):
     new_token = st.text_input("Neuer Token", type="password", key="new_token_input")
     if st.button("Token speichern"):
         if new_token:
-            if save_config(new_token):
+            if save_token(new_token):
                 st.success("Token gespeichert! Seite wird neu geladen...")
                 time.sleep(1)
                 st.rerun()
@@ -126,6 +150,49 @@ if "transcript_result" not in st.session_state:
 if "debug_info" not in st.session_state:
     st.session_state.debug_info = None
 
+if "recorder" not in st.session_state:
+    st.session_state.recorder = None
+
+if "level_monitor" not in st.session_state:
+    st.session_state.level_monitor = None
+
+if "live_session" not in st.session_state:
+    st.session_state.live_session = None
+
+if "export" not in st.session_state:
+    st.session_state.export = None
+
+# Zwischendateien dieser Sitzung; werden beim Ende der Sitzung gelöscht
+if "session_files" not in st.session_state:
+    st.session_state.session_files = SessionWorkspace()
+session_files = st.session_state.session_files
+workspace = session_files.workspace
+
+def set_audio_file(path):
+    """Setzt die Eingabedatei; eine dadurch ersetzte eigene Aufnahme wird gelöscht."""
+    old = st.session_state.audio_file_path
+    if (old and old != path and not st.session_state.processing
+            and workspace.owner_of(old) == session_files.owner):
+        workspace.remove_file(old)
+    st.session_state.audio_file_path = path
+    st.session_state.transcript_result = None  # Reset old results
+    st.session_state.debug_info = None
+
+if "upload" not in st.session_state:
+    st.session_state.upload = None          # IngestedAudio der zuletzt übernommenen Datei
+    st.session_state.upload_key = None
+
+# Laufender Auftrag: ID steht auch in der URL, damit ein Neuladen ihn wiederfindet
+job_manager = get_job_manager()
+if "job_id" not in st.session_state:
+    st.session_state.job_id = st.query_params.get("job")
+active_job = job_manager.get(st.session_state.job_id) if st.session_state.job_id else None
+if active_job is None and st.session_state.job_id:
+    # Auftrag unbekannt (z.B. Server neu gestartet oder abgelaufen)
+    st.session_state.job_id = None
+    st.query_params.pop("job", None)
+st.session_state.processing = active_job is not None and not active_job.finished
+
 # ---------------------------------------------------------
 # DISABLE UI IF PROCESSING
 # ---------------------------------------------------------
@@ -149,10 +216,24 @@ diarization_enabled = st.sidebar.checkbox(
     "Sprechererkennung aktivieren", value=False, **ui_disabled()
 )
 
+vad_enabled = st.sidebar.checkbox(
+    "Stille überspringen (VAD)", value=False, **ui_disabled()
+)
+
 timestamps_enabled = st.sidebar.checkbox(
     "Zeitstempel anzeigen", value=False, **ui_disabled()
 )
 
+DIARIZATION_QUALITY_LABELS = {
+    "quality": "Genau (pyannote)",
+    "auto": "Automatisch (pyannote nur mit GPU)",
+    "speed": "Schnell (CPU, ohne Modell)",
+}
+diarization_quality = st.sidebar.selectbox(
+    "Sprechererkennung: Geschwindigkeit/Qualität", list(DIARIZATION_QUALITY_LABELS),
+    format_func=DIARIZATION_QUALITY_LABELS.get, **ui_disabled()
+)
+
 force_dummy_fallback = st.sidebar.checkbox(
     "Sprechererkennung-Fallback erzwingen (Person-DUMMY)", value=False, **ui_disabled()
 )
@@ -165,10 +246,25 @@ show_transcript_debug = st.sidebar.checkbox(
     "Debug: Transcript Segmente anzeigen", value=False, **ui_disabled()
 )
 
+show_spans_debug = st.sidebar.checkbox(
+    "Debug: Laufzeit pro Stufe anzeigen", value=False, **ui_disabled()
+)
+
+start_warmups(
+    anonymizer_enabled,
+    diarization_enabled and not force_dummy_fallback and select_engine(diarization_quality) == "pyannote",
+    current_token,
+)
+
 # ---------------------------------------------------------
 # MODE
 # ---------------------------------------------------------
-mode = st.radio("Modus wählen", ["Aufnahme", "Datei hochladen"], **ui_disabled())
+mode = st.radio("Modus wählen", ["Aufnahme", "Live-Transkription", "Datei hochladen"], **ui_disabled())
+
+# Pegelanzeige nur im Aufnahme-Modus offen halten
+if mode != "Aufnahme" and st.session_state.level_monitor is not None:
+    st.session_state.level_monitor.release()
+    st.session_state.level_monitor = None
 
 # ---------------------------------------------------------
 # AUDIO RECORDING
@@ -183,36 +279,168 @@ if mode == "Aufnahme":
     selected_label = st.selectbox("Mikrofon wählen", mic_labels, **ui_disabled())
     selected_mic = next(m for m in mics if m["label"] == selected_label)
 
-    duration = st.slider("Aufnahmedauer (Sekunden)", 5, 120, 10, **ui_disabled())
+    record_mode = st.radio(
+        "Aufnahmeart", ["Start/Stopp (beliebige Länge)", "Feste Dauer"],
+        horizontal=True, **ui_disabled()
+    )
+    if record_mode == "Feste Dauer":
+        duration = st.slider("Aufnahmedauer (Sekunden)", 5, 120, 10, **ui_disabled())
 
     show_level = st.checkbox("Mikrofonpegel anzeigen", **ui_disabled())
     level_bar = st.progress(0)
     stop_thread = False
 
-    def monitor_level(microphone):
-        while not stop_thread:
+    # Ein dauerhaft offener Stream pro Gerät; Aufnahme nutzt denselben Stream
+    level_monitor = st.session_state.level_monitor
+    want_monitor = show_level and not st.session_state.processing
+    if level_monitor is not None and (not want_monitor or level_monitor.mic["id"] != selected_mic["id"]):
+        level_monitor.release()
+        level_monitor = st.session_state.level_monitor = None
+    if want_monitor and level_monitor is None:
+        try:
+            level_monitor = st.session_state.level_monitor = get_input_monitor(selected_mic).acquire()
+        except Exception as e:
+            st.warning(f"Pegelanzeige nicht verfügbar: {e}")
+
+    def monitor_level(monitor):
+        # Liest nur den im Audio-Callback berechneten Wert – kein eigenes Stream-Öffnen
+        while not stop_thread and monitor.active:
             try:
-                level = get_input_level(microphone, duration=0.1)
-                level_bar.progress(level)
+                level_bar.progress(monitor.level)
             except Exception:
-                level_bar.progress(0)
+                break
             time.sleep(0.1)
 
-    if show_level and not st.session_state.processing:
-        t = threading.Thread(target=monitor_level, args=(selected_mic,), daemon=True)
+    if level_monitor is not None:
+        t = threading.Thread(target=monitor_level, args=(level_monitor,), daemon=True)
         t.start()
 
-    if st.button("🎤 Aufnahme starten", **ui_disabled()):
+    if record_mode == "Feste Dauer" and st.button("🎤 Aufnahme starten", **ui_disabled()):
         stop_thread = True
-        path = record_audio(duration, selected_mic)
+        path = record_audio(duration, selected_mic, path=session_files.new_file())
         if path:
             st.success("Aufnahme abgeschlossen!")
-            st.session_state.audio_file_path = path
-            st.session_state.transcript_result = None  # Reset old results
-            st.session_state.debug_info = None
+            set_audio_file(path)
         else:
             st.error("Aufnahme fehlgeschlagen.")
 
+    if record_mode == "Start/Stopp (beliebige Länge)":
+        recorder = st.session_state.recorder
+        rec_col1, rec_col2, rec_col3 = st.columns(3)
+        with rec_col1:
+            if st.button("🎤 Aufnahme starten", disabled=recorder is not None or st.session_state.processing):
+                stop_thread = True
+                try:
+                    st.session_state.recorder = StreamRecorder(selected_mic, path=session_files.new_file()).start()
+                except Exception as e:
+                    st.error(f"Aufnahme fehlgeschlagen: {e}")
+                st.rerun()
+        with rec_col2:
+            if recorder is not None and recorder.paused:
+                if st.button("▶️ Fortsetzen"):
+                    recorder.resume()
+                    st.rerun()
+            elif st.button("⏸️ Pause", disabled=recorder is None):
+                recorder.pause()
+                st.rerun()
+        with rec_col3:
+            if st.button("⏹️ Aufnahme beenden", disabled=recorder is None):
+                path = recorder.stop()
+                stats = recorder.stats()
+                st.session_state.recorder = None
+                if recorder.error is None and stats["frames_written"] > 0:
+                    set_audio_file(path)
+                    st.session_state.last_recording_stats = stats
+                else:
+                    workspace.remove_file(path)
+                    st.error("Aufnahme fehlgeschlagen.")
+                st.rerun()
+
+        if recorder is not None:
+            stats = recorder.stats()
+            status = "pausiert" if stats["paused"] else "läuft"
+            st.info(
+                f"🔴 Aufnahme {status}: {stats['duration']:.0f}s | "
+                f"verworfene Blöcke: {stats['dropped_blocks']} | Overflows: {stats['overflows']}"
+            )
+            if st.button("🔄 Status aktualisieren"):
+                st.rerun()
+        elif st.session_state.get("last_recording_stats"):
+            stats = st.session_state.last_recording_stats
+            st.success(
+                f"Aufnahme abgeschlossen! {stats['duration']:.1f}s, "
+                f"verworfene Blöcke: {stats['dropped_blocks']}, Overflows: {stats['overflows']}"
+            )
+
+# ---------------------------------------------------------
+# LIVE TRANSCRIPTION
+# ---------------------------------------------------------
+elif mode == "Live-Transkription":
+    mics = list_microphones()
+    if not mics:
+        st.error("Kein Mikrofon gefunden!")
+        st.stop()
+
+    live = st.session_state.live_session
+    mic_labels = [m["label"] for m in mics]
+    selected_label = st.selectbox("Mikrofon wählen", mic_labels, disabled=live is not None)
+    selected_mic = next(m for m in mics if m["label"] == selected_label)
+    live_model_size = st.selectbox(
+        "Whisper-Modell (live)", LIVE_MODEL_SIZES, index=LIVE_MODEL_SIZES.index("small"),
+        disabled=live is not None
+    )
+
+    live_col1, live_col2 = st.columns(2)
+    with live_col1:
+        if st.button("🔴 Live starten", disabled=live is not None or st.session_state.processing):
+            try:
+                transcriber = LiveTranscriber(model_size=live_model_size)
+                st.session_state.live_session = LiveSession(MicrophoneChunks(selected_mic), transcriber).start()
+            except Exception as e:
+                st.error(f"Live-Transkription konnte nicht gestartet werden: {e}")
+            st.rerun()
+    with live_col2:
+        if st.button("⏹️ Live beenden", disabled=live is None):
+            live.stop()
+            segments = list(live.transcriber.committed)
+            texts = [seg["text"] for seg in segments]
+            if anonymizer_enabled and texts:
+                try:
+                    texts = anonymize_texts(texts)
+                except Exception as e:
+                    print(f"[WARNUNG] Anonymizer fehlgeschlagen: {e}; Originaltext wird verwendet")
+            lines = [
+                format_segment_line(dict(seg, text=text), timestamps_enabled)
+                for seg, text in zip(segments, texts)
+            ]
+            st.session_state.transcript_result = "\n".join(lines)
+            st.session_state.debug_info = {
+                "transcript_segments": segments,
+                "diar_segments": [],
+                "final_transcript": [
+                    {"start": seg["start"], "end": seg["end"], "text": text, "has_speaker": False}
+                    for seg, text in zip(segments, texts)
+                ],
+            }
+            st.session_state.live_session = None
+            st.rerun()
+
+    if live is not None:
+        live_box = st.empty()
+        live_stats = st.empty()
+        # Solange die Session läuft, Anzeige aktualisieren (ein Klick auf
+        # "Live beenden" startet einen neuen Script-Lauf und beendet diese Schleife)
+        while live.running:
+            live_box.text(live.text())
+            stats = live.transcriber.stats()
+            live_stats.caption(
+                f"Empfangen: {stats['received_s']:.0f}s | offenes Fenster: {stats['pending_s']:.1f}s | "
+                f"Whisper-Lauf Ø {stats['mean_latency_s']:.2f}s (max {stats['max_latency_s']:.2f}s)"
+            )
+            time.sleep(LIVE_REFRESH_S)
+        if live.error:
+            st.error(f"Live-Transkription fehlgeschlagen: {live.error}")
+
 # ---------------------------------------------------------
 # FILE UPLOAD
 # ---------------------------------------------------------
@@ -223,13 +451,31 @@ elif mode == "Datei hochladen":
         **ui_disabled()
     )
     if uploaded_file is not None:
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-        temp_file.write(uploaded_file.read())
-        temp_file.flush()
-        st.session_state.audio_file_path = temp_file.name
-        st.session_state.transcript_result = None  # Reset old results
-        st.session_state.debug_info = None
-        st.success("Datei hochgeladen!")
+        # Nur bei einer neuen Datei ablegen – nicht bei jedem Rerun (Checkbox o.ä.)
+        upload_key = (uploaded_file.name, uploaded_file.size, getattr(uploaded_file, "file_id", None))
+        if st.session_state.upload_key != upload_key:
+            try:
+                with st.spinner("Datei wird übernommen..."):
+                    upload = ingest_upload(uploaded_file, name=uploaded_file.name, decode=UPLOAD_DECODE,
+                                           session=session_files)
+            except Exception as e:
+                st.error(f"Datei konnte nicht übernommen werden: {e}")
+            else:
+                st.session_state.upload_key = upload_key
+                st.session_state.upload = upload
+                set_audio_file(upload.pipeline_path)
+        upload = st.session_state.upload
+        if upload is not None and st.session_state.upload_key == upload_key:
+            details = f"{upload.container}/{upload.codec}"
+            if upload.duration:
+                details += f", {upload.duration:.0f}s"
+            if upload.sample_rate:
+                channels = {1: "mono", 2: "stereo"}.get(upload.channels, f"{upload.channels} Kanäle")
+                details += f", {upload.sample_rate} Hz {channels}"
+            st.success(
+                f"Datei hochgeladen! ({details})"
+                + (" – bereits vorhanden, wird wiederverwendet" if upload.reused else "")
+            )
 
 # ---------------------------------------------------------
 # START BUTTON
@@ -241,30 +487,63 @@ start_btn = st.button(
 )
 
 if start_btn:
-    st.session_state.processing = True
-    st.rerun()
+    try:
+        job_id = job_manager.submit(
+            st.session_state.audio_file_path,
+            model_size=WHISPER_MODEL_SIZE,
+            preprocessing_enabled=preprocessing_enabled,
+            anonymizer_enabled=anonymizer_enabled,
+            diarization_enabled=diarization_enabled,
+            timestamps_enabled=timestamps_enabled,
+            force_dummy=force_dummy_fallback,
+            hf_token=current_token,
+            vad_enabled=vad_enabled,
+            diarization_quality=diarization_quality,
+        )
+        st.session_state.job_id = job_id
+        st.query_params["job"] = job_id
+        st.session_state.transcript_result = None
+        st.session_state.debug_info = None
+    except QueueFullError as e:
+        st.error(str(e))
+    else:
+        st.rerun()
 
 # ---------------------------------------------------------
-# PIPELINE EXECUTION
+# PIPELINE EXECUTION (Hintergrund-Auftrag, UI fragt den Status ab)
 # ---------------------------------------------------------
-if st.session_state.processing:
-    if st.session_state.audio_file_path:
-        with st.spinner("Verarbeite Audio..."):
-            result_text, debug = transcribe_audio(
-                st.session_state.audio_file_path,
-                model_size="large",
-                preprocessing_enabled=preprocessing_enabled,
-                anonymizer_enabled=anonymizer_enabled,
-                diarization_enabled=diarization_enabled,
-                timestamps_enabled=timestamps_enabled,
-                force_dummy=force_dummy_fallback,
-                hf_token=current_token,
+if active_job is not None:
+    job = active_job.snapshot(tail=LIVE_TAIL_LINES)
+    if job["status"] in ("queued", "running"):
+        if job["status"] == "queued":
+            position = job_manager.queue_position(job["id"])
+            load = job_manager.load()
+            status_text = (
+                f"In Warteschlange (Position {position}, "
+                f"{load['running']}/{load['max_running']} Aufträge laufen)"
             )
-            
-            st.session_state.transcript_result = result_text
-            st.session_state.debug_info = debug
-            st.session_state.processing = False
-            # Kein st.rerun() hier! Einfach weiterlaufen lassen
+        else:
+            status_text = f"{job['stage_label']}... {job['progress'] * 100:.0f}% ({job['segments']} Segmente)"
+            if job["eta_s"] is not None:
+                status_text += f" – noch ca. {job['eta_s']:.0f}s"
+        st.progress(job["progress"], text=status_text)
+        if job["lines"]:
+            st.text("\n".join(job["lines"]))
+        if st.button("⛔ Transkription abbrechen"):
+            job_manager.cancel(job["id"])
+            st.rerun()
+        time.sleep(JOB_POLL_S)
+        st.rerun()
+    else:
+        if job["status"] == "done":
+            st.session_state.transcript_result = active_job.text
+            st.session_state.debug_info = active_job.debug
+        elif job["status"] == "cancelled":
+            st.warning("Transkription abgebrochen.")
+        else:
+            st.error(f"Transkription fehlgeschlagen: {job['error']}")
+        st.session_state.job_id = None
+        st.query_params.pop("job", None)
 
 # ---------------------------------------------------------
 # ERGEBNISSE ANZEIGEN
@@ -278,32 +557,45 @@ if st.session_state.transcript_result:
         height=300,
         key="transcript_display"
     )
+
+    vad = (st.session_state.debug_info or {}).get("vad") or {}
+    if vad.get("applied"):
+        st.caption(
+            f"VAD: {vad['skipped_fraction']:.0%} Stille übersprungen "
+            f"({vad['original_s']:.0f}s → {vad['processed_s']:.0f}s, "
+            f"erwarteter Speedup ×{vad['expected_speedup']:.1f})"
+        )
     
-    # Export-Buttons und Verwerfen-Button in einer Reihe
+    # Export (wird erst auf Knopfdruck erzeugt) und Verwerfen-Button in einer Reihe
     col1, col2, col3 = st.columns(3)
     with col1:
-        txt_data, txt_mime, txt_name = export_transcript(st.session_state.transcript_result, "txt")
-        st.download_button(
-            label="📄 Als TXT exportieren",
-            data=txt_data,
-            file_name=txt_name,
-            mime=txt_mime
+        export_format = st.selectbox(
+            "Exportformat", list(EXPORT_LABELS), format_func=EXPORT_LABELS.get,
+            label_visibility="collapsed"
         )
     with col2:
-        json_data, json_mime, json_name = export_transcript(st.session_state.transcript_result, "json")
-        st.download_button(
-            label="📋 Als JSON exportieren",
-            data=json_data,
-            file_name=json_name,
-            mime=json_mime
-        )
+        export = st.session_state.export
+        if (export is None or export["format"] != export_format
+                or export["source"] is not st.session_state.transcript_result):
+            if st.button(f"📦 {EXPORT_LABELS[export_format]}-Export erstellen"):
+                st.session_state.export = build_export(export_format)
+                st.rerun()
+        else:
+            st.download_button(
+                label=f"📄 Als {EXPORT_LABELS[export_format]} herunterladen",
+                data=export["data"],
+                file_name=export_filename(export_format),
+                mime=export_mime(export_format)
+            )
     with col3:
         if st.button("🗑️ Verwerfen & Neustart"):
             # Alle relevanten States zurücksetzen
-            st.session_state.transcript_result = None
-            st.session_state.debug_info = None
-            st.session_state.audio_file_path = None
-            st.session_state.processing = False
+            set_audio_file(None)
+            session_files.release_all()
+            st.session_state.last_recording_stats = None
+            st.session_state.export = None
+            st.session_state.upload = None
+            st.session_state.upload_key = None
             st.rerun()
     
     # Debug-Informationen
@@ -313,8 +605,67 @@ if st.session_state.transcript_result:
         for d in diar_segments:
             st.write(f"{d.get('start'):.2f}s — {d.get('end'):.2f}s : {d.get('speaker')}")
 
+    if show_spans_debug and st.session_state.debug_info:
+        st.write("### Debug: Laufzeit pro Stufe")
+        spans = st.session_state.debug_info.get("spans", [])
+        if spans:
+            st.table([
+                {
+                    "Stufe": sp["name"],
+                    "Wall [s]": f"{sp['wall_s']:.2f}",
+                    "CPU [s]": f"{sp['cpu_s']:.2f}" if sp["cpu_s"] is not None else "–",
+                    "RSS Δ [MB]": f"{sp['rss_delta_mb']:+.0f}" if sp["rss_delta_mb"] is not None else "–",
+                    "Peak-Anstieg [MB]": f"{sp['peak_growth_mb']:.0f}" if sp["peak_growth_mb"] is not None else "–",
+                    "Segmente": sp["counts"].get("segments", ""),
+                    "Thread": sp["thread"],
+                }
+                for sp in spans
+            ])
+        else:
+            st.caption("Keine Messungen (TRANSKRIPTOR_INSTRUMENTATION=0?)")
+
     if show_transcript_debug and st.session_state.debug_info:
+        cache_info = st.session_state.debug_info.get("cache")
+        if cache_info:
+            st.caption(
+                f"Ergebnis-Cache: Whisper {cache_info['whisper']}, Diarization {cache_info['diarization']} "
+                f"| Zähler: {result_cache.stats()}"
+            )
         st.write("### Debug: Transcript Segmente")
         trans_segments = st.session_state.debug_info.get("transcript_segments", [])
         for t in trans_segments:
-            st.write(f"{t.get('start'):.2f}s — {t.get('end'):.2f}s : {t.get('text')}")
\ No newline at end of file
+            st.write(f"{t.get('start'):.2f}s — {t.get('end'):.2f}s : {t.get('text')}")
+
+# ---------------------------------------------------------
+# KALTSTART + MODELL-WARM-UP
+# ---------------------------------------------------------
+first_run = startup.mark("interactive")
+start_marks = startup.marks()
+if first_run:
+    print(f"[INFO] Kaltstart: UI nach {start_marks['interactive']:.1f}s bedienbar "
+          f"(Imports nach {start_marks['imports']:.1f}s)")
+with st.sidebar.expander("⏱️ Start & Modelle"):
+    st.caption(
+        f"Kaltstart: UI nach {start_marks['interactive']:.1f}s bedienbar "
+        f"(Imports nach {start_marks['imports']:.1f}s)"
+    )
+    warmups = startup.warmups()
+    if not startup.WARMUP_ENABLED:
+        st.caption("Vorladen abgeschaltet (TRANSKRIPTOR_WARMUP=0)")
+    for name, w in warmups.items():
+        if w["state"] == "loading":
+            st.caption(f"{name}: lädt seit {time.time() - w['started']:.0f}s...")
+        elif w["state"] == "ready":
+            st.caption(f"{name}: bereit ({w['seconds']:.1f}s)")
+        else:
+            st.caption(f"{name}: fehlgeschlagen ({w['error']})")
+
+with st.sidebar.expander("💾 Arbeitsbereich"):
+    usage = workspace.usage()
+    st.progress(min(1.0, usage["bytes"] / max(1, usage["quota_bytes"])),
+                text=f"{usage['bytes'] / 1e6:.0f} von {usage['quota_bytes'] / 1e6:.0f} MB belegt")
+    active = sum(1 for o in usage["owners"].values() if o["active"])
+    st.caption(
+        f"{len(usage['owners'])} Bereiche ({active} in Benutzung) | "
+        f"verdrängt: {usage['evicted']} ({usage['evicted_bytes'] / 1e6:.0f} MB)"
+    )
@@ -0,0 +1,12 @@
+# batch.py – Kommandozeilen-Einstieg für die Stapelverarbeitung
+#
+#   python batch.py aufnahmen/ -o ergebnisse/ -j 2
+#
+# Details und Optionen: python batch.py --help (Logik in modules/batch.py)
+
+import sys
+
+from modules.batch import main
+
+if __name__ == "__main__":
+    sys.exit(main())
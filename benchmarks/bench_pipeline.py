@@ -0,0 +1,335 @@
+# benchmarks/bench_pipeline.py
+"""
+Pipeline-Benchmark: Preprocessing, Whisper, Diarization, Anonymizer und die
+komplette transcribe_audio-Pipeline auf synthetischem Audio.
+
+Jede Stufe läuft in einem eigenen Prozess. Nach Importen und Modell-Laden
+(getrennt als setup_s gemeldet) werden Wall-Zeit, CPU-Zeit, maximaler RSS,
+Real-Time-Faktor (Rechenzeit / Audiodauer) und Durchsatz gemessen.
+Standardmäßig mit Offline-Stubs statt echter Modelle
+(siehe benchmarks/stubs.py) – läuft auf CPU ohne Netzwerk; --real nutzt
+die installierten Modelle.
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_pipeline run --minutes 1 5 --speakers 3 -o bench.json
+    python -m benchmarks.bench_pipeline run --baseline baseline.json
+    python -m benchmarks.bench_pipeline compare baseline.json bench.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STAGES = ("preprocess", "preprocess_blockwise", "whisper", "diarization", "diarization_fast",
+          "anonymize", "pipeline")
+# Kennzahlen, bei denen ein höherer Wert eine Verschlechterung ist
+COMPARED_METRICS = ("wall_s", "cpu_s", "peak_rss_mb")
+# Kleinere absolute Änderungen gelten als Messrauschen
+MIN_ABS_CHANGE = {"wall_s": 0.05, "cpu_s": 0.05, "peak_rss_mb": 5.0}
+
+
+def make_conversation_wav(path, minutes, speakers=2, samplerate=16000, seed=0):
+    """
+    Synthetisches Gespräch: abwechselnde Sprecherbeiträge (2–8 s) mit je
+    eigener Grundfrequenz, dazwischen kurze Pausen, leichtes Rauschen.
+    Wird blockweise geschrieben. Rückgabe: Liste der Beiträge (start, end, speaker).
+    """
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * samplerate)
+    base_hz = [120 + 90 * i for i in range(speakers)]
+    turns = []
+    with sf.SoundFile(path, "w", samplerate=samplerate, channels=1, subtype="PCM_16") as f:
+        pos = 0
+        speaker = 0
+        while pos < total:
+            pause = min(int(rng.uniform(0.3, 1.2) * samplerate), total - pos)
+            f.write((0.005 * rng.standard_normal(pause)).astype(np.float32))
+            pos += pause
+            n = min(int(rng.uniform(2.0, 8.0) * samplerate), total - pos)
+            if n <= 0:
+                break
+            t = np.arange(n) / samplerate
+            hz = base_hz[speaker]
+            # Grundton + Obertöne mit Silbenrhythmus (~4 Hz)
+            voice = sum(np.sin(2 * np.pi * hz * k * t) / k for k in (1, 2, 3))
+            envelope = 0.5 + 0.5 * np.abs(np.sin(2 * np.pi * 4 * t))
+            f.write((0.2 * voice * envelope + 0.005 * rng.standard_normal(n)).astype(np.float32))
+            turns.append((pos / samplerate, (pos + n) / samplerate, f"S{speaker}"))
+            pos += n
+            speaker = int(rng.integers(speakers)) if speakers > 1 else 0
+    return turns
+
+
+# ---------------------------------------------------------
+# KINDPROZESS
+# ---------------------------------------------------------
+def _usage():
+    import resource
+    ru = resource.getrusage(resource.RUSAGE_SELF)
+    return ru.ru_utime + ru.ru_stime, ru.ru_maxrss / 1024.0
+
+
+def _setup_stage(stage, options):
+    """
+    Importe und Modell-Laden vor der Messung, damit die Stufenzeit nur die
+    eigentliche Verarbeitung enthält (die Setup-Zeit wird getrennt gemeldet).
+    """
+    if stage.startswith("preprocess"):
+        import modules.preprocessing  # noqa: F401
+        try:
+            import librosa  # noqa: F401
+        except ImportError:
+            pass
+    if stage in ("whisper", "pipeline"):
+        from modules.model_registry import get_model
+        import modules.transcribe  # noqa: F401
+        get_model(options["model_size"])
+    if stage in ("diarization", "pipeline"):
+        from modules.speaker_diarization import get_pipeline, load_hf_token
+        token = load_hf_token()
+        if token:
+            get_pipeline(token)
+    if stage in ("anonymize", "pipeline"):
+        from modules.anonymize import get_nlp
+        get_nlp()
+
+
+def _run_stage(stage, path, audio_s, options):
+    """Führt eine Stufe aus; gibt Zusatzkennzahlen (Anzahl, Fallback, ...) zurück."""
+    if stage == "preprocess":
+        from modules.preprocessing import preprocess_audio
+        os.remove(preprocess_audio(path))
+        return {}
+    if stage == "preprocess_blockwise":
+        from modules.preprocessing import preprocess_audio_blockwise
+        os.remove(preprocess_audio_blockwise(path))
+        return {}
+    if stage == "whisper":
+        from modules.transcribe import transcribe_audio
+        _, debug = transcribe_audio(
+            path, model_size=options["model_size"], preprocessing_enabled=False,
+            anonymizer_enabled=False, diarization_enabled=False, use_cache=False,
+        )
+        return {"segments": len(debug["transcript_segments"])}
+    if stage == "diarization":
+        from modules.speaker_diarization import diarize_audio, fallback_diarization
+        segments = diarize_audio(path)
+        return {"segments": len(segments), "fallback": segments == fallback_diarization(None)}
+    if stage == "diarization_fast":
+        # Eingebaute CPU-Engine: ohne Modell, daher auch mit Stubs echte Zahlen
+        from modules.speaker_diarization import diarize_audio
+        segments = diarize_audio(path, engine="fast")
+        return {"segments": len(segments), "speakers": len({s["speaker"] for s in segments})}
+    if stage == "anonymize":
+        from modules.anonymize import anonymize_texts
+        from benchmarks.stubs import make_sentence
+        rng = np.random.default_rng(0)
+        # Etwa ein Segment pro 4 s Audio, wie bei Whisper
+        texts = [make_sentence(rng) for _ in range(max(1, int(audio_s / 4)))]
+        t0 = time.perf_counter()
+        anonymize_texts(texts)
+        return {"segments": len(texts), "texts_per_s": len(texts) / (time.perf_counter() - t0)}
+    if stage == "pipeline":
+        from modules.transcribe import transcribe_audio
+        _, debug = transcribe_audio(
+            path, model_size=options["model_size"], preprocessing_enabled=True,
+            anonymizer_enabled=True, diarization_enabled=True, use_cache=False,
+        )
+        return {"segments": len(debug["transcript_segments"]), "timings": debug.get("timings", {})}
+    raise ValueError(f"Unbekannte Stufe: {stage}")
+
+
+def _child(stage, path, options_json):
+    options = json.loads(options_json)
+    sys.path.insert(0, ROOT)
+    if not options["real"]:
+        from benchmarks import stubs
+        stubs.install(whisper_rtf=options["stub_whisper_rtf"],
+                      diarization_rtf=options["stub_diarization_rtf"])
+    audio_s = sf.info(path).duration
+
+    t_setup = time.perf_counter()
+    _setup_stage(stage, options)
+    setup_s = time.perf_counter() - t_setup
+
+    cpu0, _ = _usage()
+    t0 = time.perf_counter()
+    extra = _run_stage(stage, path, audio_s, options)
+    wall = time.perf_counter() - t0
+    cpu1, peak_rss_mb = _usage()
+
+    result = {
+        "stage": stage,
+        "audio_s": audio_s,
+        "setup_s": setup_s,
+        "wall_s": wall,
+        "cpu_s": cpu1 - cpu0,
+        "peak_rss_mb": peak_rss_mb,
+        "rtf": wall / audio_s if audio_s else 0.0,
+        "throughput_x": audio_s / wall if wall else 0.0,
+    }
+    result.update(extra)
+    print(json.dumps(result))
+
+
+def run_stage(stage, path, options):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_pipeline", "--child", stage, path, json.dumps(options)],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        lines = proc.stderr.strip().splitlines() or ["unbekannter Fehler"]
+        return {"stage": stage, "error": lines[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+# ---------------------------------------------------------
+# VERGLEICH
+# ---------------------------------------------------------
+def _key(r):
+    return (r["stage"], round(r["audio_s"]))
+
+
+def compare(baseline, current, threshold=0.2):
+    """
+    Vergleicht zwei Ergebnisdateien (gleiche Stufe + Audiolänge).
+    Rückgabe: Liste (stage, audio_s, metric, alt, neu, relative Änderung, Regression?).
+    """
+    base = {_key(r): r for r in baseline["results"] if "error" not in r}
+    rows = []
+    for r in current["results"]:
+        b = base.get(_key(r)) if "error" not in r else None
+        if b is None:
+            continue
+        for metric in COMPARED_METRICS:
+            old, new = b.get(metric), r.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old
+            regressed = change > threshold and new - old > MIN_ABS_CHANGE[metric]
+            rows.append((r["stage"], r["audio_s"], metric, old, new, change, regressed))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print(f"{'Stufe':<22} {'Audio [s]':>9} {'Metrik':>12} {'alt':>10} {'neu':>10} {'Änderung':>9}")
+    for stage, audio_s, metric, old, new, change, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{stage:<22} {audio_s:>9.0f} {metric:>12} {old:>10.3f} {new:>10.3f} {change:>+8.0%}{flag}")
+    regressions = sum(1 for row in rows if row[-1])
+    print(f"\n{regressions} Regression(en) über {threshold:.0%}")
+    return regressions
+
+
+def _load_json(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+# ---------------------------------------------------------
+# MAIN
+# ---------------------------------------------------------
+def cmd_run(args):
+    options = {
+        "real": args.real,
+        "model_size": args.model_size,
+        "stub_whisper_rtf": args.stub_whisper_rtf,
+        "stub_diarization_rtf": args.stub_diarization_rtf,
+    }
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "host": platform.node(),
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "cpu_count": os.cpu_count(),
+            "speakers": args.speakers,
+            "options": options,
+        },
+        "results": [],
+    }
+
+    print(f"{'Stufe':<22} {'Audio [s]':>9} {'Setup [s]':>9} {'Wall [s]':>9} {'CPU [s]':>8} {'RSS [MB]':>9} {'RTF':>7} {'x Echtzeit':>10}")
+    for minutes in args.minutes:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            make_conversation_wav(path, minutes, args.speakers, seed=args.seed)
+            for stage in args.stages:
+                r = run_stage(stage, path, options)
+                report["results"].append(r)
+                if "error" in r:
+                    print(f"{stage:<22} {minutes * 60:>9.0f} Fehler: {r['error']}")
+                    continue
+                note = " (Fallback)" if r.get("fallback") else ""
+                print(f"{stage:<22} {r['audio_s']:>9.0f} {r['setup_s']:>9.2f} {r['wall_s']:>9.2f} {r['cpu_s']:>8.2f} "
+                      f"{r['peak_rss_mb']:>9.0f} {r['rtf']:>7.3f} {r['throughput_x']:>10.1f}{note}")
+        finally:
+            os.remove(path)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nErgebnisse gespeichert: {args.output}")
+
+    if args.baseline:
+        print()
+        rows = compare(_load_json(args.baseline), report, args.threshold)
+        return 1 if print_comparison(rows, args.threshold) else 0
+    return 0
+
+
+def cmd_compare(args):
+    rows = compare(_load_json(args.baseline), _load_json(args.current), args.threshold)
+    return 1 if print_comparison(rows, args.threshold) else 0
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "--child":
+        _child(*argv[1:4])
+        return 0
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_run = sub.add_parser("run", help="Benchmark ausführen")
+    p_run.add_argument("--minutes", type=float, nargs="+", default=[1, 5])
+    p_run.add_argument("--speakers", type=int, default=2)
+    p_run.add_argument("--stages", nargs="+", choices=STAGES, default=list(STAGES))
+    p_run.add_argument("--seed", type=int, default=0)
+    p_run.add_argument("--real", action="store_true", help="Echte Modelle statt Stubs verwenden")
+    p_run.add_argument("--model-size", default="tiny")
+    p_run.add_argument("--stub-whisper-rtf", type=float, default=0.0,
+                       help="Simulierte Whisper-Rechenzeit pro Sekunde Audio (nur Stubs)")
+    p_run.add_argument("--stub-diarization-rtf", type=float, default=0.0,
+                       help="Simulierte Diarization-Rechenzeit pro Sekunde Audio (nur Stubs)")
+    p_run.add_argument("-o", "--output", help="Ergebnisse als JSON speichern")
+    p_run.add_argument("--baseline", help="Direkt mit dieser Ergebnisdatei vergleichen")
+    p_run.add_argument("--threshold", type=float, default=0.2,
+                       help="Relative Verschlechterung, ab der eine Regression gemeldet wird")
+    p_run.set_defaults(func=cmd_run)
+
+    p_cmp = sub.add_parser("compare", help="Zwei Ergebnisdateien vergleichen")
+    p_cmp.add_argument("baseline")
+    p_cmp.add_argument("current")
+    p_cmp.add_argument("--threshold", type=float, default=0.2)
+    p_cmp.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,97 @@
+# benchmarks/bench_preprocessing.py
+"""
+Speicher-Benchmark: preprocess_audio (komplett laden) gegen
+preprocess_audio_blockwise (Streaming) auf synthetischen langen Aufnahmen.
+
+Jeder Lauf findet in einem eigenen Prozess statt, gemessen wird dessen
+maximaler RSS (ru_maxrss).
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_preprocessing
+    python -m benchmarks.bench_preprocessing --minutes 10 30 60 --samplerate 48000 --channels 2
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def make_long_wav(path, minutes, samplerate, channels, block_seconds=10, seed=0):
+    """Schreibt ein synthetisches Signal (Töne + Rauschen) blockweise auf die Platte."""
+    rng = np.random.default_rng(seed)
+    total = int(minutes * 60 * samplerate)
+    block = block_seconds * samplerate
+    with sf.SoundFile(path, "w", samplerate=samplerate, channels=channels, subtype="PCM_16") as f:
+        for start in range(0, total, block):
+            n = min(block, total - start)
+            t = (start + np.arange(n)) / samplerate
+            tone = 0.3 * np.sin(2 * np.pi * (150 + 50 * np.sin(t / 7)) * t)
+            noise = 0.05 * rng.standard_normal(n)
+            f.write(np.repeat((tone + noise)[:, None], channels, axis=1).astype(np.float32))
+
+
+def _child(mode, path):
+    """Läuft im Kindprozess: Preprocessing ausführen, Zeit + Peak-RSS als JSON ausgeben."""
+    import resource
+    sys.path.insert(0, ROOT)
+    from modules.preprocessing import preprocess_audio, preprocess_audio_blockwise
+
+    t0 = time.perf_counter()
+    out = preprocess_audio_blockwise(path) if mode == "blockwise" else preprocess_audio(path)
+    elapsed = time.perf_counter() - t0
+    os.remove(out)
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "seconds": elapsed, "peak_rss_mb": peak_kb / 1024.0}))
+
+
+def run(mode, path):
+    proc = subprocess.run(
+        [sys.executable, "-m", "benchmarks.bench_preprocessing", "--child", mode, path],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        return {"mode": mode, "error": proc.stderr.strip().splitlines()[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--minutes", type=float, nargs="+", default=[5, 20, 60])
+    parser.add_argument("--samplerate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--modes", nargs="+", default=["full", "blockwise"])
+    parser.add_argument("--child", nargs=2, metavar=("MODE", "PATH"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _child(*args.child)
+        return
+
+    print(f"{'Minuten':>8} {'Datei [MB]':>11} {'Modus':>10} {'Zeit [s]':>9} {'Peak RSS [MB]':>14}")
+    for minutes in args.minutes:
+        fd, path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            make_long_wav(path, minutes, args.samplerate, args.channels)
+            size_mb = os.path.getsize(path) / 1e6
+            for mode in args.modes:
+                r = run(mode, path)
+                if "error" in r:
+                    print(f"{minutes:>8g} {size_mb:>11.0f} {mode:>10} Fehler: {r['error']}")
+                else:
+                    print(f"{minutes:>8g} {size_mb:>11.0f} {mode:>10} {r['seconds']:>9.1f} {r['peak_rss_mb']:>14.0f}")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# benchmarks/bench_speaker_index.py
+"""
+Benchmark: Sprecherzuordnung per linearem Scan (find_speaker_for_time)
+gegen den Intervall-Index (SpeakerIndex.assign).
+
+Aufruf (aus dem Repo-Root):
+    python -m benchmarks.bench_speaker_index
+    python -m benchmarks.bench_speaker_index --sizes 1000 10000 --linear-max 2000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.speaker_index import SpeakerIndex  # noqa: E402
+
+
+def find_speaker_for_time(diar_segments, timestamp):
+    """Ursprüngliche lineare Suche (Referenz)."""
+    for seg in diar_segments:
+        if seg["start"] <= timestamp <= seg["end"]:
+            return seg["speaker"]
+    return "Unbekannt"
+
+
+def make_segments(n, total, speakers=None, seed=0):
+    """Erzeugt n aufeinanderfolgende Segmente über `total` Sekunden."""
+    rng = np.random.default_rng(seed)
+    bounds = np.sort(rng.uniform(0.0, total, size=n + 1))
+    bounds[0], bounds[-1] = 0.0, total
+    segments = []
+    for i in range(n):
+        seg = {"start": float(bounds[i]), "end": float(bounds[i + 1])}
+        if speakers:
+            seg["speaker"] = f"SPEAKER_{int(rng.integers(speakers)):02d}"
+        segments.append(seg)
+    return segments
+
+
+def bench(n_diar, n_trans, speakers, linear_max):
+    total = float(max(n_diar, n_trans)) * 3.0
+    diar = make_segments(n_diar, total, speakers=speakers, seed=1)
+    trans = make_segments(n_trans, total, seed=2)
+
+    t0 = time.perf_counter()
+    labels = SpeakerIndex(diar).assign(trans)
+    t_index = time.perf_counter() - t0
+
+    t_linear = None
+    if n_diar * n_trans <= linear_max * linear_max:
+        t0 = time.perf_counter()
+        [find_speaker_for_time(diar, s["start"]) for s in trans]
+        t_linear = time.perf_counter() - t0
+
+    assert len(labels) == n_trans
+    return t_index, t_linear
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000, 10000])
+    parser.add_argument("--speakers", type=int, default=4)
+    parser.add_argument("--linear-max", type=int, default=5000,
+                        help="Linearen Scan nur bis zu dieser Größe messen")
+    args = parser.parse_args()
+
+    print(f"{'diar x trans':>16} {'index [ms]':>12} {'linear [ms]':>12} {'speedup':>9}")
+    for n in args.sizes:
+        t_index, t_linear = bench(n, n, args.speakers, args.linear_max)
+        linear = f"{t_linear * 1000:12.1f}" if t_linear is not None else f"{'-':>12}"
+        speedup = f"{t_linear / t_index:8.1f}x" if t_linear is not None else f"{'-':>9}"
+        print(f"{n:>7} x {n:<6} {t_index * 1000:12.1f} {linear} {speedup}")
+
+
+if __name__ == "__main__":
+    main()
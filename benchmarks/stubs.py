@@ -0,0 +1,286 @@
+# benchmarks/stubs.py
+"""
+Leichtgewichtige Offline-Stellvertreter für WhisperModel (faster-whisper),
+pyannote.audio.Pipeline, spaCy und die Token-Prüfung des Huggingface Hubs – damit die Benchmarks ohne Modelle,
+GPU und Netzwerk laufen. Die Stubs rechnen echte, zur Audiolänge
+proportionale NumPy-Arbeit (Spektrum pro Frame), liefern aber nur
+synthetische Ergebnisse. Gemessen wird damit der Pipeline-Overhead
+(Dekodieren, Puffer, Zuordnung, Anonymisierung, Formatierung), nicht die
+Modellqualität.
+
+install() muss vor dem ersten Import von modules.* aufgerufen werden.
+"""
+
+import contextlib
+import re
+import sys
+import time
+import types
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+FRAME_S = 0.025
+HOP_S = 0.010
+
+# Wortschatz für synthetische Sätze; Namen/Orte/Organisationen erkennt der spaCy-Stub
+WORDS = ("ich", "wir", "haben", "das", "heute", "noch", "einmal", "besprochen", "und",
+         "dann", "war", "es", "eigentlich", "ganz", "gut", "mit", "dem", "Termin", "am")
+NAMES = {"Anna": "PER", "Müller": "PER", "Jonas": "PER", "Berlin": "LOC", "Hamburg": "LOC",
+         "Jugendamt": "ORG", "Caritas": "ORG"}
+EXTRAS = ("0171 2345678", "12.03.2024", "anna@example.org", "4711")
+
+_settings = {"whisper_rtf": 0.0, "diarization_rtf": 0.0}
+
+
+def make_sentence(rng, n_words=12):
+    """Deutscher Beispielsatz mit gelegentlichen Namen, Orten und Nummern."""
+    words = list(rng.choice(WORDS, size=n_words))
+    for _ in range(int(rng.integers(0, 3))):
+        words.insert(int(rng.integers(0, len(words))), str(rng.choice(list(NAMES))))
+    if rng.random() < 0.3:
+        words.append(str(rng.choice(EXTRAS)))
+    sentence = " ".join(words)
+    return sentence[:1].upper() + sentence[1:] + "."
+
+
+def _frame_energy(samples):
+    """RMS-Energie und dominante Frequenz pro Frame (echte FFT-Arbeit)."""
+    frame = int(FRAME_S * SAMPLE_RATE)
+    hop = int(HOP_S * SAMPLE_RATE)
+    n = 1 + max(0, len(samples) - frame) // hop
+    idx = np.arange(frame)[None, :] + hop * np.arange(n)[:, None]
+    frames = samples[np.minimum(idx, len(samples) - 1)] * np.hanning(frame)
+    spec = np.abs(np.fft.rfft(frames, axis=1))
+    energy = np.sqrt(np.mean(frames ** 2, axis=1))
+    peak_hz = np.argmax(spec, axis=1) * SAMPLE_RATE / frame
+    return energy, peak_hz
+
+
+def _voiced_runs(energy, min_gap_frames=30, min_len_frames=20):
+    """Zusammenhängende Frames oberhalb der Schwelle als (start, end) Frame-Indizes."""
+    if len(energy) == 0:
+        return []
+    threshold = max(1e-4, 0.25 * float(np.percentile(energy, 90)))
+    voiced = energy > threshold
+    runs = []
+    start = None
+    silent = 0
+    for i, v in enumerate(voiced):
+        if v:
+            if start is None:
+                start = i
+            silent = 0
+        elif start is not None:
+            silent += 1
+            if silent >= min_gap_frames:
+                if i - silent - start >= min_len_frames:
+                    runs.append((start, i - silent + 1))
+                start, silent = None, 0
+    if start is not None and len(voiced) - silent - start >= min_len_frames:
+        runs.append((start, len(voiced) - silent))
+    return runs
+
+
+def _load(audio):
+    if isinstance(audio, np.ndarray):
+        return audio.astype(np.float32, copy=False)
+    return decode_audio(audio)
+
+
+def decode_audio(path, sampling_rate=SAMPLE_RATE, **kwargs):
+    """Ersatz für faster_whisper.audio.decode_audio (soundfile + resample_poly)."""
+    import soundfile as sf
+    data, sr = sf.read(path, dtype="float32", always_2d=True)
+    mono = data.mean(axis=1)
+    if sr != sampling_rate:
+        from math import gcd
+        from scipy.signal import resample_poly
+        g = gcd(sr, sampling_rate)
+        mono = resample_poly(mono, sampling_rate // g, sr // g).astype(np.float32)
+    return mono
+
+
+# ---------------------------------------------------------
+# faster-whisper
+# ---------------------------------------------------------
+class StubWhisperModel:
+    def __init__(self, model_size_or_path, device="cpu", compute_type="default", **kwargs):
+        self.model_size = model_size_or_path
+
+    def transcribe(self, audio, beam_size=5, language=None, **kwargs):
+        samples = _load(audio)
+        duration = len(samples) / SAMPLE_RATE
+        energy, _ = _frame_energy(samples)
+        runs = _voiced_runs(energy)
+        rng = np.random.default_rng(len(samples))
+
+        def segments():
+            for start, end in runs:
+                # Lange Sprechphasen wie Whisper in ~5s-Segmente teilen
+                t0, t1 = start * HOP_S, end * HOP_S
+                while t0 < t1 - 0.2:
+                    seg_end = min(t1, t0 + 5.0)
+                    if _settings["whisper_rtf"]:
+                        time.sleep((seg_end - t0) * _settings["whisper_rtf"])
+                    yield types.SimpleNamespace(start=t0, end=seg_end, text=" " + make_sentence(rng))
+                    t0 = seg_end
+
+        info = types.SimpleNamespace(duration=duration, language=language or "de", language_probability=1.0)
+        return segments(), info
+
+
+# ---------------------------------------------------------
+# pyannote
+# ---------------------------------------------------------
+class _Turn:
+    def __init__(self, start, end):
+        self.start, self.end = start, end
+
+
+class _Annotation:
+    def __init__(self, tracks):
+        self._tracks = tracks
+
+    def itertracks(self, yield_label=False):
+        for i, (start, end, speaker) in enumerate(self._tracks):
+            yield (_Turn(start, end), i, speaker) if yield_label else (_Turn(start, end), i)
+
+
+class StubPipeline:
+    """Sprecher = gerundete dominante Frequenz je Sprechphase (keine echte Diarization)."""
+
+    @classmethod
+    def from_pretrained(cls, model_id, use_auth_token=None, **kwargs):
+        return cls()
+
+    def to(self, device):
+        return self
+
+    def __call__(self, audio):
+        if isinstance(audio, dict):
+            waveform = audio["waveform"]
+            samples = np.asarray(getattr(waveform, "numpy", lambda: waveform)()).reshape(-1)
+        else:
+            samples = _load(audio)
+        energy, peak_hz = _frame_energy(samples)
+        tracks = []
+        for start, end in _voiced_runs(energy):
+            hz = float(np.median(peak_hz[start:end]))
+            tracks.append((start * HOP_S, end * HOP_S, f"SPEAKER_{int(hz // 50):02d}"))
+        if _settings["diarization_rtf"]:
+            time.sleep(len(samples) / SAMPLE_RATE * _settings["diarization_rtf"])
+        return _Annotation(tracks)
+
+
+# ---------------------------------------------------------
+# spaCy
+# ---------------------------------------------------------
+_TOKEN_RE = re.compile(r"\w+")
+
+
+class _Doc:
+    def __init__(self, text):
+        self.text = text
+        self.ents = [
+            types.SimpleNamespace(label_=NAMES[m.group()], start_char=m.start(), end_char=m.end())
+            for m in _TOKEN_RE.finditer(text) if m.group() in NAMES
+        ]
+
+
+class StubNLP:
+    pipe_names = ["tok2vec", "morphologizer", "parser", "ner"]
+
+    def get_pipe(self, name):
+        return types.SimpleNamespace(listening_components=["morphologizer", "parser"])
+
+    def __call__(self, text):
+        return _Doc(text)
+
+    def pipe(self, texts, batch_size=64, n_process=1, disable=None, **kwargs):
+        for text in texts:
+            yield _Doc(text)
+
+    @contextlib.contextmanager
+    def select_pipes(self, disable=None, enable=None):
+        yield
+
+
+# ---------------------------------------------------------
+# huggingface_hub (Token-Prüfung ohne Netzwerk)
+# ---------------------------------------------------------
+class StubHubError(Exception):
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.response = types.SimpleNamespace(status_code=status_code)
+
+
+class StubHfApi:
+    """Gültig sind Tokens mit "hf_"-Präfix, außer sie enthalten "invalid"."""
+
+    def whoami(self, token=None):
+        if not token or not token.startswith("hf_") or "invalid" in token:
+            raise StubHubError("401 Unauthorized", 401)
+        return {"name": "stub-user", "type": "user"}
+
+
+# ---------------------------------------------------------
+# torch (nur falls nicht installiert)
+# ---------------------------------------------------------
+class _Tensor(np.ndarray):
+    def unsqueeze(self, dim):
+        return np.expand_dims(self, dim).view(_Tensor)
+
+    def numpy(self):
+        return np.asarray(self)
+
+
+def _torch_stub():
+    torch = types.ModuleType("torch")
+    torch.__version__ = "stub"
+    torch.Tensor = _Tensor
+    torch.cuda = types.SimpleNamespace(is_available=lambda: False)
+    torch.device = lambda name: name
+    torch.from_numpy = lambda a: np.asarray(a).view(_Tensor)
+    return torch
+
+
+def install(whisper_rtf=0.0, diarization_rtf=0.0):
+    """
+    Registriert die Stubs in sys.modules. whisper_rtf/diarization_rtf > 0
+    simulieren zusätzlich Modell-Rechenzeit (Sekunden pro Sekunde Audio).
+    """
+    _settings.update(whisper_rtf=whisper_rtf, diarization_rtf=diarization_rtf)
+
+    fw = types.ModuleType("faster_whisper")
+    fw.WhisperModel = StubWhisperModel
+    fw_audio = types.ModuleType("faster_whisper.audio")
+    fw_audio.decode_audio = decode_audio
+    fw.audio = fw_audio
+    sys.modules["faster_whisper"] = fw
+    sys.modules["faster_whisper.audio"] = fw_audio
+
+    pa = types.ModuleType("pyannote.audio")
+    pa.__version__ = "stub"
+    pa.Pipeline = StubPipeline
+    pa_pipelines = types.ModuleType("pyannote.audio.pipelines")
+    pa_pipelines.SpeakerDiarization = StubPipeline
+    pa.pipelines = pa_pipelines
+    pyannote = types.ModuleType("pyannote")
+    pyannote.audio = pa
+    sys.modules.update({"pyannote": pyannote, "pyannote.audio": pa,
+                        "pyannote.audio.pipelines": pa_pipelines})
+
+    spacy = types.ModuleType("spacy")
+    spacy.load = lambda name, **kwargs: StubNLP()
+    sys.modules["spacy"] = spacy
+
+    hub = types.ModuleType("huggingface_hub")
+    hub.__version__ = "stub"
+    hub.HfApi = StubHfApi
+    sys.modules["huggingface_hub"] = hub
+
+    try:
+        import torch  # noqa: F401
+    except ImportError:
+        sys.modules["torch"] = _torch_stub()
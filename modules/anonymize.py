@@ -1,27 +1,96 @@
 #modules/anonymize.py
 
-import spacy
 import re
 import sys
+import threading
 
-# Lade deutsches Modell einmalig
-nlp = spacy.load("de_core_news_lg")
+# Deutsches Modell; wird erst beim ersten Gebrauch geladen (get_nlp)
+SPACY_MODEL = "de_core_news_lg"
 
-def anonymize_text(text):
-    doc = nlp(text)
-    anonymized = text
+_nlp = None
+_disabled_components = []
+_nlp_lock = threading.Lock()
 
-    # Personen, Orte, Organisationen anonymisieren
-    for ent in reversed(doc.ents):
-        if ent.label_ in ["PER", "LOC", "ORG"]:
-            anonymized = anonymized[:ent.start_char] + f"[{ent.label_}]" + anonymized[ent.end_char:]
+ENTITY_LABELS = ("PER", "LOC", "ORG")
 
+# Reihenfolge ist relevant: spätere Muster laufen über bereits ersetzten Text
+PATTERNS = [
     # Telefonnummern, E-Mails, Kontakte (optional)
-    #anonymized = re.sub(r"\b\d{3,}\b", "[KONTAKT]", anonymized)
-    #anonymized = re.sub(r"\b[\w\.-]+@[\w\.-]+\b", "[EMAIL]", anonymized)
-    anonymized = re.sub(r"\b\d{2,4}[-/]\d{2,4}[-/]\d{2,4}\b", "[DATUM]", anonymized)
-    anonymized = re.sub(r"\b\d{3,}\b", "[ZAHL]", anonymized)
-    anonymized = re.sub(r"\S+@\S+\.\S+", "[EMAIL]", anonymized)
-    anonymized = re.sub(r"\b\d{2,5}[-\s]?\d{3,}\b", "[TELEFON]", anonymized)
+    #(re.compile(r"\b\d{3,}\b"), "[KONTAKT]"),
+    #(re.compile(r"\b[\w\.-]+@[\w\.-]+\b"), "[EMAIL]"),
+    (re.compile(r"\b\d{2,4}[-/]\d{2,4}[-/]\d{2,4}\b"), "[DATUM]"),
+    (re.compile(r"\b\d{3,}\b"), "[ZAHL]"),
+    (re.compile(r"\S+@\S+\.\S+"), "[EMAIL]"),
+    (re.compile(r"\b\d{2,5}[-\s]?\d{3,}\b"), "[TELEFON]"),
+]
+
+
+def _components_not_needed_for_ner(nlp):
+    """Pipeline-Komponenten, die für NER nicht laufen müssen (Parser, Tagger, ...)."""
+    keep = {"ner"}
+    # tok2vec nur behalten, wenn der NER darauf hört (modellabhängig)
+    if "tok2vec" in nlp.pipe_names:
+        listeners = getattr(nlp.get_pipe("tok2vec"), "listening_components", [])
+        if "ner" in listeners:
+            keep.add("tok2vec")
+    return [name for name in nlp.pipe_names if name not in keep]
+
+
+def get_nlp():
+    """
+    Gibt das spaCy-Modell zurück und lädt es beim ersten Aufruf (einmal pro
+    Prozess; parallele Aufrufe warten auf denselben Ladevorgang).
+    """
+    global _nlp, _disabled_components
+    if _nlp is None:
+        with _nlp_lock:
+            if _nlp is None:
+                import spacy
+                print(f"[INFO] Lade spaCy-Modell {SPACY_MODEL}...")
+                nlp = spacy.load(SPACY_MODEL)
+                _disabled_components = _components_not_needed_for_ner(nlp)
+                _nlp = nlp
+                print(f"[OK] spaCy-Modell geladen: {SPACY_MODEL}")
+    return _nlp
+
 
+def _apply(doc, text):
+    """Ersetzt Entitäten in einem Durchlauf und wendet danach die Muster an."""
+    parts = []
+    pos = 0
+    for ent in doc.ents:
+        if ent.label_ in ENTITY_LABELS:
+            parts.append(text[pos:ent.start_char])
+            parts.append(f"[{ent.label_}]")
+            pos = ent.end_char
+    parts.append(text[pos:])
+    anonymized = "".join(parts)
+
+    for pattern, replacement in PATTERNS:
+        anonymized = pattern.sub(replacement, anonymized)
     return anonymized
+
+
+def anonymize_text(text):
+    nlp = get_nlp()
+    with nlp.select_pipes(disable=_disabled_components):
+        doc = nlp(text)
+    return _apply(doc, text)
+
+
+def anonymize_texts(texts, batch_size=64, n_process=1):
+    """
+    Anonymisiert viele Texte auf einmal über nlp.pipe.
+    - batch_size: Anzahl Texte pro spaCy-Batch
+    - n_process: Anzahl Prozesse für spaCy (1 = im aktuellen Prozess)
+    Rückgabe: Liste anonymisierter Texte in derselben Reihenfolge.
+    """
+    texts = list(texts)
+    nlp = get_nlp()
+    docs = nlp.pipe(
+        texts,
+        batch_size=batch_size,
+        n_process=n_process,
+        disable=_disabled_components,
+    )
+    return [_apply(doc, text) for doc, text in zip(docs, texts)]
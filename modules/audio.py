@@ -0,0 +1,47 @@
+# modules/audio.py
+
+from dataclasses import dataclass, field
+
+import numpy as np
+
+SAMPLE_RATE = 16000  # Whisper und pyannote arbeiten intern mit 16 kHz mono
+
+
+@dataclass
+class AudioBuffer:
+    """
+    Einmal dekodiertes Audio für alle Pipeline-Stufen.
+    - samples: float32, mono, SAMPLE_RATE Hz
+    - source_path: Originaldatei (nur Info/Fallback)
+    """
+    samples: np.ndarray
+    sample_rate: int = SAMPLE_RATE
+    source_path: str = None
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def duration(self):
+        return self.samples.shape[0] / float(self.sample_rate)
+
+    def for_pyannote(self):
+        """Waveform-dict, wie es pyannote-Pipelines statt eines Dateipfads akzeptieren."""
+        import torch
+        return {
+            "waveform": torch.from_numpy(self.samples).unsqueeze(0),
+            "sample_rate": self.sample_rate,
+        }
+
+
+def load_audio(path, sample_rate=SAMPLE_RATE):
+    """Dekodiert eine Audiodatei einmalig zu float32 mono mit `sample_rate` Hz."""
+    from faster_whisper.audio import decode_audio
+    samples = decode_audio(path, sampling_rate=sample_rate)
+    samples = np.ascontiguousarray(samples, dtype=np.float32)
+    return AudioBuffer(samples, sample_rate, source_path=path)
+
+
+def audio_input(audio):
+    """Eingabe für Whisper: Pfad bleibt Pfad, AudioBuffer wird zum NumPy-Array."""
+    if isinstance(audio, AudioBuffer):
+        return audio.samples
+    return audio
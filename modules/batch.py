@@ -0,0 +1,331 @@
+# modules/batch.py
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+AUDIO_EXTENSIONS = (".wav", ".mp3", ".m4a", ".flac", ".ogg")
+MANIFEST_NAME = "manifest.json"
+# So oft darf eine Datei beim Verarbeiten den Worker-Prozess abstürzen lassen,
+# bevor sie als fehlgeschlagen gilt (sonst bricht sie jeden Wiederanlauf ab)
+MAX_WORKER_CRASHES = 3
+
+# Einstellungen, die an transcribe_audio durchgereicht werden
+DEFAULT_SETTINGS = {
+    "model_size": "large",
+    "compute_type": "default",
+    "preprocessing_enabled": True,
+    "anonymizer_enabled": True,
+    "diarization_enabled": True,
+    "timestamps_enabled": True,
+    "force_dummy": False,
+    "vad_enabled": False,
+    "diarization_quality": "quality",
+}
+
+
+# ---------------------------------------------------------
+# EINGABEN + MANIFEST
+# ---------------------------------------------------------
+def collect_inputs(paths, file_list=None):
+    """
+    Sammelt Audiodateien aus Dateien/Verzeichnissen (rekursiv) und optional
+    einer Textdatei mit einem Pfad pro Zeile.
+    Rückgabe: Liste (key, absoluter Pfad); key ist eindeutig und dient als
+    Manifest-Schlüssel und Basis für die Ausgabedateien.
+    """
+    found = []
+    if file_list:
+        with open(file_list, "r", encoding="utf-8") as f:
+            paths = list(paths) + [line.strip() for line in f if line.strip()]
+
+    for p in paths:
+        p = os.path.abspath(p)
+        if os.path.isdir(p):
+            for root, _, files in os.walk(p):
+                for name in sorted(files):
+                    if name.lower().endswith(AUDIO_EXTENSIONS):
+                        full = os.path.join(root, name)
+                        rel = os.path.relpath(full, p)
+                        found.append((os.path.join(os.path.basename(p), rel), full))
+        elif os.path.isfile(p):
+            found.append((os.path.basename(p), p))
+        else:
+            print(f"[WARNUNG] Eingabe nicht gefunden: {p}")
+
+    # Doppelte Schlüssel (gleicher Dateiname aus verschiedenen Quellen) eindeutig machen
+    seen = {}
+    result = []
+    for key, full in sorted(found, key=lambda kv: kv[0]):
+        if key in seen and seen[key] != full:
+            stem, ext = os.path.splitext(key)
+            n = 2
+            while f"{stem}_{n}{ext}" in seen:
+                n += 1
+            key = f"{stem}_{n}{ext}"
+        if key not in seen:
+            seen[key] = full
+            result.append((key, full))
+    return result
+
+
+def load_manifest(out_dir):
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {"files": {}}
+    except json.JSONDecodeError as e:
+        # Kaputtes Manifest nicht überschreiben, sondern sichern
+        backup = f"{path}.corrupt-{int(time.time())}"
+        os.replace(path, backup)
+        print(f"[WARNUNG] Manifest unlesbar ({e}), gesichert als {backup}")
+        return {"files": {}}
+
+
+def save_manifest(out_dir, manifest):
+    """Atomar schreiben, damit ein Absturz nie ein halbes Manifest hinterlässt."""
+    path = os.path.join(out_dir, MANIFEST_NAME)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _fingerprint(path):
+    st = os.stat(path)
+    return {"size": st.st_size, "mtime": st.st_mtime}
+
+
+def is_done(entry, input_path, settings):
+    """Datei gilt als erledigt, wenn Eingabe + Einstellungen gleich und Ausgaben vorhanden sind."""
+    if not entry or entry.get("status") != "done":
+        return False
+    if entry.get("input_fingerprint") != _fingerprint(input_path):
+        return False
+    if entry.get("settings") != settings:
+        return False
+    return all(os.path.exists(p) for p in entry.get("outputs", {}).values())
+
+
+def should_process(entry, input_path, settings, retry_failed=False):
+    """
+    Muss die Datei (erneut) verarbeitet werden? Erledigte werden übersprungen,
+    fehlgeschlagene nur mit retry_failed wiederholt. "pending"/"running"
+    (Abbruch oder abgestürzter Worker) werden fortgesetzt; nach
+    MAX_WORKER_CRASHES Abstürzen gilt eine Datei als fehlgeschlagen.
+    """
+    if is_done(entry, input_path, settings):
+        return False
+    if entry and entry.get("status") == "failed" and not retry_failed:
+        return False
+    return True
+
+
+def output_base(out_dir, key):
+    """
+    Basis der Ausgabedateien: der vollständige Schlüssel inkl. Endung
+    (a.wav -> a.wav.txt), damit a.wav und a.mp3 sich nicht überschreiben.
+    """
+    return os.path.join(out_dir, key)
+
+
+# ---------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------
+def _init_worker(settings):
+    """Läuft einmal pro Worker-Prozess: Whisper-Modell vorab laden."""
+    from .model_registry import warmup
+    from .tuning import resolve_whisper_settings
+    try:
+        whisper = resolve_whisper_settings(settings["model_size"], settings["compute_type"])
+        warmup(whisper["model_size"], compute_type=whisper["compute_type"], background=False,
+               cpu_threads=whisper["cpu_threads"], num_workers=whisper["num_workers"])
+    except Exception as e:
+        print(f"[WARNUNG] Warm-up im Worker fehlgeschlagen: {e}")
+
+
+def process_file(key, input_path, out_dir, settings):
+    """
+    Transkribiert eine Datei und schreibt <key>.txt und <key>.json.
+    Läuft im Worker-Prozess; das Modell bleibt dort über die Registry geladen.
+    """
+    from .transcribe import transcribe_audio
+
+    t0 = time.perf_counter()
+    text, debug = transcribe_audio(input_path, parallel_mode="thread", **settings)
+    elapsed = time.perf_counter() - t0
+
+    base = output_base(out_dir, key)
+    os.makedirs(os.path.dirname(base), exist_ok=True)
+    outputs = {"txt": base + ".txt", "json": base + ".json"}
+
+    with open(outputs["txt"] + ".tmp", "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(outputs["txt"] + ".tmp", outputs["txt"])
+
+    with open(outputs["json"] + ".tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "input": input_path,
+            "settings": settings,
+            "text": text,
+            "transcript_segments": debug.get("transcript_segments", []),
+            "diar_segments": debug.get("diar_segments", []),
+            "spans": debug.get("spans", []),
+        }, f, ensure_ascii=False, indent=2, default=str)
+    os.replace(outputs["json"] + ".tmp", outputs["json"])
+
+    timings = dict(debug.get("timings", {}))
+    timings["wall_s"] = elapsed
+    return {"outputs": outputs, "timings": timings, "segments": len(debug.get("transcript_segments", []))}
+
+
+# ---------------------------------------------------------
+# BATCH
+# ---------------------------------------------------------
+def run_batch(inputs, out_dir, settings=None, workers=1, retry_failed=False):
+    """
+    Verarbeitet alle Eingaben mit `workers` Prozessen. Nach jeder Datei wird das
+    Manifest aktualisiert; ein erneuter Aufruf überspringt erledigte Dateien.
+    Rückgabe: das Manifest (dict).
+    """
+    settings = dict(DEFAULT_SETTINGS, **(settings or {}))
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = load_manifest(out_dir)
+    files = manifest.setdefault("files", {})
+
+    todo = []
+    for key, path in inputs:
+        if should_process(files.get(key), path, settings, retry_failed):
+            todo.append((key, path))
+
+    skipped = len(inputs) - len(todo)
+    print(f"[INFO] {len(inputs)} Dateien, {skipped} bereits erledigt/übersprungen, {len(todo)} zu verarbeiten")
+    if not todo:
+        return manifest
+
+    for key, path in todo:
+        prev = files.get(key, {})
+        files[key] = {
+            "input": path,
+            "status": "pending",
+            "attempts": prev.get("attempts", 0),
+            # --retry-failed beginnt die Zählung neu
+            "crashes": 0 if prev.get("status") == "failed" else prev.get("crashes", 0),
+        }
+    # Bereits abgestürzte Dateien zuletzt, damit die übrigen vorher durchlaufen
+    todo.sort(key=lambda kv: files[kv[0]]["crashes"])
+    save_manifest(out_dir, manifest)
+
+    t_start = time.perf_counter()
+    # "spawn": jeder Worker startet sauber (kein geforkter CUDA-/Thread-Zustand)
+    ctx = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(settings,)) as pool:
+        futures = {}
+        for key, path in todo:
+            files[key]["status"] = "running"
+            files[key]["attempts"] += 1
+            futures[pool.submit(process_file, key, path, out_dir, settings)] = key
+        save_manifest(out_dir, manifest)
+
+        for n, future in enumerate(as_completed(futures), 1):
+            key = futures[future]
+            entry = files[key]
+            try:
+                result = future.result()
+                entry.update(result)
+                entry["status"] = "done"
+                entry["input_fingerprint"] = _fingerprint(entry["input"])
+                entry["settings"] = settings
+                entry.pop("error", None)
+                print(f"[OK] ({n}/{len(todo)}) {key}: {result['timings']['wall_s']:.1f}s")
+            except BrokenProcessPool as e:
+                # Ein Worker ist abgestürzt (OOM, Segfault): alle offenen Dateien
+                # scheitern so, obwohl sie selbst nichts falsch gemacht haben.
+                # Beim nächsten Lauf werden sie fortgesetzt – außer nach
+                # MAX_WORKER_CRASHES Abstürzen (vermutlich die Ursache).
+                entry["crashes"] = entry.get("crashes", 0) + 1
+                entry["error"] = f"Worker-Prozess abgebrochen: {e}"
+                if entry["crashes"] >= MAX_WORKER_CRASHES:
+                    entry["status"] = "failed"
+                    print(f"[FEHLER] ({n}/{len(todo)}) {key}: {entry['error']} "
+                          f"({entry['crashes']}x, wird nicht mehr versucht)")
+                else:
+                    entry["status"] = "pending"
+                    print(f"[WARNUNG] ({n}/{len(todo)}) {key}: {entry['error']}; beim nächsten Lauf erneut")
+            except Exception as e:
+                entry["status"] = "failed"
+                entry["error"] = f"{type(e).__name__}: {e}"
+                print(f"[FEHLER] ({n}/{len(todo)}) {key}: {entry['error']}")
+            entry["finished_at"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+            save_manifest(out_dir, manifest)
+
+    manifest["last_run"] = {
+        "files": len(todo),
+        "workers": workers,
+        "wall_s": time.perf_counter() - t_start,
+    }
+    save_manifest(out_dir, manifest)
+    return manifest
+
+
+def main(argv=None):
+    from .speaker_diarization import DIARIZATION_QUALITIES
+
+    parser = argparse.ArgumentParser(
+        description="Transkribiert viele Audiodateien ohne UI (fortsetzbar über manifest.json)."
+    )
+    parser.add_argument("inputs", nargs="*", help="Audiodateien oder Verzeichnisse")
+    parser.add_argument("-o", "--output", required=True, help="Ausgabeverzeichnis (enthält manifest.json)")
+    parser.add_argument("--file-list", help="Textdatei mit einem Pfad pro Zeile")
+    parser.add_argument("-j", "--workers", type=int, default=1, help="Anzahl Worker-Prozesse")
+    parser.add_argument("--model-size", default=DEFAULT_SETTINGS["model_size"],
+                        help='Whisper-Modell; "auto" nimmt das Modell aus dem Tuning-Profil (tune.py)')
+    parser.add_argument("--compute-type", default=DEFAULT_SETTINGS["compute_type"])
+    parser.add_argument("--no-preprocessing", action="store_true")
+    parser.add_argument("--no-anonymizer", action="store_true")
+    parser.add_argument("--no-diarization", action="store_true")
+    parser.add_argument("--no-timestamps", action="store_true")
+    parser.add_argument("--diarization-quality", choices=DIARIZATION_QUALITIES,
+                        default=DEFAULT_SETTINGS["diarization_quality"],
+                        help="quality: pyannote, speed: schnelle CPU-Engine, auto: pyannote nur mit GPU")
+    parser.add_argument("--force-dummy", action="store_true", help="Diarization-Fallback erzwingen")
+    parser.add_argument("--vad", action="store_true", help="Stille vor Whisper/Diarization überspringen")
+    parser.add_argument("--retry-failed", action="store_true", help="Fehlgeschlagene Dateien erneut versuchen")
+    args = parser.parse_args(argv)
+
+    inputs = collect_inputs(args.inputs, args.file_list)
+    if not inputs:
+        parser.error("Keine Audiodateien gefunden")
+
+    settings = {
+        "model_size": args.model_size,
+        "compute_type": args.compute_type,
+        "preprocessing_enabled": not args.no_preprocessing,
+        "anonymizer_enabled": not args.no_anonymizer,
+        "diarization_enabled": not args.no_diarization,
+        "timestamps_enabled": not args.no_timestamps,
+        "force_dummy": args.force_dummy,
+        "vad_enabled": args.vad,
+        "diarization_quality": args.diarization_quality,
+    }
+    manifest = run_batch(inputs, args.output, settings, workers=args.workers,
+                         retry_failed=args.retry_failed)
+    failed = [k for k, v in manifest["files"].items() if v.get("status") == "failed"]
+    if failed:
+        print(f"[WARNUNG] {len(failed)} Datei(en) fehlgeschlagen, siehe {MANIFEST_NAME}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
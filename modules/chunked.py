@@ -0,0 +1,205 @@
+# modules/chunked.py
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .audio import SAMPLE_RATE
+
+DEFAULT_CHUNK_S = 60.0     # Ziel-Länge eines Chunks
+SEARCH_S = 5.0             # Suchbereich (±) um die Ziel-Grenze für die leiseste Stelle
+FRAME_S = 0.03             # Frame-Länge für die Energie-Berechnung
+
+
+def find_split_points(samples, sample_rate=SAMPLE_RATE, chunk_s=DEFAULT_CHUNK_S,
+                      search_s=SEARCH_S, frame_s=FRAME_S):
+    """
+    Schnittpunkte (Sample-Indizes) etwa alle `chunk_s` Sekunden, jeweils an
+    der leisesten Stelle (kleinste RMS-Energie eines Frames) im Bereich
+    ±`search_s` um die Ziel-Grenze – so wird möglichst in Sprechpausen geteilt.
+    Rückgabe: sortierte Liste inkl. 0 und len(samples).
+    """
+    n = len(samples)
+    frame = max(1, int(frame_s * sample_rate))
+    n_frames = n // frame
+    if n_frames == 0 or n <= chunk_s * sample_rate:
+        return [0, n]
+
+    framed = samples[:n_frames * frame].reshape(n_frames, frame)
+    energy = np.sqrt(np.mean(framed.astype(np.float64) ** 2, axis=1))
+
+    points = [0]
+    target = chunk_s
+    while target * sample_rate < n - search_s * sample_rate:
+        lo = max(int((target - search_s) * sample_rate) // frame, points[-1] // frame + 1)
+        hi = min(int((target + search_s) * sample_rate) // frame, n_frames)
+        if hi <= lo:
+            break
+        quietest = lo + int(np.argmin(energy[lo:hi]))
+        # Mitte des leisesten Frames
+        points.append(quietest * frame + frame // 2)
+        target = points[-1] / sample_rate + chunk_s
+    points.append(n)
+    return points
+
+
+# ---------------------------------------------------------
+# WORKER
+# ---------------------------------------------------------
+_worker_settings = {}
+
+# Pools bleiben zwischen Aufrufen bestehen, damit die Worker ihre Modelle behalten.
+# Ein Pool pro Konfiguration; ein Pool anderer Konfiguration wird erst beendet,
+# wenn ihn kein Aufruf mehr benutzt (mehrere Aufträge laufen gleichzeitig).
+_pool_lock = threading.Lock()
+_pools = {}         # (workers, settings) -> [ProcessPoolExecutor, Anzahl Benutzer]
+
+
+def _init_worker(settings):
+    """Läuft einmal pro Worker-Prozess: Modell mit begrenzter Thread-Zahl laden."""
+    from .model_registry import get_model
+    _worker_settings.update(settings)
+    get_model(settings["model_size"], device="cpu", compute_type=settings["compute_type"],
+              cpu_threads=settings["cpu_threads"])
+
+
+def _transcribe_chunk(offset_s, samples):
+    from .model_registry import get_model
+    s = _worker_settings
+    model = get_model(s["model_size"], device="cpu", compute_type=s["compute_type"],
+                      cpu_threads=s["cpu_threads"])
+    segments, _ = model.transcribe(samples, beam_size=s["beam_size"], language=s.get("language"))
+    chunk_end = len(samples) / SAMPLE_RATE
+    return [
+        {
+            "start": offset_s + float(seg.start),
+            # Whisper liefert am Chunk-Ende gelegentlich Zeiten hinter dem Audio
+            "end": offset_s + min(float(seg.end), chunk_end),
+            "text": seg.text.strip(),
+        }
+        for seg in segments
+    ]
+
+
+def _acquire_pool(workers, settings):
+    """
+    Wiederverwendbarer Prozess-Pool für diese Einstellungen (mit
+    _release_pool freigeben). Unbenutzte Pools anderer Einstellungen werden
+    dabei beendet; benutzte bleiben, bis ihr letzter Aufruf fertig ist.
+    Rückgabe: (config, pool).
+    """
+    config = (workers, tuple(sorted(settings.items())))
+    with _pool_lock:
+        for other, (pool, users) in list(_pools.items()):
+            if other != config and users == 0:
+                del _pools[other]
+                pool.shutdown(wait=False)
+        entry = _pools.get(config)
+        if entry is None:
+            ctx = multiprocessing.get_context("spawn")
+            pool = ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                                       initializer=_init_worker, initargs=(settings,))
+            entry = _pools[config] = [pool, 0]
+        entry[1] += 1
+        return config, entry[0]
+
+
+def _release_pool(config):
+    with _pool_lock:
+        entry = _pools.get(config)
+        if entry is not None:
+            entry[1] -= 1
+
+
+def shutdown_pool():
+    """Beendet alle Pools (auch benutzte – nur beim Herunterfahren aufrufen)."""
+    with _pool_lock:
+        pools = [pool for pool, _ in _pools.values()]
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait=True)
+
+
+# ---------------------------------------------------------
+# STITCHING
+# ---------------------------------------------------------
+def _normalize(text):
+    return " ".join(text.lower().split()).strip(" .,!?…")
+
+
+def stitch_segments(chunks, boundary_tolerance_s=1.0):
+    """
+    Fügt die Segmentlisten der Chunks (bereits mit absoluten Zeiten)
+    zusammen. An Chunk-Grenzen wird ein Segment verworfen, wenn es denselben
+    Text wie das letzte Segment des vorigen Chunks hat und zeitlich daran
+    anschließt (Whisper wiederholt gelegentlich Text über die Grenze hinweg).
+    """
+    result = []
+    for segments in chunks:
+        for i, seg in enumerate(segments):
+            if not seg["text"]:
+                continue
+            if i == 0 and result:
+                prev = result[-1]
+                if (_normalize(prev["text"]) == _normalize(seg["text"])
+                        and seg["start"] - prev["end"] <= boundary_tolerance_s):
+                    prev["end"] = max(prev["end"], seg["end"])
+                    continue
+            result.append(dict(seg))
+    return result
+
+
+def transcribe_chunked(samples, model_size="large", compute_type="int8", workers=None,
+                       chunk_s=DEFAULT_CHUNK_S, beam_size=5, language=None):
+    """
+    Teilt das Audio (16 kHz mono float32) an leisen Stellen in Chunks und
+    transkribiert diese parallel in einem Prozess-Pool auf der CPU. Jeder
+    Worker lädt das Modell einmal mit cpu_threads = Kerne / workers, damit
+    sich die Prozesse die Kerne aufteilen statt sich gegenseitig zu bremsen.
+    Rückgabe: (segments, stats) – stats enthält u.a. den Real-Time-Faktor
+    (Rechenzeit / Audiodauer; < 1 heißt schneller als Echtzeit).
+    """
+    cores = os.cpu_count() or 1
+    workers = max(1, min(workers or cores, cores))
+    points = find_split_points(samples, SAMPLE_RATE, chunk_s=chunk_s)
+    chunks = [(points[i] / SAMPLE_RATE, samples[points[i]:points[i + 1]])
+              for i in range(len(points) - 1)]
+    # Pool und Threads hängen nur an der Konfiguration, nicht an der Chunk-Zahl:
+    # kurze Dateien nutzen denselben Pool, es laufen nur weniger Aufgaben
+    settings = {
+        "model_size": model_size,
+        "compute_type": compute_type,
+        "cpu_threads": max(1, cores // workers),
+        "beam_size": beam_size,
+        "language": language,
+    }
+    active = min(workers, len(chunks))
+    print(f"[INFO] Chunk-parallele Transkription: {len(chunks)} Chunks, {active}/{workers} Worker "
+          f"à {settings['cpu_threads']} Threads")
+
+    t0 = time.perf_counter()
+    config, pool = _acquire_pool(workers, settings)
+    try:
+        futures = [pool.submit(_transcribe_chunk, offset, chunk) for offset, chunk in chunks]
+        results = [f.result() for f in futures]
+    finally:
+        _release_pool(config)
+    elapsed = time.perf_counter() - t0
+
+    segments = stitch_segments(results)
+    duration = len(samples) / SAMPLE_RATE
+    stats = {
+        "chunks": len(chunks),
+        "workers": workers,
+        "active_workers": active,
+        "cpu_threads_per_worker": settings["cpu_threads"],
+        "audio_s": duration,
+        "wall_s": elapsed,
+        "rtf": elapsed / duration if duration > 0 else 0.0,
+    }
+    print(f"[OK] Chunk-Transkription: {len(segments)} Segmente, RTF {stats['rtf']:.3f}")
+    return segments, stats
@@ -0,0 +1,237 @@
+# modules/config.py
+
+import json
+import os
+import threading
+import time
+
+CONFIG_PATH = os.environ.get(
+    "TRANSKRIPTOR_CONFIG",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config.json"),
+)
+# Ergebnis einer Online-Prüfung gilt so lange (Sekunden); Netzfehler kürzer
+VALIDATION_TTL_S = float(os.environ.get("TRANSKRIPTOR_TOKEN_TTL_S", "3600"))
+VALIDATION_ERROR_TTL_S = 60.0
+VALIDATION_TIMEOUT_S = 10.0
+
+_lock = threading.Lock()
+_configs = {}       # Pfad -> (mtime, Konfiguration)
+
+
+# ---------------------------------------------------------
+# KONFIGURATION
+# ---------------------------------------------------------
+def load_config(path=None):
+    """
+    Liest config.json (gecacht, bei geänderter Datei neu gelesen).
+    Fehlt die Datei oder ist sie unlesbar, ist die Konfiguration leer.
+    """
+    path = path or CONFIG_PATH
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return {}
+    with _lock:
+        cached = _configs.get(path)
+        if cached and cached[0] == mtime:
+            return dict(cached[1])
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            conf = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNUNG] config.json unlesbar ({path}): {e}")
+        conf = {}
+    if not isinstance(conf, dict):
+        conf = {}
+    with _lock:
+        _configs[path] = (mtime, conf)
+    return dict(conf)
+
+
+def save_config(updates, path=None):
+    """
+    Übernimmt `updates` in config.json (andere Schlüssel bleiben erhalten).
+    Schreibt atomar; der Cache liest die Datei beim nächsten Zugriff neu.
+    """
+    path = path or CONFIG_PATH
+    conf = load_config(path)
+    conf.update(updates)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(conf, f, indent=2)
+    os.replace(tmp, path)
+    with _lock:
+        _configs.pop(path, None)
+    return conf
+
+
+def load_hf_token(require_token=False, path=None):
+    """
+    Lädt den Huggingface Token aus config.json.
+    - require_token=True: Fehler, wenn kein Token vorhanden.
+    - require_token=False: Gibt None zurück, falls kein Token vorhanden.
+    """
+    hf_token = load_config(path).get("HF_TOKEN", None)
+    if require_token and not hf_token:
+        raise ValueError("Huggingface Token fehlt in config.json")
+    return hf_token
+
+
+def is_offline(path=None):
+    """
+    Offline-Modus: keine Netzwerkzugriffe (Token-Prüfung, Modell-Downloads).
+    Aktiv über TRANSKRIPTOR_OFFLINE=1, HF_HUB_OFFLINE=1 oder "OFFLINE": true
+    in config.json.
+    """
+    if os.environ.get("TRANSKRIPTOR_OFFLINE", "0") != "0":
+        return True
+    if os.environ.get("HF_HUB_OFFLINE", "0") not in ("0", ""):
+        return True
+    return bool(load_config(path).get("OFFLINE", False))
+
+
+def apply_offline_env():
+    """Im Offline-Modus lädt huggingface_hub Modelle nur aus dem lokalen Cache."""
+    if is_offline():
+        os.environ["HF_HUB_OFFLINE"] = "1"
+        return True
+    return False
+
+
+# ---------------------------------------------------------
+# TOKEN-PRÜFUNG
+# ---------------------------------------------------------
+def check_token_format(token):
+    """Prüft nur das Format. (False, Meldung) bei Fehler, sonst None."""
+    if not token:
+        return False, "Kein Token vorhanden"
+    if len(token) < 20:
+        return False, "Token ist unvollständig (zu kurz)"
+    if not token.startswith("hf_"):
+        return False, "Token hat falsches Format (sollte mit 'hf_' beginnen)"
+    return None
+
+
+def _hub_whoami(token):
+    """Fragt den Huggingface Hub (HF_ENDPOINT, Standard huggingface.co)."""
+    from huggingface_hub import HfApi
+    return HfApi().whoami(token=token)
+
+
+def _status_code(exc):
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+
+class TokenValidator:
+    """
+    Prüft HF-Tokens im Hintergrund und merkt sich das Ergebnis für `ttl_s`
+    Sekunden. check() blockiert nie: solange keine Antwort vorliegt, meldet
+    es (None, "wird überprüft"). `whoami` ist austauschbar (z.B. ein
+    lokaler Stub statt des Hubs).
+    Ergebnisse: (True/False/None, Meldung); None = nicht entscheidbar
+    (offline, Hub nicht erreichbar, huggingface_hub fehlt).
+    """
+
+    def __init__(self, whoami=None, ttl_s=VALIDATION_TTL_S, error_ttl_s=VALIDATION_ERROR_TTL_S,
+                 offline=None):
+        self.whoami = whoami or _hub_whoami
+        self.ttl_s = ttl_s
+        self.error_ttl_s = error_ttl_s
+        self.offline = offline      # None = is_offline() bei jeder Prüfung
+        self.checks = 0             # tatsächliche Hub-Anfragen
+        self._lock = threading.Lock()
+        self._results = {}          # Token -> (Ergebnis, Meldung, gültig bis)
+        self._pending = {}          # Token -> threading.Event
+
+    def _offline(self):
+        return is_offline() if self.offline is None else self.offline
+
+    def _query(self, token):
+        self.checks += 1
+        try:
+            self.whoami(token)
+            return True, "Token ist gültig ✓", self.ttl_s
+        except ImportError:
+            return None, "huggingface_hub nicht installiert - Format scheint OK", self.ttl_s
+        except Exception as e:
+            if _status_code(e) in (401, 403):
+                return False, f"Token ist ungültig: {e}", self.ttl_s
+            return None, f"Hub nicht erreichbar, Token nicht geprüft: {e}", self.error_ttl_s
+
+    def _run(self, token, done):
+        try:
+            valid, msg, ttl = self._query(token)
+        except Exception as e:
+            valid, msg, ttl = None, f"Token-Prüfung fehlgeschlagen: {e}", self.error_ttl_s
+        with self._lock:
+            self._results[token] = (valid, msg, time.monotonic() + ttl)
+            self._pending.pop(token, None)
+        done.set()
+
+    def _start(self, token):
+        """Startet eine Prüfung (falls nicht schon eine läuft); gibt das Event zurück."""
+        with self._lock:
+            done = self._pending.get(token)
+            if done is None:
+                done = self._pending[token] = threading.Event()
+                threading.Thread(target=self._run, args=(token, done), daemon=True,
+                                 name="token-check").start()
+            return done
+
+    def cached(self, token):
+        """Gültiges gespeichertes Ergebnis oder None."""
+        with self._lock:
+            entry = self._results.get(token)
+        if entry and entry[2] > time.monotonic():
+            return entry[0], entry[1]
+        return None
+
+    def check(self, token, refresh=False):
+        """Ergebnis ohne zu warten; startet bei Bedarf eine Prüfung im Hintergrund."""
+        bad_format = check_token_format(token)
+        if bad_format:
+            return bad_format
+        if self._offline():
+            return None, "Offline-Modus: Format OK, nicht online geprüft"
+        if refresh:
+            self.invalidate(token)
+        result = self.cached(token)
+        if result is not None:
+            return result
+        self._start(token)
+        return None, "Token wird im Hintergrund überprüft..."
+
+    def wait(self, token, timeout=VALIDATION_TIMEOUT_S, refresh=False):
+        """Wie check(), wartet aber bis zu `timeout` Sekunden auf die Antwort."""
+        result = self.check(token, refresh=refresh)
+        if check_token_format(token) or self._offline():
+            return result
+        if self.cached(token) is None:
+            self._start(token).wait(timeout)
+        return self.cached(token) or (None, f"Keine Antwort vom Hub nach {timeout:.0f}s")
+
+    def invalidate(self, token=None):
+        with self._lock:
+            if token is None:
+                self._results.clear()
+            else:
+                self._results.pop(token, None)
+
+
+_validator = None
+_validator_lock = threading.Lock()
+
+
+def get_token_validator():
+    """Prozessweite Instanz (Ergebnisse gelten für alle Sitzungen)."""
+    global _validator
+    with _validator_lock:
+        if _validator is None:
+            _validator = TokenValidator()
+        return _validator
+
+
+def validate_hf_token(token, refresh=False):
+    """Überprüft ob der HF Token gültig ist (nicht blockierend, gecacht)."""
+    return get_token_validator().check(token, refresh=refresh)
@@ -0,0 +1,120 @@
+# modules/export.py
+
+import io
+import json
+
+# Format -> (Dateiendung, MIME-Typ)
+FORMATS = {
+    "txt": (".txt", "text/plain"),
+    "json": (".json", "application/json"),
+    "srt": (".srt", "application/x-subrip"),
+    "vtt": (".vtt", "text/vtt"),
+}
+
+
+def _speaker(entry):
+    return entry.get("mapped") if entry.get("has_speaker") else None
+
+
+def _clock(seconds, sep):
+    """Sekunden -> HH:MM:SS<sep>mmm (SRT: ",", WebVTT: ".")."""
+    ms = int(round(max(0.0, seconds) * 1000))
+    h, ms = divmod(ms, 3600000)
+    m, ms = divmod(ms, 60000)
+    s, ms = divmod(ms, 1000)
+    return f"{h:02d}:{m:02d}:{s:02d}{sep}{ms:03d}"
+
+
+def iter_txt(entries, timestamps_enabled=False, force_dummy=False):
+    """Eine Zeile pro Segment (wie die Anzeige in der App)."""
+    from .transcribe import format_segment_line
+    for entry in entries:
+        yield format_segment_line(entry, timestamps_enabled, force_dummy) + "\n"
+
+
+def iter_json(entries, meta=None):
+    """
+    JSON mit einem Objekt pro Segment (Start, Ende, Sprecher, Text). Wird
+    segmentweise erzeugt, damit nie das ganze Dokument als ein String entsteht.
+    """
+    yield "{\n"
+    if meta:
+        yield f'  "meta": {json.dumps(meta, ensure_ascii=False)},\n'
+    yield '  "segments": ['
+    for i, entry in enumerate(entries):
+        segment = {
+            "id": i + 1,
+            "start": round(entry["start"], 3),
+            "end": round(entry["end"], 3),
+            "speaker": _speaker(entry),
+            "speaker_label": entry.get("speaker_label"),
+            "text": entry["text"],
+        }
+        yield ("," if i else "") + "\n    " + json.dumps(segment, ensure_ascii=False)
+    yield "\n  ]\n}\n"
+
+
+def iter_srt(entries):
+    """SubRip-Untertitel; Sprecher werden dem Text vorangestellt."""
+    for i, entry in enumerate(entries, 1):
+        speaker = _speaker(entry)
+        text = f"{speaker}: {entry['text']}" if speaker else entry["text"]
+        yield (f"{i}\n{_clock(entry['start'], ',')} --> {_clock(entry['end'], ',')}\n"
+               f"{text}\n\n")
+
+
+def iter_vtt(entries):
+    """WebVTT; Sprecher als Voice-Tag (<v Person 1>)."""
+    yield "WEBVTT\n\n"
+    for i, entry in enumerate(entries, 1):
+        speaker = _speaker(entry)
+        text = f"<v {speaker}>{entry['text']}" if speaker else entry["text"]
+        yield (f"{i}\n{_clock(entry['start'], '.')} --> {_clock(entry['end'], '.')}\n"
+               f"{text}\n\n")
+
+
+def iter_export(entries, fmt, timestamps_enabled=False, force_dummy=False, meta=None):
+    """
+    Text-Stücke des Exports im Format `fmt` (siehe FORMATS) aus den
+    final_transcript-Einträgen. timestamps_enabled/force_dummy wirken nur auf TXT.
+    """
+    if fmt == "txt":
+        return iter_txt(entries, timestamps_enabled, force_dummy)
+    if fmt == "json":
+        return iter_json(entries, meta)
+    if fmt == "srt":
+        return iter_srt(entries)
+    if fmt == "vtt":
+        return iter_vtt(entries)
+    raise ValueError(f"Unbekanntes Exportformat: {fmt} (erlaubt: {tuple(FORMATS)})")
+
+
+def write_export(entries, fmt, target, **kwargs):
+    """
+    Schreibt den Export stückweise in `target` (Pfad oder binäres
+    Dateiobjekt) als UTF-8. Gibt die Anzahl geschriebener Bytes zurück.
+    """
+    if isinstance(target, (str, bytes)) or hasattr(target, "__fspath__"):
+        with open(target, "wb") as f:
+            return write_export(entries, fmt, f, **kwargs)
+    written = 0
+    for chunk in iter_export(entries, fmt, **kwargs):
+        data = chunk.encode("utf-8")
+        target.write(data)
+        written += len(data)
+    return written
+
+
+def export_bytes(entries, fmt, **kwargs):
+    """Export als bytes (für Downloads); intern stückweise in einen Puffer geschrieben."""
+    buffer = io.BytesIO()
+    write_export(entries, fmt, buffer, **kwargs)
+    return buffer.getvalue()
+
+
+def export_filename(fmt, base="transkript"):
+    return base + FORMATS[fmt][0]
+
+
+def export_mime(fmt):
+    return FORMATS[fmt][1]
@@ -0,0 +1,191 @@
+# modules/fast_diarization.py
+
+import numpy as np
+
+from .audio import AudioBuffer, SAMPLE_RATE, load_audio
+from .vad import detect_speech
+
+# Merkmale (MFCC auf 25 ms Frames, 10 ms Abstand)
+FRAME_S = 0.025
+HOP_S = 0.010
+N_FFT = 512
+N_MELS = 40
+N_MFCC = 20
+BLOCK_S = 60.0              # STFT blockweise, damit lange Aufnahmen wenig Speicher brauchen
+
+# Sprecher-Fenster und Clustering
+WINDOW_S = 1.5              # Länge eines Embedding-Fensters
+STEP_S = 0.75               # Abstand der Fenster
+DISTANCE_THRESHOLD = 2.2    # mittlerer Abstand (in Frame-Streuungen), ab dem Cluster getrennt bleiben
+MAX_SPEAKERS = 8
+MAX_CLUSTER_WINDOWS = 2000  # darüber wird eine Stichprobe geclustert, der Rest zugeordnet
+MIN_TURN_S = 1.0            # kürzere Sprecherwechsel werden geglättet
+
+
+def _mel_filterbank(sample_rate, n_fft=N_FFT, n_mels=N_MELS, fmin=50.0, fmax=None):
+    """Dreiecksfilter auf der Mel-Skala, Form (n_mels, n_fft // 2 + 1)."""
+    fmax = fmax or sample_rate / 2
+
+    def hz_to_mel(hz):
+        return 2595.0 * np.log10(1.0 + hz / 700.0)
+
+    def mel_to_hz(mel):
+        return 700.0 * (10.0 ** (mel / 2595.0) - 1.0)
+
+    mels = np.linspace(hz_to_mel(fmin), hz_to_mel(fmax), n_mels + 2)
+    bins = np.fft.rfftfreq(n_fft, 1.0 / sample_rate)
+    hz = mel_to_hz(mels)
+    fb = np.zeros((n_mels, len(bins)), dtype=np.float32)
+    for i in range(n_mels):
+        lo, mid, hi = hz[i], hz[i + 1], hz[i + 2]
+        rising = (bins - lo) / max(mid - lo, 1e-6)
+        falling = (hi - bins) / max(hi - mid, 1e-6)
+        fb[i] = np.maximum(0.0, np.minimum(rising, falling))
+    return fb
+
+
+def mfcc(samples, sample_rate=SAMPLE_RATE, n_mfcc=N_MFCC):
+    """MFCC pro Frame (Form (Frames, n_mfcc)), blockweise berechnet."""
+    from scipy.fft import dct
+
+    frame = int(FRAME_S * sample_rate)
+    hop = int(HOP_S * sample_rate)
+    n_frames = 1 + (len(samples) - frame) // hop if len(samples) >= frame else 0
+    if n_frames <= 0:
+        return np.zeros((0, n_mfcc), dtype=np.float32)
+
+    window = np.hamming(frame).astype(np.float32)
+    fb = _mel_filterbank(sample_rate)
+    block = max(1, int(BLOCK_S / HOP_S))
+    out = np.empty((n_frames, n_mfcc), dtype=np.float32)
+    for first in range(0, n_frames, block):
+        count = min(block, n_frames - first)
+        idx = (first + np.arange(count))[:, None] * hop + np.arange(frame)[None, :]
+        frames = samples[idx] * window
+        power = np.abs(np.fft.rfft(frames, n=N_FFT, axis=1)) ** 2
+        log_mel = np.log(power @ fb.T + 1e-10)
+        out[first:first + count] = dct(log_mel, type=2, axis=1, norm="ortho")[:, :n_mfcc]
+    return out
+
+
+def _windows(regions, sample_rate):
+    """Embedding-Fenster (start, end) in Sekunden innerhalb der Sprachregionen."""
+    windows = []
+    for start, end in regions:
+        start_s, end_s = start / sample_rate, end / sample_rate
+        if end_s - start_s <= WINDOW_S:
+            windows.append((start_s, end_s))
+            continue
+        t = start_s
+        while t + WINDOW_S < end_s:
+            windows.append((t, t + WINDOW_S))
+            t += STEP_S
+        windows.append((max(start_s, end_s - WINDOW_S), end_s))
+    return windows
+
+
+def embed_windows(features, windows):
+    """
+    Ein Embedding pro Fenster: Mittelwert der MFCC (ohne c0, also
+    unabhängig von der Lautstärke), geteilt durch die Streuung aller
+    Frames. Abstände sind damit in "Frame-Streuungen" gemessen und die
+    Schwelle hängt nicht von Aufnahmepegel oder Mikrofon ab.
+    """
+    feats = features[:, 1:].astype(np.float64)
+    scale = feats.std(axis=0) + 1e-8
+    # Kumulative Summe: Mittelwert jedes Fensters in O(1)
+    csum = np.vstack([np.zeros(feats.shape[1]), np.cumsum(feats, axis=0)])
+    n = len(feats)
+    starts = np.clip((np.array([w[0] for w in windows]) / HOP_S).astype(int), 0, max(0, n - 1))
+    ends = np.clip((np.array([w[1] for w in windows]) / HOP_S).astype(int), starts + 1, n)
+    mean = (csum[ends] - csum[starts]) / (ends - starts)[:, None]
+    return mean / scale
+
+
+def cluster(embeddings, num_speakers=None, threshold=DISTANCE_THRESHOLD, max_speakers=MAX_SPEAKERS):
+    """
+    Agglomeratives Clustering (average linkage, euklidische Distanz). Ohne
+    num_speakers entscheidet die Distanzschwelle über die Sprecherzahl.
+    Bei sehr vielen Fenstern wird eine gleichmäßige Stichprobe geclustert
+    und der Rest dem nächsten Cluster-Mittelpunkt zugeordnet.
+    Rückgabe: Label pro Fenster (0, 1, ...).
+    """
+    from scipy.cluster.hierarchy import fcluster, linkage
+
+    n = len(embeddings)
+    if n < 2 or num_speakers == 1:
+        return np.zeros(n, dtype=int)
+    sample = np.linspace(0, n - 1, min(n, MAX_CLUSTER_WINDOWS)).astype(int)
+    tree = linkage(embeddings[sample], method="average", metric="euclidean")
+    if num_speakers:
+        labels = fcluster(tree, t=num_speakers, criterion="maxclust")
+    else:
+        labels = fcluster(tree, t=threshold, criterion="distance")
+        if labels.max() > max_speakers:
+            labels = fcluster(tree, t=max_speakers, criterion="maxclust")
+    if len(sample) == n:
+        return labels - 1
+    centroids = np.vstack([embeddings[sample][labels == k].mean(axis=0) for k in np.unique(labels)])
+    dist = ((embeddings[:, None, :] - centroids[None, :, :]) ** 2).sum(axis=2)
+    return np.argmin(dist, axis=1)
+
+
+def _smooth(labels, windows):
+    """Sprecherwechsel, die kürzer als MIN_TURN_S sind, dem Nachbarn zuschlagen."""
+    labels = labels.copy()
+    min_windows = max(1, int(round(MIN_TURN_S / STEP_S)))
+    i = 0
+    while i < len(labels):
+        j = i
+        while j + 1 < len(labels) and labels[j + 1] == labels[i] and windows[j + 1][0] <= windows[j][1]:
+            j += 1
+        if j - i + 1 < min_windows and i > 0 and windows[i][0] <= windows[i - 1][1]:
+            labels[i:j + 1] = labels[i - 1]
+        i = j + 1
+    return labels
+
+
+def _segments(labels, windows):
+    """Fenster-Labels -> zusammenhängende Segmente (überlappende Fenster teilen sich in der Mitte)."""
+    segments = []
+    for k, ((start, end), label) in enumerate(zip(windows, labels)):
+        if k and start < windows[k - 1][1]:
+            start = (start + windows[k - 1][1]) / 2
+        if k + 1 < len(windows) and windows[k + 1][0] < end:
+            end = (end + windows[k + 1][0]) / 2
+        speaker = f"SPEAKER_{label:02d}"
+        if segments and segments[-1]["speaker"] == speaker and start - segments[-1]["end"] < 1e-6:
+            segments[-1]["end"] = float(end)
+        else:
+            segments.append({"start": float(start), "end": float(end), "speaker": speaker})
+    return segments
+
+
+def diarize_fast(audio_file, num_speakers=None, threshold=DISTANCE_THRESHOLD):
+    """
+    Schnelle Offline-Diarization auf der CPU ohne Modelle: Sprachregionen
+    per Energie (vad.detect_speech), MFCC-Statistiken pro Fenster als
+    Sprecher-Merkmal, agglomeratives Clustering. Deutlich ungenauer als
+    pyannote (keine Überlappungen, ähnliche Stimmen werden verwechselt),
+    aber viele Male schneller als Echtzeit.
+    Rückgabe wie diarize_audio: [{"start", "end", "speaker"}, ...];
+    leere Liste, wenn keine Sprache gefunden wurde.
+    """
+    audio = audio_file if isinstance(audio_file, AudioBuffer) else load_audio(audio_file)
+    samples = np.asarray(audio.samples, dtype=np.float32)
+    regions = detect_speech(samples, audio.sample_rate)
+    if not regions:
+        return []
+    windows = _windows(regions, audio.sample_rate)
+    features = mfcc(samples, audio.sample_rate)
+    if len(features) == 0:
+        return []
+    labels = cluster(embed_windows(features, windows), num_speakers, threshold)
+    # Labels in Reihenfolge des ersten Auftretens (SPEAKER_00 spricht zuerst)
+    order = {}
+    for label in labels:
+        order.setdefault(label, len(order))
+    labels = np.array([order[label] for label in labels])
+    segments = _segments(_smooth(labels, windows), windows)
+    print(f"[INFO] Schnelle Diarization: {len(order)} Sprecher, {len(segments)} Segmente")
+    return segments
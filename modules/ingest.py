@@ -0,0 +1,417 @@
+# modules/ingest.py
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+from .audio import SAMPLE_RATE
+from .workspace import get_workspace
+
+COPY_CHUNK = 1 << 20        # Bytes pro Lese-/Schreibvorgang
+
+# Container -> Dateiendung der abgelegten Originaldatei
+EXTENSIONS = {"wav": ".wav", "mp3": ".mp3", "mp4": ".m4a", "ogg": ".ogg", "flac": ".flac", "webm": ".webm"}
+# Kennungen von Audio-Codecs in MP4-/WebM-Containern
+_MP4_CODECS = ((b"mp4a", "aac"), (b"alac", "alac"), (b"Opus", "opus"), (b"fLaC", "flac"),
+               (b"ac-3", "ac3"), (b"ec-3", "eac3"))
+_WEBM_CODECS = ((b"A_OPUS", "opus"), (b"A_VORBIS", "vorbis"), (b"A_AAC", "aac"))
+_WAV_TAGS = {1: "pcm", 3: "float", 6: "alaw", 7: "mulaw", 0x11: "adpcm_ima", 0x55: "mp3"}
+
+_lock = threading.Lock()    # serialisiert das Ablegen gleicher Inhalte
+
+
+@dataclass
+class IngestedAudio:
+    """
+    Eine abgelegte Audiodatei (im Arbeitsbereich unter "upload-<sha256>").
+    - path: Original (Dateiname = SHA-256 des Inhalts + Endung des Containers)
+    - decoded_path: dieselbe Aufnahme als 16 kHz mono PCM16-WAV (optional)
+    - reused: Inhalt lag bereits vor, es wurde nichts neu geschrieben
+    """
+    path: str
+    sha256: str
+    size: int
+    name: str = None
+    container: str = "unknown"
+    codec: str = "unknown"
+    sample_rate: int = None
+    channels: int = None
+    duration: float = None
+    decoded_path: str = None
+    reused: bool = False
+
+    @property
+    def pipeline_path(self):
+        """Datei für die Pipeline: die dekodierte Fassung, falls vorhanden."""
+        return self.decoded_path or self.path
+
+
+def sniff_format(head):
+    """Container und (soweit am Dateianfang erkennbar) Codec anhand der Magic Bytes."""
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav", "unknown"
+    if head[:4] == b"fLaC":
+        return "flac", "flac"
+    if head[:4] == b"OggS":
+        for marker, codec in ((b"OpusHead", "opus"), (b"\x01vorbis", "vorbis"), (b"\x7fFLAC", "flac")):
+            if marker in head[:512]:
+                return "ogg", codec
+        return "ogg", "unknown"
+    if head[4:8] == b"ftyp":
+        return "mp4", "unknown"
+    if head[:4] == b"\x1aE\xdf\xa3":
+        codec = next((c for marker, c in _WEBM_CODECS if marker in head), "unknown")
+        return "webm", codec
+    if head[:3] == b"ID3" or (len(head) > 1 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0):
+        return "mp3", "mp3"
+    return "unknown", "unknown"
+
+
+def _pcm_to_float(data, tag, bits):
+    """Interleavte PCM-/Float-Bytes -> float32 in [-1, 1]."""
+    if tag == 3:
+        return np.frombuffer(data, dtype="<f4" if bits == 32 else "<f8").astype(np.float32)
+    if bits == 8:
+        return (np.frombuffer(data, dtype=np.uint8).astype(np.float32) - 128.0) / 128.0
+    if bits == 16:
+        return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+    if bits == 24:
+        b = np.frombuffer(data, dtype=np.uint8).reshape(-1, 3).astype(np.int32)
+        x = b[:, 0] | (b[:, 1] << 8) | (b[:, 2] << 16)
+        x = np.where(x & 0x800000, x - (1 << 24), x)
+        return x.astype(np.float32) / float(1 << 23)
+    return np.frombuffer(data, dtype="<i4").astype(np.float32) / float(1 << 31)
+
+
+class WavStreamDecoder:
+    """
+    Dekodiert einen WAV-Bytestrom stückweise (PCM 8/16/24/32 bit, float)
+    zu float32 mono. Gibt feed() ein Format nicht her, ist `supported`
+    False und die Datei wird nach dem Kopieren dekodiert.
+    """
+
+    def __init__(self):
+        self.supported = True
+        self.sample_rate = None
+        self.channels = None
+        self.codec = "unknown"
+        self._tag = self._bits = None
+        self._header = b""
+        self._fmt = None
+        self._remaining = None      # Bytes im data-Chunk (None = Header noch nicht gelesen)
+        self._carry = b""           # unvollständiger Frame vom letzten Stück
+
+    def _parse_header(self):
+        buf = self._header
+        pos = 12
+        while pos + 8 <= len(buf):
+            chunk_id = buf[pos:pos + 4]
+            size = int.from_bytes(buf[pos + 4:pos + 8], "little")
+            if chunk_id == b"data":
+                if self._fmt is None:
+                    break
+                # 0 / 0xFFFFFFFF: Länge unbekannt (z.B. abgebrochene Aufnahme) -> bis Dateiende
+                self._remaining = size if 0 < size < 0xFFFFFFFF else float("inf")
+                return buf[pos + 8:]
+            if pos + 8 + size > len(buf):
+                return None     # Chunk noch nicht vollständig
+            if chunk_id == b"fmt ":
+                self._read_fmt(buf[pos + 8:pos + 8 + size])
+                if not self.supported:
+                    return None
+            pos += 8 + size + (size & 1)
+        if len(buf) > 4 * COPY_CHUNK:
+            # Kein data-Chunk in den ersten MB: kein sinnvoller Stream
+            self.supported = False
+        return None
+
+    def _read_fmt(self, fmt):
+        tag = int.from_bytes(fmt[0:2], "little")
+        channels = int.from_bytes(fmt[2:4], "little")
+        rate = int.from_bytes(fmt[4:8], "little")
+        bits = int.from_bytes(fmt[14:16], "little")
+        if tag == 0xFFFE and len(fmt) >= 26:    # WAVE_FORMAT_EXTENSIBLE: Subformat-GUID
+            tag = int.from_bytes(fmt[24:26], "little")
+        self._fmt = fmt
+        self.sample_rate, self.channels = rate, channels
+        self._tag, self._bits = tag, bits
+        kind = _WAV_TAGS.get(tag, f"0x{tag:04x}")
+        self.codec = f"{kind}_{bits}bit" if tag in (1, 3) else kind
+        self.supported = (tag == 1 and bits in (8, 16, 24, 32)) or (tag == 3 and bits in (32, 64))
+        self.supported = self.supported and channels > 0 and rate > 0
+
+    @property
+    def header_done(self):
+        return self._remaining is not None
+
+    def feed(self, data):
+        """Nimmt das nächste Stück der Datei an; gibt float32-mono-Samples (ggf. leer) zurück."""
+        if not self.supported:
+            return None
+        if self._remaining is None:
+            self._header += data
+            data = self._parse_header()
+            if data is None:
+                return None
+            self._header = b""
+        if self._remaining != float("inf"):
+            data = data[:int(self._remaining)]
+            self._remaining -= len(data)
+        data = self._carry + data
+        frame = self.channels * self._bits // 8
+        usable = len(data) - len(data) % frame
+        self._carry = data[usable:]
+        samples = _pcm_to_float(data[:usable], self._tag, self._bits)
+        if self.channels > 1:
+            samples = samples.reshape(-1, self.channels).mean(axis=1)
+        return samples
+
+
+def _decode_after_copy(path, output_path):
+    """Dekodiert eine abgelegte Datei zu 16 kHz mono PCM16 (blockweise, sonst über load_audio)."""
+    import soundfile as sf
+    from .preprocessing import StreamingResampler, _downmix
+    try:
+        info = sf.info(path)
+        resampler = StreamingResampler(info.samplerate, SAMPLE_RATE)
+        with sf.SoundFile(output_path, "w", samplerate=SAMPLE_RATE, channels=1, subtype="PCM_16") as out:
+            for block in sf.blocks(path, blocksize=1 << 16, dtype="float32", always_2d=True):
+                for y in resampler.process(_downmix(block)):
+                    out.write(np.clip(y, -1.0, 1.0))
+            for y in resampler.flush():
+                out.write(np.clip(y, -1.0, 1.0))
+        return info.samplerate, info.channels
+    except sf.LibsndfileError:
+        # MP4/AAC u.ä. kann libsndfile nicht lesen -> komplett über faster-whisper/PyAV
+        from .audio import load_audio
+        audio = load_audio(path)
+        sf.write(output_path, np.clip(audio.samples, -1.0, 1.0), SAMPLE_RATE, subtype="PCM_16")
+        return None, None
+
+
+def _record_path(upload_dir, digest):
+    return os.path.join(upload_dir, f"{digest}.json")
+
+
+def _load_record(upload_dir, digest):
+    """Vorhandener Eintrag für diesen Inhalt (nur, wenn die Dateien noch existieren)."""
+    try:
+        with open(_record_path(upload_dir, digest), "r", encoding="utf-8") as f:
+            record = IngestedAudio(**json.load(f))
+    except (OSError, ValueError, TypeError):
+        return None
+    if not os.path.exists(record.path):
+        return None
+    if record.decoded_path and not os.path.exists(record.decoded_path):
+        record.decoded_path = None
+    return record
+
+
+def _save_record(upload_dir, record):
+    data = asdict(record)
+    data.pop("reused")
+    tmp = f"{_record_path(upload_dir, record.sha256)}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, _record_path(upload_dir, record.sha256))
+
+
+def _remove(*paths):
+    for path in paths:
+        if path:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def _seekable(fileobj):
+    try:
+        return fileobj.seekable()
+    except AttributeError:
+        return hasattr(fileobj, "seek")
+
+
+def _hash_stream(fileobj):
+    """SHA-256 und Größe eines Dateiobjekts (nur lesen, nichts schreiben); spult danach zurück."""
+    h = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: fileobj.read(COPY_CHUNK), b""):
+        h.update(chunk)
+        size += len(chunk)
+    fileobj.seek(0)
+    return h.hexdigest(), size
+
+
+def _reuse_existing(workspace, digest, name, decode, session):
+    """
+    Liegt der Inhalt bereits vor, wird der Bestand verwendet (fehlt nur die
+    dekodierte Fassung, wird sie aus dem abgelegten Original erzeugt).
+    Sonst None – dann muss der Upload kopiert werden.
+    """
+    if _load_record(workspace.owner_dir(f"upload-{digest}", create=False), digest) is None:
+        return None
+    owner = workspace.hold(f"upload-{digest}")
+    try:
+        with _lock:
+            upload_dir = workspace.owner_dir(owner)
+            existing = _load_record(upload_dir, digest)
+            if existing is None:    # inzwischen verdrängt
+                return None
+            record = _store(upload_dir, digest, None, None, existing.size, name,
+                            existing.container, existing.codec, None, decode)
+        if session is not None:
+            session.use(owner)
+    finally:
+        workspace.release(owner)
+    workspace.enforce_quota()
+    return record
+
+
+def ingest_upload(fileobj, name=None, decode=True, session=None, workspace=None):
+    """
+    Legt eine hochgeladene Datei ab, ohne sie ganz in den Speicher zu lesen:
+    - bildet zuerst den SHA-256 (bei seekbaren Dateiobjekten in einem reinen
+      Lesedurchlauf) und verwendet bereits abgelegte Inhalte wieder, ohne
+      etwas zu kopieren oder zu dekodieren,
+    - kopiert sonst in Stücken von COPY_CHUNK Bytes,
+    - erkennt Container/Codec an den Magic Bytes (die Endung wird ignoriert),
+    - dekodiert mit decode=True zusätzlich zu 16 kHz mono – bei WAV im
+      selben Durchlauf, sonst direkt im Anschluss.
+    Nicht seekbare Ströme werden beim Kopieren gehasht; abgeleitete Dateien
+    entstehen dann erst, wenn feststeht, dass der Inhalt neu ist.
+    fileobj: binäres Dateiobjekt (z.B. Streamlit UploadedFile).
+    session: SessionWorkspace, die den Upload danach hält (schützt ihn vor
+    der Verdrängung, solange die Sitzung ihn benutzt).
+    Gibt IngestedAudio zurück.
+    """
+    import soundfile as sf
+    from .preprocessing import StreamingResampler
+
+    workspace = workspace or get_workspace()
+    digest = None
+    if _seekable(fileobj):
+        fileobj.seek(0)
+        digest, _ = _hash_stream(fileobj)
+        record = _reuse_existing(workspace, digest, name, decode, session)
+        if record is not None:
+            return record
+
+    h = hashlib.sha256() if digest is None else None
+    size = 0
+    container = codec = None
+    mp4_tail = b""
+    wav = resampler = out = None
+    decoded_tmp = None
+    tmp = workspace.new_file(suffix=".part", reserve_bytes=getattr(fileobj, "size", 0) or 0)
+    try:
+        with open(tmp, "wb") as f:
+            for chunk in iter(lambda: fileobj.read(COPY_CHUNK), b""):
+                if h is not None:
+                    h.update(chunk)
+                f.write(chunk)
+                size += len(chunk)
+
+                if container is None:
+                    container, codec = sniff_format(chunk[:4096])
+                    if decode and container == "wav":
+                        wav = WavStreamDecoder()
+                if container == "mp4" and codec == "unknown":
+                    # Codec-Kennung steht in der moov-Box, oft erst am Dateiende
+                    window = mp4_tail + chunk
+                    codec = next((c for marker, c in _MP4_CODECS if marker in window), "unknown")
+                    mp4_tail = chunk[-3:]
+                # Im selben Durchlauf nur dekodieren, wenn der Inhalt sicher neu ist;
+                # sonst nur den Header lesen (Codec)
+                if wav is not None and wav.supported and (digest is not None or not wav.header_done):
+                    samples = wav.feed(chunk)
+                    if samples is not None and out is None and wav.supported and digest is not None:
+                        resampler = StreamingResampler(wav.sample_rate, SAMPLE_RATE)
+                        decoded_tmp = workspace.new_file(suffix=".16k.part")
+                        out = sf.SoundFile(decoded_tmp, "w", samplerate=SAMPLE_RATE, channels=1,
+                                           subtype="PCM_16", format="WAV")
+                    if out is not None and samples is not None and len(samples):
+                        for y in resampler.process(samples):
+                            out.write(np.clip(y, -1.0, 1.0))
+            if out is not None:
+                for y in resampler.flush():
+                    out.write(np.clip(y, -1.0, 1.0))
+                out.close()
+                out = None
+
+        if digest is None:
+            digest = h.hexdigest()
+        owner = workspace.hold(f"upload-{digest}")
+        try:
+            with _lock:
+                record = _store(workspace.owner_dir(owner), digest, tmp, decoded_tmp, size, name,
+                                container, codec, wav, decode)
+            if session is not None:
+                session.use(owner)
+        finally:
+            workspace.release(owner)
+        workspace.enforce_quota()
+        return record
+    except BaseException:
+        if out is not None:
+            out.close()
+        _remove(tmp, decoded_tmp)
+        raise
+
+
+def _store(upload_dir, digest, tmp, decoded_tmp, size, name, container, codec, wav, decode):
+    """Verschiebt die kopierte (und ggf. dekodierte) Datei an ihren Platz bzw. verwendet den Bestand."""
+    import soundfile as sf
+
+    existing = _load_record(upload_dir, digest)
+    if existing is not None and (existing.decoded_path or not decode):
+        _remove(tmp, decoded_tmp)
+        existing.reused = True
+        existing.name = name or existing.name
+        print(f"[INFO] Upload bereits vorhanden, wird wiederverwendet: {existing.path}")
+        return existing
+
+    if wav is not None and wav.codec != "unknown":
+        codec = wav.codec
+    if container == "unknown" and name:
+        ext = os.path.splitext(name)[1].lower() or ".bin"
+    else:
+        ext = EXTENSIONS.get(container, ".bin")
+    path = existing.path if existing else os.path.join(upload_dir, digest + ext)
+    if existing:
+        _remove(tmp)
+    else:
+        os.replace(tmp, path)
+    record = IngestedAudio(path=path, sha256=digest, size=size, name=name,
+                           container=container, codec=codec)
+    try:
+        info = sf.info(path)
+        record.sample_rate, record.channels = info.samplerate, info.channels
+        record.duration = info.frames / float(info.samplerate) if info.samplerate else None
+    except Exception:
+        pass
+
+    if decode:
+        decoded_path = os.path.join(upload_dir, f"{digest}.16k.wav")
+        try:
+            if decoded_tmp is not None and wav.supported:
+                os.replace(decoded_tmp, decoded_path)
+            else:
+                _remove(decoded_tmp)
+                rate, channels = _decode_after_copy(path, decoded_path)
+                record.sample_rate = record.sample_rate or rate
+                record.channels = record.channels or channels
+            record.decoded_path = decoded_path
+            if record.duration is None:
+                record.duration = sf.info(decoded_path).duration
+        except Exception as e:
+            _remove(decoded_path)
+            print(f"[WARNUNG] Upload konnte nicht vorab dekodiert werden ({e}); "
+                  f"die Pipeline dekodiert selbst")
+    _save_record(upload_dir, record)
+    print(f"[OK] Upload abgelegt: {record.path} ({container}/{record.codec}, {size / 1e6:.1f} MB)")
+    return record
@@ -0,0 +1,290 @@
+# modules/instrumentation.py
+
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+
+# TRANSKRIPTOR_INSTRUMENTATION=0 schaltet die Messungen ab (Spans werden dann
+# zu No-Ops); die beiden Pfade aktivieren optionale Exporte.
+ENABLED = os.environ.get("TRANSKRIPTOR_INSTRUMENTATION", "1") != "0"
+JSONL_PATH = os.environ.get("TRANSKRIPTOR_METRICS_JSONL")
+PROMETHEUS_PATH = os.environ.get("TRANSKRIPTOR_METRICS_PROM")
+METRIC_PREFIX = "transkriptor"
+
+_lock = threading.Lock()
+_totals = {}        # Stufe -> {"count", "wall_s", "cpu_s", "items"} seit Prozessstart
+
+try:
+    import resource
+except ImportError:     # Windows
+    resource = None
+
+
+def _rss_mb():
+    """Aktueller RSS in MB (Linux über /proc, sonst None)."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _peak_rss_mb():
+    """Bisheriger Höchststand des RSS in MB (prozessweit, seit Prozessstart)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS liefert Bytes, Linux Kilobytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class Span:
+    """
+    Eine gemessene Stufe: Wall-Zeit, CPU-Zeit des Prozesses (inkl. nativer
+    Threads von CTranslate2/torch – laufen Stufen parallel, überlappen sich
+    die CPU-Zeiten), RSS vorher/nachher und Zähler.
+    Speicher: ru_maxrss ist der Höchststand seit Prozessstart und sagt über
+    eine einzelne Stufe nichts aus. Gemeldet werden daher rss_delta_mb
+    (aktueller RSS nachher minus vorher) und peak_growth_mb (um wie viel die
+    Stufe den Prozess-Höchststand angehoben hat; 0, wenn sie unter dem
+    bisherigen Höchststand blieb).
+    """
+
+    __slots__ = ("name", "started", "wall_s", "cpu_s", "rss_start_mb", "rss_end_mb",
+                 "peak_start_mb", "peak_growth_mb", "counts", "thread")
+
+    def __init__(self, name, counts=None):
+        self.name = name
+        self.started = time.time()
+        self.wall_s = 0.0
+        self.cpu_s = None
+        self.rss_start_mb = None
+        self.rss_end_mb = None
+        self.peak_start_mb = None
+        self.peak_growth_mb = None
+        self.counts = dict(counts or {})
+        self.thread = threading.current_thread().name
+
+    def count(self, key, n=1):
+        self.counts[key] = self.counts.get(key, 0) + n
+
+    def start_memory(self):
+        self.rss_start_mb = _rss_mb()
+        self.peak_start_mb = _peak_rss_mb()
+
+    def end_memory(self):
+        self.rss_end_mb = _rss_mb()
+        peak = _peak_rss_mb()
+        if peak is not None and self.peak_start_mb is not None:
+            self.peak_growth_mb = peak - self.peak_start_mb
+
+    def as_dict(self):
+        rss_delta = None
+        if self.rss_start_mb is not None and self.rss_end_mb is not None:
+            rss_delta = self.rss_end_mb - self.rss_start_mb
+        return {
+            "name": self.name,
+            "started": self.started,
+            "wall_s": self.wall_s,
+            "cpu_s": self.cpu_s,
+            "rss_start_mb": self.rss_start_mb,
+            "rss_end_mb": self.rss_end_mb,
+            "rss_delta_mb": rss_delta,
+            "peak_growth_mb": self.peak_growth_mb,
+            "counts": dict(self.counts),
+            "thread": self.thread,
+        }
+
+
+class _NullSpan:
+    """Ersatz bei abgeschalteter Messung."""
+
+    def count(self, key, n=1):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+_NULL_CONTEXT = contextlib.nullcontext(_NULL_SPAN)
+
+
+class Tracer:
+    """
+    Sammelt die Spans eines Pipeline-Laufs (threadsicher). Mit enabled=False
+    liefert span() einen geteilten No-Op-Kontext, die Kosten sind dann
+    vernachlässigbar.
+    """
+
+    def __init__(self, enabled=None, labels=None):
+        self.enabled = ENABLED if enabled is None else enabled
+        self.labels = dict(labels or {})
+        self._spans = []
+        self._accumulating = {}     # Name -> Span, der über mehrere Blöcke summiert
+        self._lock = threading.Lock()
+
+    def span(self, name, **counts):
+        """Kontextmanager: misst den Block als Stufe `name`; Zähler über span.count()."""
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure(name, counts)
+
+    @contextlib.contextmanager
+    def _measure(self, name, counts):
+        span = Span(name, counts)
+        span.start_memory()
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wall_s = time.perf_counter() - t0
+            span.cpu_s = time.process_time() - cpu0
+            span.end_memory()
+            self._add(span)
+
+    def accumulate(self, name):
+        """
+        Wie span(), summiert aber alle Blöcke mit demselben Namen zu einem
+        Span – z.B. für Arbeit, die in einem Generator zwischen den yields
+        stattfindet. Abgeschlossen wird er mit close() oder finish().
+        """
+        if not self.enabled:
+            return _NULL_CONTEXT
+        return self._measure_into(name)
+
+    @contextlib.contextmanager
+    def _measure_into(self, name):
+        with self._lock:
+            span = self._accumulating.get(name)
+            if span is None:
+                span = self._accumulating[name] = Span(name)
+                span.cpu_s = 0.0
+                span.start_memory()
+        cpu0 = time.process_time()
+        t0 = time.perf_counter()
+        try:
+            yield span
+        finally:
+            span.wall_s += time.perf_counter() - t0
+            span.cpu_s += time.process_time() - cpu0
+
+    def meter(self, iterable, name):
+        """Iteriert über `iterable` und misst die Zeit in next() als Span `name`."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            with self.accumulate(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+            yield item
+
+    def close(self, name, **counts):
+        """Schließt einen mit accumulate() summierten Span ab (optional mit Zählern)."""
+        with self._lock:
+            span = self._accumulating.pop(name, None)
+        if span is not None:
+            span.counts.update(counts)
+            span.end_memory()
+            self._add(span)
+
+    def record(self, name, wall_s, cpu_s=None, **counts):
+        """Trägt eine anderswo gemessene Stufe nach (z.B. aus einem Worker-Prozess; ohne Speicherwerte)."""
+        if not self.enabled:
+            return
+        span = Span(name, counts)
+        span.started -= wall_s
+        span.wall_s = wall_s
+        span.cpu_s = cpu_s
+        self._add(span)
+
+    def _add(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self):
+        """Alle Spans als Liste von dicts (in Abschlussreihenfolge)."""
+        with self._lock:
+            return [s.as_dict() for s in self._spans]
+
+    def finish(self):
+        """
+        Schließt den Lauf ab: addiert die Spans zu den Prozess-Summen und
+        schreibt die konfigurierten Exporte. Gibt die Spans zurück.
+        """
+        for name in list(self._accumulating):
+            self.close(name)
+        spans = self.spans()
+        if not self.enabled:
+            return spans
+        _add_totals(spans)
+        try:
+            if JSONL_PATH:
+                write_jsonl(JSONL_PATH, spans, self.labels)
+            if PROMETHEUS_PATH:
+                write_prometheus(PROMETHEUS_PATH)
+        except OSError as e:
+            print(f"[WARNUNG] Metriken konnten nicht exportiert werden: {e}")
+        return spans
+
+
+def _add_totals(spans):
+    with _lock:
+        for s in spans:
+            t = _totals.setdefault(s["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "items": 0})
+            t["count"] += 1
+            t["wall_s"] += s["wall_s"]
+            t["cpu_s"] += s["cpu_s"] or 0.0
+            t["items"] += s["counts"].get("segments", 0)
+
+
+def totals():
+    """Summen pro Stufe seit Prozessstart."""
+    with _lock:
+        return {name: dict(t) for name, t in _totals.items()}
+
+
+def write_jsonl(path, spans, labels=None):
+    """Hängt pro Span eine JSON-Zeile an `path` an."""
+    with open(path, "a", encoding="utf-8") as f:
+        for s in spans:
+            f.write(json.dumps(dict(s, **(labels or {})), ensure_ascii=False) + "\n")
+
+
+def prometheus_text():
+    """Prozess-Summen im Prometheus-Textformat (z.B. für den node_exporter-Textfile-Collector)."""
+    metrics = (
+        ("stage_runs_total", "count", "Anzahl Läufe pro Stufe"),
+        ("stage_wall_seconds_total", "wall_s", "Summierte Wall-Zeit pro Stufe"),
+        ("stage_cpu_seconds_total", "cpu_s", "Summierte CPU-Zeit pro Stufe"),
+        ("stage_segments_total", "items", "Verarbeitete Segmente pro Stufe"),
+    )
+    data = totals()
+    lines = []
+    for metric, key, help_text in metrics:
+        name = f"{METRIC_PREFIX}_{metric}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for stage, t in sorted(data.items()):
+            lines.append(f'{name}{{stage="{stage}"}} {t[key]}')
+    peak = _peak_rss_mb()
+    if peak is not None:
+        name = f"{METRIC_PREFIX}_peak_rss_bytes"
+        lines.append(f"# HELP {name} RSS-Höchststand des Prozesses seit Start")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(f"{name} {int(peak * 1024 * 1024)}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path):
+    """Schreibt prometheus_text() atomar nach `path`."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(prometheus_text())
+    os.replace(tmp, path)
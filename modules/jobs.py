@@ -0,0 +1,257 @@
+# modules/jobs.py
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from .workspace import get_workspace
+
+# Wie viele rechenintensive Transkriptionen gleichzeitig laufen dürfen
+# (pro Server-Prozess); weitere Aufträge warten in der Warteschlange.
+MAX_HEAVY_JOBS = int(os.environ.get("TRANSKRIPTOR_MAX_JOBS", "1"))
+MAX_QUEUED_JOBS = int(os.environ.get("TRANSKRIPTOR_MAX_QUEUED_JOBS", "20"))
+JOB_RETENTION_S = 3600      # abgeschlossene Aufträge so lange abrufbar halten
+MAX_LINES = 5000            # Live-Zeilen pro Auftrag (nur für die Anzeige)
+
+STAGE_LABELS = {
+    "queued": "In Warteschlange",
+    "prepare": "Vorbereitung",
+    "transcribe": "Transkription",
+    "diarize": "Sprechererkennung",
+    "done": "Fertig",
+}
+
+ACTIVE_STATES = ("queued", "running")
+
+
+class QueueFullError(RuntimeError):
+    """Die Warteschlange ist voll; der Auftrag wurde nicht angenommen."""
+
+
+class Job:
+    """
+    Ein Transkriptionsauftrag. Wird vom Worker-Thread aktualisiert und von der
+    UI über snapshot() gelesen. status: queued, running, done, failed, cancelled.
+    """
+
+    def __init__(self, file_path, kwargs, owner=None):
+        self.id = uuid.uuid4().hex[:12]
+        self.file_path = file_path
+        self.kwargs = kwargs
+        self.owner = owner
+        self.workspace_owner = None     # gehaltener Besitzer der Eingabedatei (workspace.py)
+        self.status = "queued"
+        self.stage = "queued"
+        self.progress = 0.0
+        self.lines = []
+        self.text = None
+        self.debug = None
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished_at = None
+        self._stage_started = {}
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    @property
+    def finished(self):
+        return self.status not in ACTIVE_STATES
+
+    @property
+    def cancel_requested(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _set_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+            self._stage_started[stage] = time.time()
+
+    def eta_s(self):
+        """
+        Geschätzte Restzeit der Transkription (s), hochgerechnet aus dem
+        bisherigen Fortschritt; None, solange keine Schätzung möglich ist.
+        """
+        started = self._stage_started.get("transcribe")
+        if self.stage != "transcribe" or not started or self.progress <= 0.0:
+            return None
+        elapsed = time.time() - started
+        return elapsed * (1.0 - self.progress) / self.progress
+
+    def snapshot(self, tail=None):
+        """Momentaufnahme für die UI (Kopie, threadsicher)."""
+        with self._lock:
+            lines = self.lines[-tail:] if tail else list(self.lines)
+            return {
+                "id": self.id,
+                "status": self.status,
+                "stage": self.stage,
+                "stage_label": STAGE_LABELS.get(self.stage, self.stage),
+                "progress": self.progress,
+                "eta_s": self.eta_s(),
+                "lines": lines,
+                "segments": len(self.lines),
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobManager:
+    """
+    Hintergrund-Warteschlange für Transkriptionen ohne externen Broker.
+    Jeder Auftrag bekommt einen eigenen Thread; ein Semaphor begrenzt, wie
+    viele davon gleichzeitig Whisper/pyannote rechnen dürfen. Aufträge sind
+    prozessweit über ihre ID abrufbar – auch nach einem Neuladen der Seite
+    oder aus einer anderen Sitzung.
+    """
+
+    def __init__(self, max_heavy_jobs=MAX_HEAVY_JOBS, max_queued=MAX_QUEUED_JOBS,
+                 retention_s=JOB_RETENTION_S):
+        self.max_heavy_jobs = max(1, int(max_heavy_jobs))
+        self.max_queued = max_queued
+        self.retention_s = retention_s
+        self._slots = threading.BoundedSemaphore(self.max_heavy_jobs)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, file_path, owner=None, **kwargs):
+        """
+        Nimmt einen Auftrag an (kwargs gehen an transcribe_audio_stream) und
+        gibt die Job-ID zurück. Wirft QueueFullError, wenn zu viele warten.
+        """
+        job = Job(file_path, kwargs, owner)
+        with self._lock:
+            self._prune_locked()
+            waiting = sum(1 for j in self._jobs.values() if j.status == "queued")
+            if waiting >= self.max_queued:
+                raise QueueFullError(
+                    f"Zu viele Aufträge in der Warteschlange ({waiting}); bitte später erneut versuchen"
+                )
+            self._jobs[job.id] = job
+        # Eingabedatei bis zum Ende des Auftrags vor der Verdrängung schützen
+        job.workspace_owner = get_workspace().hold_path(file_path)
+        threading.Thread(target=self._run, args=(job,), daemon=True, name=f"job-{job.id}").start()
+        print(f"[INFO] Auftrag {job.id} angenommen: {file_path}")
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.get(job_id)
+        if job is not None and not job.finished:
+            job.cancel()
+            return True
+        return False
+
+    def jobs(self, owner=None):
+        with self._lock:
+            return [j for j in self._jobs.values() if owner is None or j.owner == owner]
+
+    def queue_position(self, job_id):
+        """1 = nächster in der Warteschlange; 0, wenn der Auftrag nicht wartet."""
+        with self._lock:
+            waiting = [j.id for j in self._jobs.values() if j.status == "queued"]
+        return waiting.index(job_id) + 1 if job_id in waiting else 0
+
+    def load(self):
+        """Anzahl laufender und wartender Aufträge."""
+        with self._lock:
+            states = [j.status for j in self._jobs.values()]
+        return {"running": states.count("running"), "queued": states.count("queued"),
+                "max_running": self.max_heavy_jobs}
+
+    def _prune_locked(self):
+        cutoff = time.time() - self.retention_s
+        for job_id in [j.id for j in self._jobs.values() if j.finished and j.finished_at < cutoff]:
+            self._jobs.pop(job_id)
+
+    def _finish(self, job, status, error=None):
+        with job._lock:
+            job.status = status
+            job.error = error
+            job.finished_at = time.time()
+        if status == "done":
+            job._set_stage("done")
+        print(f"[INFO] Auftrag {job.id}: {status}" + (f" ({error})" if error else ""))
+
+    def _run(self, job):
+        try:
+            self._run_in_slot(job)
+        finally:
+            get_workspace().release(job.workspace_owner)
+
+    def _run_in_slot(self, job):
+        # Auf einen freien Rechenplatz warten; Abbruch bleibt währenddessen möglich
+        while not self._slots.acquire(timeout=0.2):
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+                return
+        try:
+            if job.cancel_requested:
+                self._finish(job, "cancelled")
+                return
+            with job._lock:
+                job.status = "running"
+                job.started = time.time()
+            job._set_stage("prepare")
+            self._transcribe(job)
+        except Exception as e:
+            self._finish(job, "failed", f"{type(e).__name__}: {e}")
+        finally:
+            self._slots.release()
+
+    def _transcribe(self, job):
+        from .transcribe import transcribe_audio_stream
+
+        events = transcribe_audio_stream(job.file_path, **job.kwargs)
+        try:
+            for event in events:
+                if job.cancel_requested:
+                    # close() beendet den Generator; dessen finally wartet auf eine
+                    # laufende Diarization und räumt Temp-Dateien auf. Der Rechenplatz
+                    # wird erst danach (in _run_in_slot) freigegeben.
+                    self._finish(job, "cancelled")
+                    return
+                kind = event["event"]
+                if kind == "stage":
+                    job._set_stage(event["stage"])
+                elif kind == "segment":
+                    with job._lock:
+                        if len(job.lines) < MAX_LINES:
+                            job.lines.append(event["line"])
+                        job.progress = event["progress"]
+                elif kind == "speakers":
+                    with job._lock:
+                        job.lines = event["lines"][:MAX_LINES]
+                elif kind == "done":
+                    with job._lock:
+                        job.text = event["text"]
+                        job.debug = event["debug"]
+                        job.progress = 1.0
+                    self._finish(job, "done")
+                    return
+        finally:
+            events.close()
+        self._finish(job, "failed", "Transkription ohne Ergebnis beendet")
+
+
+_default_manager = None
+_manager_lock = threading.Lock()
+
+
+def get_job_manager():
+    """Prozessweite Standard-Instanz (geteilt von allen Streamlit-Sitzungen)."""
+    global _default_manager
+    with _manager_lock:
+        if _default_manager is None:
+            _default_manager = JobManager()
+        return _default_manager
@@ -0,0 +1,266 @@
+# modules/live.py
+
+import queue
+import threading
+import time
+import types
+
+import numpy as np
+
+from .audio import SAMPLE_RATE
+from .model_registry import get_model
+
+
+class LiveTranscriber:
+    """
+    Sliding-Window-Transkription für Live-Audio.
+    Eingehende Chunks (mono float32) werden gepuffert; sobald `step_s` neues
+    Audio vorliegt, transkribiert Whisper das noch nicht bestätigte Fenster.
+    Segmente, die mindestens `commit_lag_s` vor dem Pufferende enden, gelten
+    als stabil: sie werden bestätigt ("committed") und ihr Audio verworfen.
+    Wird das Fenster länger als `max_window_s`, wird alles bis auf das letzte
+    Segment bestätigt (bei nur einem Segment dieses), damit Latenz und
+    Rechenzeit begrenzt bleiben; nur erkannte Stille wird ohne Text verworfen.
+    """
+
+    def __init__(self, model_size="small", device=None, compute_type="int8",
+                 step_s=1.0, commit_lag_s=1.5, max_window_s=15.0, language="de",
+                 beam_size=1, model=None):
+        self.model = model or get_model(model_size, device=device, compute_type=compute_type)
+        self.step_s = step_s
+        self.commit_lag_s = commit_lag_s
+        self.max_window_s = max_window_s
+        self.language = language
+        self.beam_size = beam_size
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_offset = 0.0   # absolute Zeit (s) des ersten Samples im Puffer
+        self._since_last_run = 0
+        self._resampler = None
+        self._input_sr = None
+        self.committed = []         # [{"start", "end", "text"}] in absoluter Zeit
+        self.tentative = ""         # noch nicht bestätigter Text am Fensterende
+        self.latencies = []         # Verarbeitungszeit pro Whisper-Lauf (s)
+
+    @property
+    def received_s(self):
+        return self._buffer_offset + len(self._buffer) / SAMPLE_RATE
+
+    def stats(self):
+        """Laufzeit-Kennzahlen: Whisper-Läufe, Rechenzeit pro Lauf, offenes Fenster."""
+        lat = self.latencies
+        return {
+            "runs": len(lat),
+            "mean_latency_s": float(np.mean(lat)) if lat else 0.0,
+            "max_latency_s": float(np.max(lat)) if lat else 0.0,
+            "received_s": self.received_s,
+            "pending_s": len(self._buffer) / SAMPLE_RATE,
+            "committed_segments": len(self.committed),
+        }
+
+    def _to_16k(self, samples, sample_rate):
+        if sample_rate == SAMPLE_RATE:
+            return samples
+        if self._resampler is None or self._input_sr != sample_rate:
+            from .preprocessing import StreamingResampler
+            self._resampler = StreamingResampler(sample_rate, SAMPLE_RATE, chunk=sample_rate // 4)
+            self._input_sr = sample_rate
+        out = self._resampler.process(samples)
+        return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+    def feed(self, samples, sample_rate=SAMPLE_RATE):
+        """
+        Nimmt einen Audio-Chunk entgegen. Gibt die dabei neu bestätigten
+        Segmente zurück (meist leer, bis genug Audio für einen Lauf da ist).
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        samples = self._to_16k(samples, sample_rate)
+        self._buffer = np.concatenate((self._buffer, samples))
+        self._since_last_run += len(samples)
+        if self._since_last_run < self.step_s * SAMPLE_RATE:
+            return []
+        self._since_last_run = 0
+        return self._process(final=False)
+
+    def flush(self):
+        """Bestätigt am Ende alles, was noch im Puffer ist."""
+        if self._resampler is not None:
+            rest = self._resampler.flush()
+            if rest:
+                self._buffer = np.concatenate([self._buffer] + rest)
+        if len(self._buffer) == 0:
+            return []
+        return self._process(final=True)
+
+    def _process(self, final):
+        t0 = time.perf_counter()
+        segments, _ = self.model.transcribe(
+            self._buffer,
+            language=self.language,
+            beam_size=self.beam_size,
+            condition_on_previous_text=False,
+            vad_filter=False,
+        )
+        segments = [
+            {"start": float(s.start), "end": float(s.end), "text": s.text.strip()}
+            for s in segments
+        ]
+        self.latencies.append(time.perf_counter() - t0)
+
+        window_s = len(self._buffer) / SAMPLE_RATE
+        if final:
+            stable = segments
+        else:
+            stable = [s for s in segments if s["end"] <= window_s - self.commit_lag_s]
+            if not stable and window_s > self.max_window_s and segments:
+                # Ein einzelnes langes Segment wird bestätigt statt verworfen
+                stable = segments[:-1] if len(segments) > 1 else segments
+
+        new = []
+        for s in stable:
+            if s["text"]:
+                new.append({
+                    "start": self._buffer_offset + s["start"],
+                    "end": self._buffer_offset + s["end"],
+                    "text": s["text"],
+                })
+        self.committed.extend(new)
+
+        if final:
+            cut = len(self._buffer)
+        elif stable:
+            cut = int(stable[-1]["end"] * SAMPLE_RATE)
+        elif window_s > self.max_window_s and not segments:
+            # Kein Segment erkannt (Stille): alten Teil des Fensters verwerfen
+            cut = int((window_s - self.commit_lag_s) * SAMPLE_RATE)
+        else:
+            cut = 0
+        cut = min(cut, len(self._buffer))
+        self._buffer = self._buffer[cut:]
+        self._buffer_offset += cut / SAMPLE_RATE
+        self.tentative = " ".join(s["text"] for s in segments[len(stable):])
+        return new
+
+
+class LiveSession:
+    """
+    Verbindet eine Chunk-Quelle mit einem LiveTranscriber in einem
+    Hintergrund-Thread. Die Quelle ist ein Iterable von (samples, sample_rate);
+    so lässt sich statt eines Mikrofons auch eine WAV-Datei einspeisen
+    (siehe iter_wav_chunks).
+    """
+
+    def __init__(self, source, transcriber, on_segment=None):
+        self.source = source
+        self.transcriber = transcriber
+        self.on_segment = on_segment
+        self.error = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            for samples, sample_rate in self.source:
+                if self._stop.is_set():
+                    break
+                self._emit(self.transcriber.feed(samples, sample_rate))
+            self._emit(self.transcriber.flush())
+        except Exception as e:
+            self.error = e
+            print(f"[FEHLER] Live-Transkription fehlgeschlagen: {e}")
+        finally:
+            close = getattr(self.source, "close", None)
+            if close:
+                close()
+
+    def _emit(self, segments):
+        if self.on_segment:
+            for seg in segments:
+                self.on_segment(seg)
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name="live-transcriber")
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Stoppt die Quelle, transkribiert den Rest und wartet auf den Thread."""
+        self._stop.set()
+        # Generatoren (z.B. iter_wav_chunks) enden über das Stop-Flag im Thread
+        if not isinstance(self.source, types.GeneratorType):
+            close = getattr(self.source, "close", None)
+            if close:
+                close()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def text(self, with_tentative=True):
+        lines = [s["text"] for s in self.transcriber.committed]
+        if with_tentative and self.transcriber.tentative:
+            lines.append(f"… {self.transcriber.tentative}")
+        return "\n".join(lines)
+
+
+class MicrophoneChunks:
+    """
+    Chunk-Quelle vom Mikrofon: hängt sich an den geteilten InputMonitor
+    (siehe recorder.py) und liefert (samples, sample_rate) über eine begrenzte
+    Queue. Bei voller Queue werden Blöcke verworfen und gezählt.
+    """
+
+    def __init__(self, mic, max_queue_blocks=512):
+        from .recorder import get_input_monitor
+        self.monitor = get_input_monitor(mic)
+        self.sample_rate = self.monitor.samplerate
+        self.dropped_blocks = 0
+        self._queue = queue.Queue(maxsize=max_queue_blocks)
+        self._closed = False
+        self.monitor.add_consumer(self._on_block)
+        self.monitor.acquire()
+
+    def _on_block(self, mono, frames, status):
+        try:
+            self._queue.put_nowait(mono.copy())
+        except queue.Full:
+            self.dropped_blocks += 1
+
+    def __iter__(self):
+        while not self._closed:
+            try:
+                block = self._queue.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            if block is None:
+                break
+            yield block, self.sample_rate
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self.monitor.remove_consumer(self._on_block)
+        self.monitor.release()
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+
+def iter_wav_chunks(path, chunk_s=0.5, realtime=False):
+    """
+    Liest eine Audiodatei blockweise als (samples, sample_rate) – gleiche
+    Schnittstelle wie MicrophoneChunks, z.B. für Tests ohne Audiogerät.
+    realtime=True wartet zwischen den Chunks wie ein echtes Mikrofon.
+    """
+    import soundfile as sf
+    sample_rate = sf.info(path).samplerate
+    blocksize = max(1, int(chunk_s * sample_rate))
+    for block in sf.blocks(path, blocksize=blocksize, dtype="float32", always_2d=True):
+        mono = block.mean(axis=1) if block.shape[1] > 1 else block[:, 0]
+        yield mono, sample_rate
+        if realtime:
+            time.sleep(len(mono) / sample_rate)
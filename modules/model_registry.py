@@ -0,0 +1,136 @@
+# modules/model_registry.py
+
+import threading
+from collections import OrderedDict
+
+# Grobe Speicherschätzung (MB) pro Whisper-Modell bei float32/float16.
+# int8 braucht ungefähr die Hälfte. Werte dienen nur dem LRU-Budget.
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 1000,
+    "medium": 2600,
+    "large": 5000,
+    "large-v2": 5000,
+    "large-v3": 5000,
+}
+
+DEFAULT_MEMORY_BUDGET_MB = 8000
+
+_lock = threading.Lock()
+_models = OrderedDict()     # key -> WhisperModel (LRU-Reihenfolge, zuletzt genutzt am Ende)
+_loading = {}               # key -> threading.Event für parallele Ladeversuche
+_memory_budget_mb = DEFAULT_MEMORY_BUDGET_MB
+
+
+def default_device():
+    """Wählt 'cuda', falls verfügbar, sonst 'cpu'."""
+    try:
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+    except Exception:
+        return "cpu"
+
+
+def estimate_model_mb(model_size, compute_type="default"):
+    """Geschätzter Speicherbedarf eines Modells in MB."""
+    mb = MODEL_MEMORY_MB.get(model_size, MODEL_MEMORY_MB["large"])
+    if compute_type and compute_type.startswith("int8"):
+        mb = mb // 2
+    return mb
+
+
+def set_memory_budget(budget_mb):
+    """Setzt das Speicherbudget (MB) und verdrängt ggf. sofort alte Modelle."""
+    global _memory_budget_mb
+    with _lock:
+        _memory_budget_mb = int(budget_mb)
+        _evict_locked(keep=None)
+
+
+def _used_mb_locked():
+    return sum(estimate_model_mb(k[0], k[2]) for k in _models)
+
+
+def _evict_locked(keep):
+    """Entfernt am längsten ungenutzte Modelle, bis das Budget eingehalten wird."""
+    while _models and _used_mb_locked() > _memory_budget_mb:
+        oldest = next(iter(_models))
+        if oldest == keep:
+            # Das gerade angeforderte Modell wird nie verdrängt
+            if len(_models) == 1:
+                break
+            _models.move_to_end(oldest)
+            continue
+        _models.pop(oldest)
+        print(f"[INFO] Whisper-Modell aus dem Cache entfernt: {oldest}")
+
+
+def get_model(model_size="large", device=None, compute_type="default", cpu_threads=0, num_workers=1):
+    """
+    Gibt ein geladenes WhisperModel zurück (prozessweit geteilt).
+    Schlüssel: (model_size, device, compute_type, cpu_threads, num_workers).
+    Das Modell wird nur einmal geladen; parallele Aufrufe warten auf denselben
+    Ladevorgang. cpu_threads=0 überlässt CTranslate2 die Wahl.
+    """
+    device = device or default_device()
+    key = (model_size, device, compute_type, cpu_threads, num_workers)
+
+    while True:
+        with _lock:
+            if key in _models:
+                _models.move_to_end(key)
+                return _models[key]
+            event = _loading.get(key)
+            if event is None:
+                event = threading.Event()
+                _loading[key] = event
+                break
+        # Ein anderer Thread lädt gerade dieses Modell
+        event.wait()
+
+    try:
+        from faster_whisper import WhisperModel
+        print(f"[INFO] Lade Whisper-Modell {key}...")
+        model = WhisperModel(model_size, device=device, compute_type=compute_type,
+                             cpu_threads=cpu_threads, num_workers=num_workers)
+        with _lock:
+            _models[key] = model
+            _evict_locked(keep=key)
+        print(f"[OK] Whisper-Modell geladen: {key}")
+        return model
+    finally:
+        with _lock:
+            _loading.pop(key, None)
+        event.set()
+
+
+def warmup(model_size="large", device=None, compute_type="default", background=True, **model_kwargs):
+    """
+    Lädt ein Modell vorab (z.B. beim App-Start). Mit background=True
+    läuft der Ladevorgang in einem Daemon-Thread; Rückgabe ist dann der Thread.
+    """
+    if not background:
+        return get_model(model_size, device, compute_type, **model_kwargs)
+
+    def _run():
+        try:
+            get_model(model_size, device, compute_type, **model_kwargs)
+        except Exception as e:
+            print(f"[WARNUNG] Warm-up für Whisper-Modell fehlgeschlagen: {e}")
+
+    t = threading.Thread(target=_run, daemon=True, name=f"whisper-warmup-{model_size}")
+    t.start()
+    return t
+
+
+def loaded_models():
+    """Liste der aktuell geladenen Modell-Schlüssel (älteste zuerst)."""
+    with _lock:
+        return list(_models.keys())
+
+
+def clear():
+    """Entfernt alle Modelle aus dem Cache."""
+    with _lock:
+        _models.clear()
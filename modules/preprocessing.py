@@ -2,19 +2,148 @@
 
 import soundfile as sf
 import numpy as np
-import librosa
-import tempfile
+from math import gcd
+from .workspace import get_workspace
 
-def preprocess_audio(input_path: str):
+TARGET_SR = 16000
+BLOCK_FRAMES = 1 << 16        # Frames pro gelesenem Block im Streaming-Modus
+RESAMPLE_CONTEXT = 1024       # Kontext-Samples links/rechts pro Resampling-Chunk
+
+def preprocess_audio(input_path: str, streaming=False):
+    """
+    Resample auf 16 kHz mono + Clipping-Schutz, Ergebnis als PCM16-Temp-WAV.
+    streaming=True: blockweise Verarbeitung mit konstantem Speicherbedarf
+    (siehe preprocess_audio_blockwise); fällt bei nicht lesbaren Formaten
+    auf die librosa-Variante zurück.
+    """
+    if streaming:
+        try:
+            return preprocess_audio_blockwise(input_path)
+        except sf.LibsndfileError as e:
+            print(f"[WARNUNG] Blockweises Preprocessing nicht möglich ({e}); lade komplett")
+
+    import librosa
     y, sr = librosa.load(input_path, sr=16000, mono=True)
 
     # Verhindert Clipping
-    max_val = np.max(np.abs(y))
+    y = normalize_peak(y)
+
+    # Abspeichern als PCM16 WAV (im Arbeitsbereich, siehe workspace.py)
+    temp_path = get_workspace().new_file(suffix=".wav", reserve_bytes=y.size * 2)
+    sf.write(temp_path, y, 16000, subtype='PCM_16')
+    print(f"[INFO] Audio preprocessing abgeschlossen: {temp_path}")
+    return temp_path
+
+
+def normalize_peak(y):
+    """Verhindert Clipping: skaliert auf maximal 95% Lautstärke, falls nötig."""
+    max_val = np.max(np.abs(y)) if y.size else 0.0
     if max_val > 1.0:
-        y = y / max_val * 0.95  # maximal 95% Lautstärke
+        y = y / max_val * 0.95
+    return y
+
+
+def preprocess_buffer(audio):
+    """
+    Wie preprocess_audio, aber ohne Temp-Datei: arbeitet direkt auf einem
+    bereits dekodierten AudioBuffer (16 kHz mono) und gibt einen neuen zurück.
+    """
+    from .audio import AudioBuffer
+    y = normalize_peak(audio.samples).astype(np.float32, copy=False)
+    print("[INFO] Audio preprocessing (im Speicher) abgeschlossen")
+    return AudioBuffer(y, audio.sample_rate, source_path=audio.source_path,
+                       metadata=dict(audio.metadata, preprocessed=True))
+
+
+def _downmix(block):
+    return block.mean(axis=1) if block.ndim > 1 else block
+
+
+def _scan_peak(input_path, block_frames):
+    """1. Durchlauf: Spitzenpegel des (gemischten) Signals, ohne alles zu laden."""
+    peak = 0.0
+    for block in sf.blocks(input_path, blocksize=block_frames, dtype="float32", always_2d=True):
+        mono = _downmix(block)
+        if mono.size:
+            peak = max(peak, float(np.max(np.abs(mono))))
+    return peak
+
+
+class StreamingResampler:
+    """
+    Polyphasen-Resampling (scipy.signal.resample_poly) in Chunks.
+    Jeder Chunk wird mit RESAMPLE_CONTEXT Samples Kontext links und rechts
+    gefiltert und danach beschnitten – das Ergebnis entspricht bis auf
+    Rundung dem Resampling des ganzen Signals.
+    """
+
+    def __init__(self, sr_in, sr_out, chunk=BLOCK_FRAMES, context=RESAMPLE_CONTEXT):
+        g = gcd(int(sr_in), int(sr_out))
+        self.up = int(sr_out) // g
+        self.down = int(sr_in) // g
+        # Chunk und Kontext auf Vielfache von `down` runden -> ganzzahlige Ausgabelängen
+        self.chunk = max(1, chunk // self.down) * self.down
+        self.context = -(-context // self.down) * self.down
+        self._left = np.zeros(0, dtype=np.float32)
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def _resample(self, x, drop_right):
+        if self.up == self.down == 1:
+            y = x
+        else:
+            from scipy.signal import resample_poly
+            y = resample_poly(x, self.up, self.down).astype(np.float32)
+        start = len(self._left) * self.up // self.down
+        stop = len(y) - drop_right * self.up // self.down
+        return y[start:stop]
+
+    def process(self, x):
+        """Nimmt neue Eingabe-Samples an; gibt die fertigen Ausgabe-Blöcke zurück."""
+        self._pending = np.concatenate((self._pending, x))
+        out = []
+        while len(self._pending) >= self.chunk + self.context:
+            seg = np.concatenate((self._left, self._pending[:self.chunk + self.context]))
+            out.append(self._resample(seg, drop_right=self.context))
+            self._left = self._pending[self.chunk - self.context:self.chunk]
+            self._pending = self._pending[self.chunk:]
+        return out
+
+    def flush(self):
+        """Restliche Samples am Signalende."""
+        out = []
+        if len(self._pending):
+            out.append(self._resample(np.concatenate((self._left, self._pending)), drop_right=0))
+        self._pending = np.zeros(0, dtype=np.float32)
+        return out
+
+
+def preprocess_audio_blockwise(input_path: str, output_path=None, block_frames=BLOCK_FRAMES):
+    """
+    Speicherschonendes Preprocessing für sehr lange Aufnahmen:
+    1. Durchlauf bestimmt den Spitzenpegel, 2. Durchlauf mischt blockweise
+    auf Mono, resampled auf 16 kHz, normalisiert und schreibt PCM16 direkt
+    in die Ausgabedatei. Speicherbedarf ist unabhängig von der Dateilänge.
+    Gibt den Pfad der Ausgabedatei zurück.
+    """
+    info = sf.info(input_path)
+    peak = _scan_peak(input_path, block_frames)
+    # Verhindert Clipping (wie normalize_peak, nur ohne das ganze Signal im Speicher)
+    gain = 0.95 / peak if peak > 1.0 else 1.0
+
+    if output_path is None:
+        output_path = get_workspace().new_file(
+            suffix=".wav", reserve_bytes=int(info.duration * TARGET_SR * 2)
+        )
+
+    resampler = StreamingResampler(info.samplerate, TARGET_SR, chunk=block_frames)
+    with sf.SoundFile(output_path, "w", samplerate=TARGET_SR, channels=1, subtype="PCM_16") as out:
+        def _write(blocks):
+            for y in blocks:
+                out.write(np.clip(y * gain, -1.0, 1.0))
+
+        for block in sf.blocks(input_path, blocksize=block_frames, dtype="float32", always_2d=True):
+            _write(resampler.process(_downmix(block)))
+        _write(resampler.flush())
 
-    # Abspeichern als PCM16 WAV
-    temp = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
-    sf.write(temp.name, y, 16000, subtype='PCM_16')
-    print(f"[INFO] Audio preprocessing abgeschlossen: {temp.name}")
-    return temp.name
+    print(f"[INFO] Audio preprocessing (blockweise) abgeschlossen: {output_path}")
+    return output_path
@@ -2,8 +2,12 @@
 
 import sounddevice as sd
 import numpy as np
-import tempfile
+import threading
+import time
+import queue
+import wave
 import scipy.io.wavfile as wavfile
+from .workspace import get_workspace
 
 def list_microphones():
     """
@@ -25,13 +29,25 @@ def list_microphones():
     return mics
 
 
+def rms_to_level(rms):
+    """RMS (0..1) -> Pegel als Ganzzahl 0..100 (-60 dBFS .. 0 dBFS)."""
+    if rms <= 1e-6:
+        return 0
+    db = 20.0 * np.log10(rms)
+    return int(min(100, max(0, (db + 60.0) / 60.0 * 100)))
+
+
 def get_input_level(mic, duration=0.1):
     """
     Misst den Pegel für das gegebene Mikrofon-Objekt (siehe list_microphones).
-    Rückgabewert: Ganzzahl 0..100
+    Rückgabewert: Ganzzahl 0..100 (dieselbe Skala wie InputMonitor.level)
     """
     if mic is None:
         return 0
+    # Läuft bereits ein geteilter Stream (Pegelanzeige/Aufnahme), nur den Wert lesen
+    monitor = _monitors.get(mic["id"])
+    if monitor is not None and monitor.active:
+        return monitor.level
     try:
         sr = int(mic.get("samplerate", 16000))
         idx = mic["id"]
@@ -43,18 +59,18 @@ def get_input_level(mic, duration=0.1):
             rec_mono = np.mean(rec, axis=1)
         else:
             rec_mono = rec
-        volume_norm = np.linalg.norm(rec_mono) / rec_mono.size
-        return min(int(volume_norm * 1000), 100)
+        return rms_to_level(float(np.sqrt(np.mean(rec_mono * rec_mono))))
     except Exception:
         return 0
 
 
-def record_audio(duration, mic):
+def record_audio(duration, mic, path=None):
     """
     Nimmt Audio vom ausgewählten 'mic' (Objekt aus list_microphones) auf.
     - verwendet native Kanäle des Geräts beim Recording (für Kompatibilität),
     - downmixt danach sauber auf Mono,
     - speichert als PCM_16 WAV und gibt den Pfad zurück.
+    path: Zieldatei; Standard ist eine neue Datei im Arbeitsbereich (workspace.py).
     """
     if mic is None:
         print("[FEHLER] Kein Mikrofon-Objekt übergeben.")
@@ -68,11 +84,22 @@ def record_audio(duration, mic):
     if samplerate <= 0:
         samplerate = 16000
 
+    # Ist das Gerät bereits geöffnet (z.B. Pegelanzeige), denselben Stream mitnutzen
+    monitor = _monitors.get(device_index)
+    if monitor is not None and monitor.active:
+        try:
+            recorder = StreamRecorder(mic, path=path).start()
+            time.sleep(duration)
+            return recorder.stop()
+        except Exception as e:
+            print(f"[FEHLER] Audioaufnahme fehlgeschlagen: {e}")
+            return None
+
     print("[INFO] Starte Audioaufnahme...")
     print(f"[INFO] Aufnahmegerät: {mic['label']}")
     print(f"[INFO] Sample Rate: {samplerate} Hz, Channels: {channels}")
 
-    temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=".wav")
+    path = path or get_workspace().new_file(suffix=".wav")
     try:
         # Versuche mit nativer Kanalanzahl aufzunehmen (ALSA/USB-Geräte wollen oft native channels)
         recording = sd.rec(int(duration * samplerate), samplerate=samplerate, channels=channels, device=device_index, dtype="float32")
@@ -88,10 +115,242 @@ def record_audio(duration, mic):
         mono = np.clip(mono, -1.0, 1.0)
         pcm16 = (mono * 32767).astype(np.int16)
 
-        wavfile.write(temp_file.name, samplerate, pcm16)
-        print(f"[OK] Aufnahme gespeichert unter: {temp_file.name}")
-        return temp_file.name
+        wavfile.write(path, samplerate, pcm16)
+        print(f"[OK] Aufnahme gespeichert unter: {path}")
+        return path
 
     except Exception as e:
         print(f"[FEHLER] Audioaufnahme fehlgeschlagen: {e}")
         return None
+
+
+class InputMonitor:
+    """
+    Ein dauerhaft geöffneter sd.InputStream pro Gerät.
+    - Der Audio-Callback mischt auf Mono und berechnet RMS/Peak; das Ergebnis
+      wird als Tupel in einem Attribut abgelegt (eine Zuweisung, kein Lock),
+      sodass die UI den Pegel beliebig oft praktisch kostenlos lesen kann.
+    - Weitere Verbraucher (z.B. StreamRecorder) hängen sich über add_consumer()
+      an denselben Stream, statt das Gerät ein zweites Mal zu öffnen.
+    Der Stream wird mit acquire() geöffnet und beim letzten release() geschlossen.
+    """
+
+    def __init__(self, mic, blocksize=1024):
+        self.mic = mic
+        self.samplerate = int(mic.get("samplerate", 16000))
+        # Schutz: valide samplerate
+        if self.samplerate <= 0:
+            self.samplerate = 16000
+        self.channels = max(1, int(mic.get("channels", 1)))
+        self.blocksize = blocksize
+        self.overflows = 0
+        self._levels = (0.0, 0.0)   # (rms, peak), wird atomar ersetzt
+        self._consumers = ()        # Tupel, wird atomar ersetzt
+        self._stream = None
+        self._users = 0
+        self._lock = threading.Lock()
+
+    def _callback(self, indata, frames, time_info, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        mono = indata.mean(axis=1) if indata.shape[1] > 1 else indata[:, 0]
+        if mono.size:
+            self._levels = (float(np.sqrt(np.mean(mono * mono))), float(np.max(np.abs(mono))))
+        for consumer in self._consumers:
+            consumer(mono, frames, status)
+
+    @property
+    def active(self):
+        return self._stream is not None
+
+    def acquire(self):
+        """Öffnet den Stream beim ersten Nutzer; jeder acquire() braucht ein release()."""
+        with self._lock:
+            if self._stream is None:
+                # Native Kanalanzahl (ALSA/USB-Geräte wollen oft native channels)
+                stream = sd.InputStream(
+                    samplerate=self.samplerate,
+                    channels=self.channels,
+                    device=self.mic["id"],
+                    dtype="float32",
+                    blocksize=self.blocksize,
+                    callback=self._callback,
+                )
+                stream.start()
+                self._stream = stream
+            self._users += 1
+        return self
+
+    def release(self):
+        with self._lock:
+            self._users = max(0, self._users - 1)
+            if self._users == 0 and self._stream is not None:
+                try:
+                    self._stream.stop()
+                    self._stream.close()
+                finally:
+                    self._stream = None
+                    self._levels = (0.0, 0.0)
+
+    def add_consumer(self, fn):
+        with self._lock:
+            self._consumers = self._consumers + (fn,)
+
+    def remove_consumer(self, fn):
+        with self._lock:
+            self._consumers = tuple(c for c in self._consumers if c is not fn)
+
+    @property
+    def rms(self):
+        return self._levels[0]
+
+    @property
+    def peak(self):
+        return self._levels[1]
+
+    @property
+    def level(self):
+        """Pegel als Ganzzahl 0..100 (-60 dBFS .. 0 dBFS, RMS)."""
+        return rms_to_level(self._levels[0])
+
+
+_monitors = {}
+_monitors_lock = threading.Lock()
+
+
+def get_input_monitor(mic):
+    """Geteilter InputMonitor pro Gerät (Prozess-weit)."""
+    with _monitors_lock:
+        monitor = _monitors.get(mic["id"])
+        if monitor is None:
+            monitor = InputMonitor(mic)
+            _monitors[mic["id"]] = monitor
+        return monitor
+
+
+class StreamRecorder:
+    """
+    Aufnahme beliebiger Länge über den geteilten InputMonitor des Geräts.
+    - Pro Block wird das Mono-Signal in PCM16 gewandelt und in eine begrenzte
+      Queue gelegt (läuft sie voll, wird der Block verworfen und gezählt).
+    - Ein Writer-Thread schreibt die Blöcke fortlaufend in eine WAV-Datei.
+    Speicherbedarf ist dadurch konstant, auch bei stundenlangen Aufnahmen;
+    die Pegelanzeige läuft über denselben Stream weiter.
+    """
+
+    def __init__(self, mic, path=None, max_queue_blocks=256):
+        if mic is None:
+            raise ValueError("Kein Mikrofon-Objekt übergeben.")
+        self.mic = mic
+        self.monitor = get_input_monitor(mic)
+        self.samplerate = self.monitor.samplerate
+        self.channels = self.monitor.channels
+        self.path = path or get_workspace().new_file(suffix=".wav")
+
+        self._queue = queue.Queue(maxsize=max_queue_blocks)
+        self._writer = None
+        self._running = False
+        self._paused = threading.Event()
+        self._lock = threading.Lock()
+        self.frames_written = 0
+        self.dropped_blocks = 0
+        self.dropped_frames = 0
+        self.overflows = 0
+        self.error = None
+
+    # --- Audio-Thread -------------------------------------------------
+    def _on_block(self, mono, frames, status):
+        if status and status.input_overflow:
+            self.overflows += 1
+        if self._paused.is_set():
+            return
+        # PCM16 mit Clipping-Schutz
+        pcm16 = (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+        try:
+            self._queue.put_nowait(pcm16.tobytes())
+        except queue.Full:
+            self.dropped_blocks += 1
+            self.dropped_frames += frames
+
+    # --- Writer-Thread ------------------------------------------------
+    def _write_loop(self):
+        try:
+            with wave.open(self.path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(self.samplerate)
+                while True:
+                    data = self._queue.get()
+                    if data is None:
+                        break
+                    wf.writeframes(data)
+                    self.frames_written += len(data) // 2
+        except Exception as e:
+            self.error = e
+            print(f"[FEHLER] Schreiben der Aufnahme fehlgeschlagen: {e}")
+
+    # --- Steuerung ----------------------------------------------------
+    @property
+    def running(self):
+        return self._running
+
+    @property
+    def paused(self):
+        return self._paused.is_set()
+
+    @property
+    def level(self):
+        return self.monitor.level
+
+    def start(self):
+        with self._lock:
+            if self._running:
+                return self
+            print("[INFO] Starte Streaming-Aufnahme...")
+            print(f"[INFO] Aufnahmegerät: {self.mic['label']}")
+            print(f"[INFO] Sample Rate: {self.samplerate} Hz, Channels: {self.channels}")
+            self._writer = threading.Thread(target=self._write_loop, daemon=True, name="recorder-writer")
+            self._writer.start()
+            self.monitor.add_consumer(self._on_block)
+            try:
+                self.monitor.acquire()
+            except Exception:
+                self.monitor.remove_consumer(self._on_block)
+                self._queue.put(None)
+                self._writer.join()
+                raise
+            self._running = True
+        return self
+
+    def pause(self):
+        self._paused.set()
+
+    def resume(self):
+        self._paused.clear()
+
+    def stop(self):
+        """Beendet die Aufnahme und gibt den Pfad der WAV-Datei zurück."""
+        with self._lock:
+            if not self._running:
+                return self.path
+            try:
+                self.monitor.remove_consumer(self._on_block)
+                self.monitor.release()
+            finally:
+                self._running = False
+                self._queue.put(None)
+                self._writer.join()
+        print(f"[OK] Aufnahme gespeichert unter: {self.path} ({self.stats()['duration']:.1f}s)")
+        return self.path
+
+    def stats(self):
+        """Zähler für die UI: Dauer, geschriebene/verworfene Frames, Overflows."""
+        return {
+            "duration": self.frames_written / float(self.samplerate),
+            "frames_written": self.frames_written,
+            "dropped_blocks": self.dropped_blocks,
+            "dropped_frames": self.dropped_frames,
+            "overflows": self.overflows,
+            "queue_blocks": self._queue.qsize(),
+            "paused": self.paused,
+        }
@@ -0,0 +1,181 @@
+# modules/result_cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "TRANSKRIPTOR_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "transkriptor", "results"),
+)
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+HASH_CHUNK = 1 << 20
+# Beim Verdrängen bis auf diesen Anteil von max_bytes löschen, damit nicht
+# jedes weitere put() sofort wieder den ganzen Cache durchsucht
+EVICT_TARGET = 0.9
+
+_lock = threading.Lock()
+_file_hashes = {}   # (Pfad, Größe, mtime) -> sha256, spart erneutes Hashen im selben Prozess
+_stats = {}         # Stufe -> {"hits": n, "misses": n, "stores": n}
+
+
+def hash_file(path):
+    """SHA-256 des Dateiinhalts (blockweise gelesen)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _lock:
+        cached = _file_hashes.get(memo_key)
+    if cached:
+        return cached
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _lock:
+        _file_hashes[memo_key] = digest
+    return digest
+
+
+def _count(stage, what):
+    with _lock:
+        s = _stats.setdefault(stage, {"hits": 0, "misses": 0, "stores": 0})
+        s[what] += 1
+
+
+def stats():
+    """Treffer/Fehlschläge/Speichervorgänge pro Stufe (seit Prozessstart)."""
+    with _lock:
+        return {stage: dict(v) for stage, v in _stats.items()}
+
+
+class ResultCache:
+    """
+    Inhaltsadressierter Cache für Zwischenergebnisse auf der Festplatte.
+    Schlüssel = Hash(Audio-Inhalt) + die für die jeweilige Stufe relevanten
+    Parameter; jede Stufe ("whisper", "diarization") wird getrennt abgelegt,
+    damit günstige Folgeschritte (Formatierung, Anonymisierung,
+    Sprecherzuordnung) ohne erneutes Whisper/pyannote neu berechnet werden.
+    Überschreitet der Cache `max_bytes`, werden die am längsten nicht
+    genutzten Einträge gelöscht (LRU über die Datei-mtime). Die Gesamtgröße
+    wird mitgezählt; das Verzeichnis wird nur beim ersten put() und beim
+    Verdrängen durchsucht, nicht bei jedem Speichern. Schreiben andere
+    Prozesse in denselben Cache, gleicht der nächste Durchlauf den Zähler ab.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._size = None       # mitgezählte Größe in Bytes (None = noch nicht ermittelt)
+        self._size_lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(stage, audio_hash, params):
+        payload = json.dumps({"stage": stage, "audio": audio_hash, "params": params}, sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _path(self, stage, key):
+        return os.path.join(self.cache_dir, stage, key[:2], f"{key}.json")
+
+    def get(self, stage, audio_hash, params):
+        path = self._path(stage, self.make_key(stage, audio_hash, params))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            _count(stage, "misses")
+            return None
+        # Zugriffszeit für LRU aktualisieren
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        _count(stage, "hits")
+        return entry["value"]
+
+    def put(self, stage, audio_hash, params, value, meta=None):
+        path = self._path(stage, self.make_key(stage, audio_hash, params))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"params": params, "meta": meta or {}, "created": time.time(), "value": value},
+                      f, ensure_ascii=False)
+        added = os.path.getsize(tmp)
+        try:
+            added -= os.path.getsize(path)     # ersetzter Eintrag
+        except OSError:
+            pass
+        os.replace(tmp, path)
+        _count(stage, "stores")
+        with self._size_lock:
+            if self._size is None:
+                self._size = self.size_bytes()
+            else:
+                self._size += added
+            over = self._size > self.max_bytes
+        if over:
+            self.evict()
+
+    def _entries(self):
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    yield path, st.st_size, st.st_mtime
+
+    def size_bytes(self):
+        return sum(size for _, size, _ in self._entries())
+
+    def evict(self):
+        """
+        Löscht die am längsten ungenutzten Einträge, sobald max_bytes
+        überschritten ist – dann bis auf EVICT_TARGET * max_bytes.
+        """
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _, size, _ in entries)
+        if total <= self.max_bytes:
+            with self._size_lock:
+                self._size = total
+            return 0
+        target = self.max_bytes * EVICT_TARGET
+        removed = 0
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                pass
+        with self._size_lock:
+            self._size = total
+        return removed
+
+    def clear(self):
+        for path, _, _ in list(self._entries()):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._size_lock:
+            self._size = None
+
+
+_default_cache = None
+
+
+def get_cache():
+    """Prozessweite Standard-Instanz."""
+    global _default_cache
+    with _lock:
+        if _default_cache is None:
+            _default_cache = ResultCache()
+        return _default_cache
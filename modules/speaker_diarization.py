@@ -1,42 +1,41 @@
 # modules/speaker_diarization.py
 
-import os
 import sys
+import time
+import threading
 import traceback
-import torch
-import json
-# Versuche pyannote-Imports
-try:
-    from pyannote.audio import Pipeline
-except Exception:
-    Pipeline = None
-
-
-def load_hf_token(require_token=False):
-    """
-    Lädt den Huggingface Token aus config.json.
-    - require_token=True: Fehler, wenn kein Token vorhanden.
-    - require_token=False: Gibt None zurück, falls kein Token vorhanden.
-    """
-    config_path = os.path.join(os.path.dirname(__file__), "../config.json")
-    try:
-        with open(config_path, "r") as f:
-            conf = json.load(f)
-    except FileNotFoundError:
-        conf = {}
-    hf_token = conf.get("HF_TOKEN", None)
-    if require_token and not hf_token:
-        raise ValueError("Huggingface Token fehlt in config.json")
-    return hf_token
+from .audio import AudioBuffer
+from .config import apply_offline_env, load_hf_token  # load_hf_token: bisheriger Importort
+# torch und pyannote.audio werden erst beim Laden der Pipeline importiert
+# (beides ist groß und verzögert sonst jeden Start der App)
 
 
 # Fallback-Diarization (immer gültiges end)
-def fallback_diarization(audio_file: str):
+def fallback_diarization(audio_file):
     return [{"start": 0.0, "end": float("inf"), "speaker": "Person-DUMMY"}]
 
 
+# Prozessweiter Pipeline-Cache
+MODEL_IDS_TO_TRY = [
+    "pyannote/speaker-diarization-precision-2",
+    "pyannote/speaker-diarization-3.1",
+    "pyannote/speaker-diarization",
+]
+FAILED_CANDIDATE_TTL = 600  # Sekunden, bis ein gescheiterter Kandidat erneut versucht wird
+
+_pipeline_lock = threading.Lock()
+_pipelines = {}          # (hf_token, device) -> geladene Pipeline (bereits auf device)
+_resolved_loader = {}    # hf_token -> (model_id, loader_name) des ersten Erfolgs
+_failed_candidates = {}  # (hf_token, model_id, loader_name) -> Zeitpunkt des Fehlers
+_env_info_printed = False
+
+
 def _print_env_info():
     """Druckt Versionsinfo zur schnellen Diagnose (hilfreich beim Debug)."""
+    global _env_info_printed
+    if _env_info_printed:
+        return
+    _env_info_printed = True
     try:
         import pyannote.audio as pa
         pa_ver = getattr(pa, "__version__", "unknown")
@@ -63,7 +62,9 @@ def _print_env_info():
 
 def _try_pipeline_from_pretrained(model_id: str, hf_token: str):
     """Versuch: Pipeline.from_pretrained (Standard)."""
-    if Pipeline is None:
+    try:
+        from pyannote.audio import Pipeline
+    except Exception:
         raise RuntimeError("pyannote.audio.Pipeline ist nicht importierbar in dieser Umgebung.")
     return Pipeline.from_pretrained(model_id, use_auth_token=hf_token)
 
@@ -81,74 +82,112 @@ def _try_alternative_speakerdiarization(model_id: str, hf_token: str):
         raise
 
 
-def diarize_audio(audio_file: str, force_dummy=False, hf_token=None):
-    """
-    Robust loader: versucht mehrere Wege, ein pyannote-Pipeline-Modell zu laden.
-    Gibt Liste von segments zurück: [{"start": float, "end": float, "speaker": str}, ...]
-    Bei Fehlern -> fallback_diarization.
-    """
+_LOADERS = [
+    ("Pipeline.from_pretrained", _try_pipeline_from_pretrained),
+    ("SpeakerDiarization.from_pretrained", _try_alternative_speakerdiarization),
+]
 
-    fallback=fallback_diarization(audio_file)
-    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-    try:
-        hf_token = load_hf_token()   # <-- Token sicher laden
-    except Exception as e:
-        print(f"[WARNUNG] HF_TOKEN konnte nicht geladen werden: {e}")
-        return fallback
+def _candidates(hf_token):
+    """Reihenfolge der Ladeversuche; ein bekannter Erfolg wird zuerst probiert."""
+    combos = [(m, name, fn) for m in MODEL_IDS_TO_TRY for name, fn in _LOADERS]
+    resolved = _resolved_loader.get(hf_token)
+    if resolved:
+        combos.sort(key=lambda c: (c[0], c[1]) != resolved)
+    return combos
 
-    if not hf_token:
-        print("[WARNUNG] HF_TOKEN konnte nicht geladen werden, Dummy-Fallback wird genutzt.")
-        return fallback
 
-    # Wenn kein Token, sofort fallback
-    if force_dummy:
-        print("[INFO] Dummy-Fallback erzwungen, keine echte Diarization.")
-        return fallback
+def _default_device():
+    """torch.device für die Pipeline ('cuda', falls verfügbar)."""
+    import torch
+    return torch.device("cuda" if torch.cuda.is_available() else "cpu")
 
-    # Drucke Umgebungsinfo für Diagnose
-    _print_env_info()
 
-    model_ids_to_try = [
-        "pyannote/speaker-diarization-precision-2",
-        "pyannote/speaker-diarization-3.1",
-        "pyannote/speaker-diarization",
-    ]
+def get_pipeline(hf_token, device=None):
+    """
+    Gibt eine geladene, auf das Device verschobene pyannote-Pipeline zurück.
+    - Erfolgreiche Pipeline wird pro (Token, Device) gecacht.
+    - Die erste funktionierende (model_id, loader)-Kombination wird gemerkt.
+    - Gescheiterte Kandidaten werden FAILED_CANDIDATE_TTL Sekunden übersprungen.
+    Gibt None zurück, wenn kein Kandidat geladen werden konnte.
+    """
+    if device is None:
+        device = _default_device()
+    cache_key = (hf_token, str(device))
+
+    with _pipeline_lock:
+        if cache_key in _pipelines:
+            return _pipelines[cache_key]
 
-    last_exc = None
-    for model_id in model_ids_to_try:
-        try:
-            print(f"[INFO] Versuche Pipeline.from_pretrained('{model_id}')")
-            pipeline = _try_pipeline_from_pretrained(model_id, hf_token)
-            pipeline.to(device)
-            print(f"[OK] Pipeline loaded from {model_id} via Pipeline.from_pretrained")
-            break
-        except Exception as e:
-            last_exc = e
-            print(f"[DEBUG] Pipeline.from_pretrained('{model_id}') failed: {e}")
-            # detailliertere Fehlerausgabe nur für logs
-            traceback.print_exc()
-            # versuche alternative API
+        _print_env_info()
+        if apply_offline_env():
+            print("[INFO] Offline-Modus: pyannote-Modelle nur aus dem lokalen Cache")
+        now = time.monotonic()
+        last_exc = None
+        for model_id, loader_name, loader in _candidates(hf_token):
+            fail_key = (hf_token, model_id, loader_name)
+            failed_at = _failed_candidates.get(fail_key)
+            if failed_at is not None and now - failed_at < FAILED_CANDIDATE_TTL:
+                continue
             try:
-                print(f"[INFO] Versuche alternative loader für {model_id}")
-                pipeline = _try_alternative_speakerdiarization(model_id, hf_token)
+                print(f"[INFO] Versuche {loader_name}('{model_id}')")
+                pipeline = loader(model_id, hf_token)
                 pipeline.to(device)
-                print(f"[OK] Pipeline loaded from {model_id} via SpeakerDiarization.from_pretrained")
-                break
-            except Exception as e2:
-                last_exc = e2
-                print(f"[DEBUG] Alternative loader failed for {model_id}: {e2}")
-                traceback.print_exc()
+            except Exception as e:
+                last_exc = e
+                print(f"[DEBUG] {loader_name}('{model_id}') failed: {e}")
+                # Vollen Traceback nur beim ersten Fehlschlag dieses Kandidaten
+                if failed_at is None:
+                    traceback.print_exc()
+                _failed_candidates[fail_key] = now
                 continue
-    else:
-        # alle Versuche gescheitert
+
+            print(f"[OK] Pipeline loaded from {model_id} via {loader_name}")
+            _failed_candidates.pop(fail_key, None)
+            _resolved_loader[hf_token] = (model_id, loader_name)
+            _pipelines[cache_key] = pipeline
+            return pipeline
+
         print(f"[FEHLER] Konnte kein pyannote-Pipeline-Modell laden. Letzter Fehler: {last_exc}")
-        return fallback
+        return None
+
+
+def clear_pipeline_cache():
+    """Verwirft geladene Pipelines und die Negativ-Cache-Einträge."""
+    with _pipeline_lock:
+        _pipelines.clear()
+        _resolved_loader.clear()
+        _failed_candidates.clear()
+
+
+def _diarize_pyannote(audio_file, hf_token=None):
+    """
+    Robust loader: versucht mehrere Wege, ein pyannote-Pipeline-Modell zu laden.
+    Gibt None zurück, wenn pyannote nicht nutzbar ist oder fehlschlägt.
+    """
+    if not hf_token:
+        try:
+            hf_token = load_hf_token()   # gecacht, liest config.json nur nach Änderungen
+        except Exception as e:
+            print(f"[WARNUNG] HF_TOKEN konnte nicht geladen werden: {e}")
+            return None
+
+    if not hf_token:
+        print("[WARNUNG] HF_TOKEN konnte nicht geladen werden, pyannote wird übersprungen.")
+        return None
+
+    pipeline = get_pipeline(hf_token)
+    if pipeline is None:
+        return None
 
     # Falls pipeline existiert, führe Diarization aus
     try:
         print("[INFO] Führe Diarization aus (this can take time)...")
-        diarization = pipeline(audio_file)
+        # Bereits dekodiertes Audio direkt als Waveform übergeben (kein erneutes Dekodieren)
+        if isinstance(audio_file, AudioBuffer):
+            diarization = pipeline(audio_file.for_pyannote())
+        else:
+            diarization = pipeline(audio_file)
         segments = []
         # diarization kann unterschiedliche Typen zurückgeben; robust iterieren
         try:
@@ -168,12 +207,12 @@ def diarize_audio(audio_file: str, force_dummy=False, hf_token=None):
                     sp = str(track)
                     segments.append({"start": st, "end": ed, "speaker": sp})
             except Exception:
-                print("[WARNUNG] Unerwartetes Diarization-Resultat; verwende Fallback.")
-                return fallback
+                print("[WARNUNG] Unerwartetes Diarization-Resultat von pyannote.")
+                return None
 
         if not segments:
-            print("[WARNUNG] Keine Segmente erkannt, Fallback wird genutzt.")
-            return fallback
+            print("[WARNUNG] pyannote hat keine Segmente erkannt.")
+            return None
 
         # alles gut
         return segments
@@ -181,5 +220,92 @@ def diarize_audio(audio_file: str, force_dummy=False, hf_token=None):
     except Exception as e:
         print(f"[FEHLER] Fehler während Diarization: {e}")
         traceback.print_exc()
-        return fallback
+        return None
+
+
+def _diarize_fast(audio_file, hf_token=None):
+    from .fast_diarization import diarize_fast
+    return diarize_fast(audio_file)
+
+
+# ---------------------------------------------------------
+# ENGINES
+# ---------------------------------------------------------
+# Name -> Funktion(audio_file, hf_token) -> Segmente; None/leer = fehlgeschlagen.
+# Eigene Engines über register_engine(); im Prozessmodus (parallel_mode="process")
+# müssen sie beim Import eines Moduls registriert werden, sonst kennt der
+# Worker-Prozess sie nicht.
+_engines = {
+    "pyannote": _diarize_pyannote,
+    "fast": _diarize_fast,
+}
+FALLBACK_ENGINE = "fast"    # läuft immer (offline, ohne Token und Modelle)
+
+# Abwägung pro Auftrag -> Engine
+DIARIZATION_QUALITIES = ("quality", "auto", "speed")
+
+
+def register_engine(name, fn):
+    """Registriert eine Diarization-Engine (ersetzt eine gleichnamige)."""
+    _engines[name] = fn
+
+
+def available_engines():
+    return list(_engines)
+
+
+def select_engine(quality="quality", device=None):
+    """
+    Engine für eine Speed/Qualitäts-Vorgabe:
+    - "quality": pyannote (fällt bei Fehlern auf die schnelle Engine zurück)
+    - "speed":   schnelle CPU-Engine (MFCC + Clustering, ohne Modell)
+    - "auto":    pyannote mit GPU, sonst die schnelle Engine
+    Registrierte Engine-Namen werden direkt übernommen.
+    """
+    if quality in _engines:
+        return quality
+    if quality == "speed":
+        return "fast"
+    if quality == "auto":
+        if device is None:
+            from .model_registry import default_device
+            device = default_device()
+        return "pyannote" if device == "cuda" else "fast"
+    if quality != "quality":
+        raise ValueError(f"Unbekannte Diarization-Qualität: {quality} (erlaubt: {DIARIZATION_QUALITIES})")
+    return "pyannote"
+
+
+def diarize_audio(audio_file, force_dummy=False, hf_token=None, engine="pyannote"):
+    """
+    Sprechererkennung mit der gewählten Engine (siehe select_engine).
+    audio_file: Dateipfad oder bereits dekodierter AudioBuffer.
+    Gibt Liste von segments zurück: [{"start": float, "end": float, "speaker": str, "engine": str}, ...]
+    Schlägt die Engine fehl, übernimmt FALLBACK_ENGINE; erst wenn auch die
+    nichts liefert (oder force_dummy) -> fallback_diarization.
+    """
+    if force_dummy:
+        print("[INFO] Dummy-Fallback erzwungen, keine echte Diarization.")
+        return fallback_diarization(audio_file)
+
+    tried = []
+    for name in (engine, FALLBACK_ENGINE):
+        if name in tried:
+            continue
+        tried.append(name)
+        if name not in _engines:
+            print(f"[WARNUNG] Unbekannte Diarization-Engine '{name}'")
+            continue
+        try:
+            segments = _engines[name](audio_file, hf_token)
+        except Exception as e:
+            print(f"[FEHLER] Diarization-Engine '{name}' fehlgeschlagen: {e}")
+            traceback.print_exc()
+            segments = None
+        if segments:
+            return [dict(seg, engine=name) for seg in segments]
+        if name != FALLBACK_ENGINE:
+            print(f"[WARNUNG] '{name}' lieferte kein Ergebnis, schnelle Engine wird genutzt.")
 
+    print("[WARNUNG] Keine Sprecher erkannt, Dummy-Fallback wird genutzt.")
+    return fallback_diarization(audio_file)
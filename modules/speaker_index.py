@@ -0,0 +1,122 @@
+# modules/speaker_index.py
+
+import numpy as np
+
+
+class SpeakerIndex:
+    """
+    Sortierter, Array-basierter Intervall-Index über Diarization-Segmente.
+    Pro Sprecher werden die (zusammengeführten) Intervalle sortiert abgelegt,
+    sodass sich die Sprechzeit eines Sprechers in [start, end] per
+    np.searchsorted in O(log m) berechnen lässt – für alle Transkript-Segmente
+    gleichzeitig.
+    """
+
+    def __init__(self, diar_segments):
+        self.speakers = []
+        self._starts = []
+        self._ends = []
+
+        by_speaker = {}
+        for seg in diar_segments:
+            label = seg["speaker"]
+            if label not in by_speaker:
+                by_speaker[label] = []
+                self.speakers.append(label)
+            by_speaker[label].append((float(seg["start"]), float(seg["end"])))
+
+        for label in self.speakers:
+            arr = np.array(by_speaker[label], dtype=np.float64)
+            arr = arr[np.argsort(arr[:, 0], kind="stable")]
+            starts, ends = _merge_intervals(arr[:, 0], arr[:, 1])
+            self._starts.append(starts)
+            self._ends.append(ends)
+
+        finite = [a[np.isfinite(a)] for a in self._starts + self._ends]
+        finite = [a for a in finite if a.size]
+        self._max_finite = float(max(a.max() for a in finite)) if finite else 0.0
+
+    def __len__(self):
+        return len(self.speakers)
+
+    def coverage(self, starts, ends):
+        """
+        Sprechzeit jedes Sprechers innerhalb der Intervalle [starts[i], ends[i]].
+        Rückgabe: Array der Form (len(starts), Anzahl Sprecher).
+        """
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        out = np.zeros((starts.size, len(self.speakers)), dtype=np.float64)
+        if starts.size == 0:
+            return out
+
+        # Unendliche Enden (z.B. Dummy-Fallback) auf einen endlichen Wert kappen
+        cap = max(self._max_finite, float(np.max(ends, initial=0.0))) + 1.0
+        for k in range(len(self.speakers)):
+            seg_starts = np.minimum(self._starts[k], cap)
+            seg_ends = np.minimum(self._ends[k], cap)
+            cum = np.concatenate(([0.0], np.cumsum(seg_ends - seg_starts)))
+            out[:, k] = (
+                _covered_before(ends, seg_starts, seg_ends, cum)
+                - _covered_before(starts, seg_starts, seg_ends, cum)
+            )
+        return out
+
+    def speaker_at(self, times):
+        """
+        Index des ersten Sprechers, dessen Segment den Zeitpunkt enthält
+        (Grenzen inklusive), sonst -1.
+        """
+        times = np.asarray(times, dtype=np.float64)
+        result = np.full(times.size, -1, dtype=np.int64)
+        for k in reversed(range(len(self.speakers))):
+            i = np.searchsorted(self._starts[k], times, side="right") - 1
+            valid = i >= 0
+            hit = np.zeros(times.size, dtype=bool)
+            hit[valid] = times[valid] <= self._ends[k][i[valid]]
+            result[hit] = k
+        return result
+
+    def assign(self, transcript_segments, unknown="Unbekannt"):
+        """
+        Weist jedem Transkript-Segment den Sprecher mit der größten zeitlichen
+        Überlappung zu. Ohne Überlappung (z.B. Segmente der Länge 0) entscheidet
+        der Startzeitpunkt; liegt auch dieser in keinem Segment -> `unknown`.
+        """
+        if not transcript_segments:
+            return []
+        if not self.speakers:
+            return [unknown] * len(transcript_segments)
+
+        starts = np.fromiter((s["start"] for s in transcript_segments), dtype=np.float64)
+        ends = np.fromiter((s["end"] for s in transcript_segments), dtype=np.float64)
+
+        overlap = self.coverage(starts, ends)
+        best = np.argmax(overlap, axis=1)
+        no_overlap = overlap[np.arange(best.size), best] <= 0.0
+        if np.any(no_overlap):
+            best[no_overlap] = self.speaker_at(starts[no_overlap])
+
+        return [self.speakers[k] if k >= 0 else unknown for k in best]
+
+
+def _merge_intervals(starts, ends):
+    """Führt überlappende Intervalle eines Sprechers zusammen (Eingabe nach Start sortiert)."""
+    if starts.size == 0:
+        return starts, ends
+    merged_ends = np.maximum.accumulate(ends)
+    # Neues Intervall beginnt, wo der Start hinter allen bisherigen Enden liegt
+    new_block = np.empty(starts.size, dtype=bool)
+    new_block[0] = True
+    new_block[1:] = starts[1:] > merged_ends[:-1]
+    block_starts = np.flatnonzero(new_block)
+    block_ends = np.append(block_starts[1:], starts.size) - 1
+    return starts[block_starts], merged_ends[block_ends]
+
+
+def _covered_before(t, seg_starts, seg_ends, cum):
+    """Summe der Intervall-Längen links von t (Teilintervalle anteilig)."""
+    i = np.searchsorted(seg_starts, t, side="right")
+    prev = np.maximum(i - 1, 0)
+    partial = np.clip(t - seg_starts[prev], 0.0, seg_ends[prev] - seg_starts[prev])
+    return np.where(i > 0, cum[prev] + partial, 0.0)
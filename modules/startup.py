@@ -0,0 +1,79 @@
+# modules/startup.py
+
+import os
+import threading
+import time
+
+# TRANSKRIPTOR_WARMUP=0 schaltet das Vorladen der Modelle beim App-Start ab
+WARMUP_ENABLED = os.environ.get("TRANSKRIPTOR_WARMUP", "1") != "0"
+
+_lock = threading.Lock()
+_marks = {}         # Name -> Sekunden seit Prozessstart (nur erster Aufruf zählt)
+_warmups = {}       # Name -> {"state", "started", "seconds", "error"}
+
+
+def _process_start():
+    """Startzeit des Prozesses (time.time()); Linux über /proc, sonst Importzeit dieses Moduls."""
+    try:
+        with open("/proc/self/stat", "r") as f:
+            # Feld 22 (starttime) in Ticks seit Systemstart; comm kann Leerzeichen enthalten
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat", "r") as f:
+            boot = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot + start_ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration, AttributeError):
+        return time.time()
+
+
+PROCESS_START = _process_start()
+
+
+def mark(name):
+    """Merkt sich den ersten Zeitpunkt von `name` (Sekunden seit Prozessstart)."""
+    with _lock:
+        if name not in _marks:
+            _marks[name] = time.time() - PROCESS_START
+            return True
+    return False
+
+
+def marks():
+    with _lock:
+        return dict(_marks)
+
+
+def warm_up(name, load):
+    """
+    Ruft `load()` einmal in einem Daemon-Thread auf und misst die Ladezeit.
+    Wiederholte Aufrufe mit demselben Namen starten nichts Neues.
+    Gibt False zurück, wenn das Vorladen abgeschaltet ist.
+    """
+    if not WARMUP_ENABLED:
+        return False
+    with _lock:
+        if name in _warmups:
+            return True
+        status = _warmups[name] = {"state": "loading", "started": time.time(),
+                                   "seconds": None, "error": None}
+
+    def _run():
+        t0 = time.perf_counter()
+        try:
+            load()
+            state, error = "ready", None
+        except Exception as e:
+            state, error = "failed", str(e)
+            print(f"[WARNUNG] Warm-up '{name}' fehlgeschlagen: {e}")
+        with _lock:
+            status.update(state=state, seconds=time.perf_counter() - t0, error=error)
+        if state == "ready":
+            print(f"[OK] Warm-up '{name}' nach {status['seconds']:.1f}s abgeschlossen")
+
+    threading.Thread(target=_run, daemon=True, name=f"warmup-{name}").start()
+    return True
+
+
+def warmups():
+    """Status der Warm-ups: Name -> {"state": loading/ready/failed, "seconds", "error"}."""
+    with _lock:
+        return {name: dict(s) for name, s in _warmups.items()}
@@ -1,16 +1,328 @@
 # modules/transcribe.py
 
+import multiprocessing
 import os
-import torch
-from .speaker_diarization import diarize_audio, fallback_diarization
-from .anonymize import anonymize_text
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait
+from .speaker_diarization import diarize_audio, fallback_diarization, select_engine, MODEL_IDS_TO_TRY
+from .anonymize import anonymize_texts
+from .model_registry import get_model, default_device
+from .speaker_index import SpeakerIndex
+from .audio import AudioBuffer, load_audio, audio_input
+from .result_cache import get_cache, hash_file
+from .instrumentation import Tracer
+from .tuning import resolve_whisper_settings
 
 def find_speaker_for_time(diar_segments, timestamp):
-    """Finde das passende Speaker-Segment für einen gegebenen Zeitpunkt."""
-    for seg in diar_segments:
-        if seg["start"] <= timestamp <= seg["end"]:
-            return seg["speaker"]
-    return "Unbekannt"
+    """Finde das passende Speaker-Segment für einen gegebenen Zeitpunkt (über SpeakerIndex)."""
+    index = SpeakerIndex(diar_segments)
+    k = index.speaker_at([timestamp])[0] if len(index) else -1
+    return index.speakers[k] if k >= 0 else "Unbekannt"
+
+# Ausführungsmodi für Whisper + Diarization
+PARALLEL_MODES = ("off", "thread", "process")
+WHISPER_BEAM_SIZE = 5   # ohne Tuning-Profil (siehe tuning.py)
+STREAM_ANONYMIZE_BATCH = 16     # Segmente pro Anonymisierungs-Batch in transcribe_audio_stream
+
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _get_process_pool():
+    """Ein Worker-Prozess für die Diarization; bleibt bestehen, damit die Pipeline gecacht bleibt."""
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            # "spawn": kein geforkter CUDA-/Thread-Zustand der App (wie batch.py, chunked.py)
+            ctx = multiprocessing.get_context("spawn")
+            _process_pool = ProcessPoolExecutor(max_workers=1, mp_context=ctx)
+        return _process_pool
+
+
+def _load_whisper(whisper, device):
+    """Whisper-Modell für die aufgelösten Einstellungen (siehe resolve_whisper_settings)."""
+    return get_model(whisper["model_size"], device=device, compute_type=whisper["compute_type"],
+                     cpu_threads=whisper["cpu_threads"], num_workers=whisper["num_workers"])
+
+
+def _iter_whisper(audio, whisper, device):
+    """Startet Whisper; gibt (lazy Segment-Generator, Audiodauer in s) zurück."""
+    model = _load_whisper(whisper, device)
+    print("[INFO] Starte Transkription mit Whisper...")
+    segments, info = model.transcribe(audio_input(audio), beam_size=whisper["beam_size"])
+    iterator = (
+        {"start": float(s.start), "end": float(s.end), "text": s.text.strip()}
+        for s in segments
+    )
+    return iterator, float(getattr(info, "duration", 0.0) or 0.0)
+
+
+def _chunked_mode(chunk_workers, device, low_memory):
+    """Läuft Whisper chunk-parallel? (nur CPU und nur mit dekodiertem Audio)"""
+    return bool(chunk_workers and chunk_workers > 1 and device == "cpu" and not low_memory)
+
+
+def _chunk_compute_type(compute_type):
+    # Die Chunk-Worker laufen auf der CPU; "default" wäre dort float32
+    return "int8" if compute_type == "default" else compute_type
+
+
+def _run_whisper(audio, whisper, device, chunk_workers=0, stats=None):
+    """
+    Whisper über das ganze Audio. Mit chunk_workers > 1 (nur CPU, nur mit
+    dekodiertem AudioBuffer) wird das Audio an leisen Stellen geteilt und
+    chunk-parallel transkribiert; Kennzahlen landen dann in `stats`.
+    """
+    if chunk_workers and chunk_workers > 1:
+        if device == "cpu" and isinstance(audio, AudioBuffer):
+            from .chunked import transcribe_chunked
+            segments, chunk_stats = transcribe_chunked(
+                audio.samples, model_size=whisper["model_size"],
+                compute_type=_chunk_compute_type(whisper["compute_type"]),
+                workers=chunk_workers, beam_size=whisper["beam_size"],
+            )
+            if stats is not None:
+                stats.update(chunk_stats)
+            return segments
+        print("[INFO] Chunk-parallele Transkription nur auf CPU mit dekodiertem Audio; normaler Lauf")
+    segments, _ = _iter_whisper(audio, whisper, device)
+    return list(segments)
+
+
+def _prepare_audio(file_path, preprocessing_enabled, low_memory=False):
+    """
+    Dekodiert das Audio einmal in einen AudioBuffer (16 kHz mono float32), der
+    direkt an Whisper und pyannote geht; optional mit Preprocessing im Speicher.
+    Gibt (Audio für die Pipeline, erzeugte Temp-Datei) zurück. Schlägt das
+    Dekodieren fehl, wird wie bisher mit dem Dateipfad gearbeitet.
+    low_memory=True: kein Vorab-Dekodieren; Preprocessing läuft blockweise
+    in eine Temp-Datei (für mehrstündige Aufnahmen).
+    """
+    audio = None
+    if not low_memory:
+        try:
+            audio = load_audio(file_path)
+            print(f"[INFO] Audio dekodiert: {audio.duration:.1f}s @ {audio.sample_rate} Hz")
+        except Exception as e:
+            print(f"[WARNUNG] Audio konnte nicht vorab dekodiert werden: {e}; Dateipfad wird verwendet")
+
+    if preprocessing_enabled:
+        try:
+            if audio is not None:
+                from .preprocessing import preprocess_buffer
+                return preprocess_buffer(audio), None
+            from .preprocessing import preprocess_audio
+            cleaned_path = preprocess_audio(file_path, streaming=low_memory)
+            print(f"[INFO] Audio preprocessing abgeschlossen: {cleaned_path}")
+            return cleaned_path, cleaned_path
+        except Exception as e:
+            print(f"[WARNUNG] Preprocessing fehlgeschlagen: {e}")
+    else:
+        print("[INFO] Preprocessing deaktiviert, Originalaudio wird verwendet.")
+    return (audio if audio is not None else file_path), None
+
+
+def _remove_temp(created_temp, file_path):
+    try:
+        if created_temp and created_temp != file_path:
+            os.remove(created_temp)
+    except Exception:
+        pass
+
+
+def _stage_params(stage, whisper, preprocessing_enabled, vad_enabled=False, engine="pyannote",
+                  chunked=False, low_memory=False):
+    """
+    Parameter, die das Ergebnis einer Stufe beeinflussen (Teil des Cache-Schlüssels).
+    chunked/low_memory: tatsächlicher Whisper-Modus bzw. blockweiser
+    Preprocessing-Pfad; compute_type ist der wirklich benutzte Wert.
+    """
+    if stage == "whisper":
+        compute_type = _chunk_compute_type(whisper["compute_type"]) if chunked else whisper["compute_type"]
+        params = {"model_size": whisper["model_size"], "compute_type": compute_type,
+                  "beam_size": whisper["beam_size"], "preprocessing": preprocessing_enabled}
+        if chunked:
+            params["chunked"] = True
+    elif engine == "pyannote":
+        params = {"models": list(MODEL_IDS_TO_TRY), "preprocessing": preprocessing_enabled}
+    else:
+        params = {"engine": engine, "preprocessing": preprocessing_enabled}
+    # Nur wenn aktiv, damit bestehende Cache-Einträge gültig bleiben
+    if vad_enabled:
+        params["vad"] = True
+    if low_memory:
+        params["low_memory"] = True
+    return params
+
+
+def _apply_vad(audio, vad_enabled, tracer):
+    """
+    Sprach-Vorfilter (siehe vad.py). Rückgabe: (Audio für Whisper und
+    Diarization, SpeechMap oder None, wenn nichts übersprungen wird).
+    """
+    if not vad_enabled:
+        return audio, None
+    if not isinstance(audio, AudioBuffer):
+        print("[INFO] VAD braucht dekodiertes Audio (nicht mit low_memory); übersprungen")
+        return audio, None
+    from .vad import apply_vad
+    with tracer.span("vad") as span:
+        speech_audio, speech_map = apply_vad(audio)
+        span.count("regions", len(speech_map.regions) if speech_map else 0)
+    return speech_audio, speech_map
+
+
+def _map_diarization(speech_map, segments):
+    """Diarization-Segmente in Originalzeit (der Fallback bleibt unverändert)."""
+    if speech_map is None or segments == fallback_diarization(None):
+        return segments
+    return speech_map.map_segments(segments)
+
+
+def _vad_debug(vad_enabled, speech_map):
+    if not vad_enabled:
+        return {"enabled": False}
+    stats = speech_map.stats() if speech_map else {"skipped_fraction": 0.0, "expected_speedup": 1.0}
+    return dict(stats, enabled=True, applied=speech_map is not None)
+
+
+def _cache_lookup(file_path, use_cache, whisper_params, diar_params):
+    """
+    Sucht Whisper- und Diarization-Ergebnisse im Ergebnis-Cache
+    (diar_params None = Diarization nicht nachschlagen).
+    Rückgabe: (cache, audio_hash, transcript_segments|None, diar_segments|None);
+    cache ist None, wenn der Cache deaktiviert oder nicht nutzbar ist.
+    """
+    if not use_cache:
+        return None, None, None, None
+    try:
+        cache = get_cache()
+        audio_hash = hash_file(file_path)
+        transcript = cache.get("whisper", audio_hash, whisper_params)
+        diar = None
+        if diar_params is not None:
+            diar = cache.get("diarization", audio_hash, diar_params)
+        return cache, audio_hash, transcript, diar
+    except Exception as e:
+        print(f"[WARNUNG] Ergebnis-Cache nicht nutzbar: {e}")
+        return None, None, None, None
+
+
+def _cache_store(cache, audio_hash, stage, params, value):
+    if cache is None:
+        return
+    # Fallback-Ergebnisse (Person-DUMMY oder eine Ersatz-Engine) nicht cachen –
+    # beim nächsten Mal echt versuchen
+    if stage == "diarization" and (value == fallback_diarization(None) or _diarization_engine(value)
+                                   != params.get("engine", "pyannote")):
+        return
+    try:
+        cache.put(stage, audio_hash, params, value)
+    except Exception as e:
+        print(f"[WARNUNG] Ergebnis konnte nicht gecacht werden: {e}")
+
+
+def _diarization_engine(segments):
+    """Engine, die die Segmente erzeugt hat ("dummy" für den Fallback)."""
+    if not segments or segments == fallback_diarization(None):
+        return "dummy"
+    # Ältere Cache-Einträge haben kein "engine"-Feld (immer pyannote)
+    return segments[0].get("engine", "pyannote")
+
+
+def _make_speaker_mapper(force_dummy):
+    """Gibt eine Funktion zurück, die Diarization-Labels auf "Person N" abbildet."""
+    speaker_map = {}
+    def map_speaker(label):
+        # Wenn Dummy-Fallback aktiv ist: IMMER "Person", keine Nummerierung
+        if force_dummy:
+            return "Person"
+
+        if label not in speaker_map:
+            speaker_map[label] = f"Person {len(speaker_map)+1}"
+        return speaker_map[label]
+    return map_speaker
+
+
+def _build_entry(seg, text, speaker_label=None, map_speaker=None):
+    """Ein Eintrag von final_transcript (mit oder ohne Sprecher-Info)."""
+    if speaker_label is not None:
+        return {
+            "speaker_label": speaker_label,
+            "mapped": map_speaker(speaker_label),
+            "start": seg["start"],
+            "end": seg["end"],
+            "text": text,
+            "has_speaker": True
+        }
+    # KEINE Sprecher-Info, nur Text
+    return {
+        "start": seg["start"],
+        "end": seg["end"],
+        "text": text,
+        "has_speaker": False
+    }
+
+
+def format_segment_line(s, timestamps_enabled=True, force_dummy=False):
+    """Formatiert einen Eintrag von final_transcript als Textzeile."""
+    # Zeitstempel-Prefix (nur wenn aktiviert)
+    timestamp_prefix = f"[{s['start']:.2f}-{s['end']:.2f}] " if timestamps_enabled else ""
+
+    if s.get("has_speaker", False):
+        # MIT Sprecher-Segmentierung
+        dummy_prefix = "[DUMMY-Fallback] " if force_dummy else ""
+        return f"{dummy_prefix}{timestamp_prefix}{s['mapped']}: {s['text']}"
+    # OHNE Sprecher-Segmentierung
+    return f"{timestamp_prefix}{s['text']}"
+
+
+def _timed(fn, *args, **kwargs):
+    """Führt fn aus und gibt (Ergebnis, Dauer in Sekunden) zurück."""
+    t0 = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, time.perf_counter() - t0
+
+
+def _diarize_traced(tracer, audio, **kwargs):
+    """diarize_audio als Span "diarization" (im aufrufenden Thread gemessen)."""
+    with tracer.span("diarization") as span:
+        segments = diarize_audio(audio, **kwargs)
+        span.count("segments", len(segments))
+    return segments
+
+
+def _start_diarization(parallel_mode, tracer, audio, diar_kwargs):
+    """
+    Startet die Diarization im Hintergrund; Rückgabe: Future mit
+    (Segmente, Dauer). Im Prozessmodus wird ohne Tracer gemessen (nicht
+    übertragbar) und der Span danach über _record_process_diarization nachgetragen.
+    """
+    if parallel_mode == "process":
+        return _get_process_pool().submit(_timed, diarize_audio, audio, **diar_kwargs)
+    diar_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+    future = diar_pool.submit(_timed, _diarize_traced, tracer, audio, **diar_kwargs)
+    diar_pool.shutdown(wait=False)
+    return future
+
+
+def _await_diarization(future):
+    """
+    Bei Abbruch/Fehler: eine noch wartende Diarization verwerfen, eine
+    laufende abwarten. Erst danach sind Rechenplatz (jobs.py) und
+    Temp-Dateien wirklich frei.
+    """
+    if future is None or future.done() or future.cancel():
+        return
+    print("[INFO] Warte auf laufende Diarization vor dem Aufräumen...")
+    wait([future])
+
+
+def _record_process_diarization(parallel_mode, tracer, diar_segments, diar_s):
+    if parallel_mode == "process":
+        tracer.record("diarization", diar_s, segments=len(diar_segments))
+
 
 def transcribe_audio(
     file_path,
@@ -21,7 +333,16 @@ def transcribe_audio(
     timestamps_enabled=True,
     force_dummy=False,
     hf_token=None,
-    return_debug=True
+    return_debug=True,
+    compute_type="default",
+    parallel_mode="thread",
+    low_memory=False,
+    use_cache=True,
+    chunk_workers=0,
+    instrument=None,
+    use_profile=True,
+    vad_enabled=False,
+    diarization_quality="quality"
 ):
     """
     Vollständig modularisierte Transkription + Diarization + Anonymizer
@@ -31,118 +352,383 @@ def transcribe_audio(
     - timestamps_enabled: Zeitstempel anzeigen an/aus
     - force_dummy: Dummy-Fallback erzwingen
     - hf_token: Huggingface Token, optional
+    - compute_type: CTranslate2 compute_type (z.B. "int8", "float16")
+    - parallel_mode: "off" (nacheinander), "thread" oder "process" –
+      Whisper und Diarization laufen dann gleichzeitig
+    - low_memory: Audio nicht komplett im Speicher halten, Preprocessing blockweise
+    - use_cache: Whisper-/Diarization-Ergebnisse im Ergebnis-Cache nachschlagen und ablegen
+    - chunk_workers: > 1 teilt langes Audio an leisen Stellen und transkribiert
+      die Chunks parallel in so vielen Prozessen (nur CPU)
+    - instrument: Stufen-Messungen (Spans) an/aus; None = Umgebungsvariable
+      TRANSKRIPTOR_INSTRUMENTATION (Standard: an). Ergebnis in debug["spans"]
+    - use_profile: Tuning-Profil dieses Rechners nutzen (python tune.py);
+      model_size="auto" wählt dann auch das Modell. Explizite Werte
+      (model_size, compute_type != "default") haben Vorrang
+    - vad_enabled: Stille vorab erkennen und Whisper/Diarization nur auf den
+      Sprachregionen laufen lassen; Zeitstempel bleiben in Originalzeit.
+      Anteil übersprungenen Audios und erwarteter Speedup in debug["vad"]
+    - diarization_quality: "quality" (pyannote), "speed" (schnelle CPU-Engine
+      ohne Modell) oder "auto" (pyannote nur mit GPU); siehe
+      speaker_diarization.select_engine. Genutzte Engine in debug["diarization_engine"]
     - return_debug: Debug-Info zurückgeben
     Rückgabe: (formatted_text, debug_dict)
     """
 
     debug = {}
-    created_temp = None
+    if parallel_mode not in PARALLEL_MODES:
+        raise ValueError(f"Unbekannter parallel_mode: {parallel_mode} (erlaubt: {PARALLEL_MODES})")
+    whisper = resolve_whisper_settings(model_size, compute_type, use_profile)
+    debug["whisper_settings"] = whisper
+    engine = select_engine(diarization_quality)
+    device = default_device()
+    tracer = Tracer(instrument, labels={"model_size": whisper["model_size"], "mode": "batch"})
 
-    # 1️⃣ Vorverarbeitung
-    if preprocessing_enabled:
-        try:
-            from .preprocessing import preprocess_audio
-            cleaned_path = preprocess_audio(file_path)
-            created_temp = cleaned_path
-            print(f"[INFO] Audio preprocessing abgeschlossen: {cleaned_path}")
-        except Exception as e:
-            print(f"[WARNUNG] Preprocessing fehlgeschlagen: {e}")
-            cleaned_path = file_path
+    # 0️⃣ Ergebnis-Cache (Audio-Hash + Stufen-Parameter)
+    whisper_params = _stage_params("whisper", whisper, preprocessing_enabled, vad_enabled,
+                                   chunked=_chunked_mode(chunk_workers, device, low_memory),
+                                   low_memory=low_memory)
+    diar_params = _stage_params("diarization", whisper, preprocessing_enabled, vad_enabled, engine,
+                                low_memory=low_memory)
+    cache, audio_hash, cached_transcript, cached_diar = _cache_lookup(
+        file_path, use_cache, whisper_params,
+        diar_params if diarization_enabled and not force_dummy else None
+    )
+    need_whisper = cached_transcript is None
+    need_diar = diarization_enabled and cached_diar is None
+    debug["cache"] = {
+        "whisper": "miss" if need_whisper else "hit",
+        "diarization": ("miss" if need_diar else "hit") if diarization_enabled else "off",
+    }
+
+    # 1️⃣ Vorverarbeitung (nur, wenn eine Stufe wirklich laufen muss)
+    speech_map = None
+    if need_whisper or need_diar:
+        with tracer.span("preprocessing"):
+            audio, created_temp = _prepare_audio(file_path, preprocessing_enabled, low_memory)
+        speech_audio, speech_map = _apply_vad(audio, vad_enabled, tracer)
     else:
-        cleaned_path = file_path
-        print("[INFO] Preprocessing deaktiviert, Originalaudio wird verwendet.")
+        print("[INFO] Whisper- und Diarization-Ergebnis aus dem Cache")
+        audio, created_temp = file_path, None
+        speech_audio = audio
+    debug["vad"] = _vad_debug(vad_enabled, speech_map)
 
-    # 2️⃣ Whisper-Transkription
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    from faster_whisper import WhisperModel
-    print("[INFO] Starte Transkription mit Whisper...")
-    model = WhisperModel(model_size, device=device)
-    segments, _ = model.transcribe(cleaned_path, beam_size=5)
-    transcript_segments = [
-        {"start": float(s.start), "end": float(s.end), "text": s.text.strip()}
-        for s in segments
-    ]
-    print(f"[OK] Transkription abgeschlossen: {len(transcript_segments)} Segmente")
-    debug["transcript_segments"] = transcript_segments.copy()
+    # Ab hier: Temp-Datei und Hintergrund-Diarization auch bei Fehlern aufräumen
+    diar_future = None
+    try:
+        # 2️⃣ Whisper-Transkription + 3️⃣ Sprecher-Diarization (nur wenn aktiviert!)
+        diar_kwargs = {"force_dummy": force_dummy, "hf_token": hf_token, "engine": engine}
+        t_total = time.perf_counter()
+        whisper_s = diar_s = 0.0
+        parallel = need_whisper and need_diar and parallel_mode != "off"
 
-    # 3️⃣ Sprecher-Diarization (nur wenn aktiviert!)
-    diar_segments = None
-    if diarization_enabled:
-        diar_segments = diarize_audio(
-            cleaned_path,
-            force_dummy=force_dummy,
-            hf_token=hf_token
-        )
-        print("[INFO] Diarization Segmente erhalten:", len(diar_segments))
-        debug["diar_segments"] = diar_segments.copy()
-    else:
-        print("[INFO] Diarization deaktiviert")
-        debug["diar_segments"] = []
+        if parallel:
+            print(f"[INFO] Whisper und Diarization laufen parallel ({parallel_mode})")
+            diar_future = _start_diarization(parallel_mode, tracer, speech_audio, diar_kwargs)
 
-    # 4️⃣ Mapping + optionaler Anonymizer
-    speaker_map = {}
-    def map_speaker(label):
-        # Wenn Dummy-Fallback aktiv ist: IMMER "Person", keine Nummerierung
-        if force_dummy:
-            return "Person"
+        chunk_stats = {}
+        if need_whisper:
+            if not chunk_workers or chunk_workers <= 1:
+                with tracer.span("model_load"):
+                    _load_whisper(whisper, device)
+            with tracer.span("transcription") as span:
+                transcript_segments, whisper_s = _timed(
+                    _run_whisper, speech_audio, whisper, device, chunk_workers, chunk_stats
+                )
+                span.count("segments", len(transcript_segments))
+            if speech_map is not None:
+                transcript_segments = speech_map.map_segments(transcript_segments)
+            # Schlüssel nach dem tatsächlich gelaufenen Modus: ohne dekodiertes Audio
+            # fällt _run_whisper auf einen normalen Lauf zurück (chunk_stats bleibt leer)
+            whisper_params = _stage_params("whisper", whisper, preprocessing_enabled, vad_enabled,
+                                           chunked=bool(chunk_stats), low_memory=low_memory)
+            _cache_store(cache, audio_hash, "whisper", whisper_params, transcript_segments)
+        else:
+            transcript_segments = cached_transcript
 
-        if label not in speaker_map:
-            speaker_map[label] = f"Person {len(speaker_map)+1}"
-        return speaker_map[label]
+        diar_segments = None
+        if need_diar:
+            if diar_future is not None:
+                try:
+                    diar_segments, diar_s = diar_future.result()
+                    _record_process_diarization(parallel_mode, tracer, diar_segments, diar_s)
+                except Exception as e:
+                    print(f"[FEHLER] Diarization fehlgeschlagen: {e}; Fallback wird genutzt")
+                    diar_segments = fallback_diarization(audio)
+            else:
+                diar_segments, diar_s = _timed(_diarize_traced, tracer, speech_audio, **diar_kwargs)
+            diar_segments = _map_diarization(speech_map, diar_segments)
+            if not force_dummy:
+                _cache_store(cache, audio_hash, "diarization", diar_params, diar_segments)
+        elif diarization_enabled:
+            diar_segments = cached_diar
+
+        total = time.perf_counter() - t_total
+        print(f"[OK] Transkription abgeschlossen: {len(transcript_segments)} Segmente")
+        debug["transcript_segments"] = transcript_segments.copy()
+
+        if diarization_enabled:
+            print("[INFO] Diarization Segmente erhalten:", len(diar_segments))
+            debug["diar_segments"] = diar_segments.copy()
+            debug["diarization_engine"] = _diarization_engine(diar_segments)
+        else:
+            print("[INFO] Diarization deaktiviert")
+            debug["diar_segments"] = []
+            debug["diarization_engine"] = None
 
+        debug["timings"] = {
+            "parallel_mode": parallel_mode if parallel else "off",
+            "whisper_s": whisper_s,
+            "diarization_s": diar_s,
+            "total_s": total,
+            # Gesparte Zeit gegenüber sequentieller Ausführung
+            "overlap_s": max(0.0, whisper_s + diar_s - total),
+        }
+        if chunk_stats:
+            debug["timings"]["chunked"] = chunk_stats
+        if isinstance(audio, AudioBuffer) and audio.duration > 0:
+            # Real-Time-Faktor der Whisper-Stufe (< 1 = schneller als Echtzeit)
+            debug["timings"]["whisper_rtf"] = whisper_s / audio.duration
+
+        # 4️⃣ Mapping + optionaler Anonymizer
+        map_speaker = _make_speaker_mapper(force_dummy)
+
+        texts = [seg["text"] for seg in transcript_segments]
+
+        # Anonymizer anwenden (wenn aktiviert) – alle Segmente in einem Batch
+        if anonymizer_enabled and texts:
+            with tracer.span("anonymization", segments=len(texts)):
+                try:
+                    texts = anonymize_texts(texts)
+                except Exception as e:
+                    print(f"[WARNUNG] Anonymizer fehlgeschlagen: {e}; Originaltext wird verwendet")
+
+        with tracer.span("formatting", segments=len(texts)):
+            # Sprecher pro Segment über größte zeitliche Überlappung (ein Durchlauf)
+            speaker_labels = None
+            if diarization_enabled and diar_segments:
+                speaker_labels = SpeakerIndex(diar_segments).assign(transcript_segments)
+
+            final_transcript = []
+            for i, (seg, text) in enumerate(zip(transcript_segments, texts)):
+                # Sprecher-Mapping (nur wenn Diarization aktiviert)
+                speaker_label = speaker_labels[i] if speaker_labels is not None else None
+                final_transcript.append(_build_entry(seg, text, speaker_label, map_speaker))
+
+            # 6️⃣ Ausgabe formatieren
+            lines = [format_segment_line(s, timestamps_enabled, force_dummy) for s in final_transcript]
+    finally:
+        # 5️⃣ temporäre Datei löschen
+        _await_diarization(diar_future)
+        _remove_temp(created_temp, file_path)
+
+    # Strukturierte Einträge (Zeiten, Sprecher, Text) z.B. für Exporte
+    debug["final_transcript"] = final_transcript
+    debug["spans"] = tracer.finish()
+    return ("\n".join(lines), debug if return_debug else None)
+
+
+def transcribe_audio_stream(
+    file_path,
+    model_size="large",
+    preprocessing_enabled=True,
+    anonymizer_enabled=True,
+    diarization_enabled=True,
+    timestamps_enabled=True,
+    force_dummy=False,
+    hf_token=None,
+    compute_type="default",
+    parallel_mode="thread",
+    low_memory=False,
+    use_cache=True,
+    instrument=None,
+    use_profile=True,
+    vad_enabled=False,
+    diarization_quality="quality"
+):
+    """
+    Wie transcribe_audio, liefert aber Ereignisse, sobald Whisper Segmente erzeugt.
+    Jedes Ereignis ist ein dict mit "event":
+    - "stage": eine neue Stufe beginnt; "stage" ist "prepare", "transcribe"
+      oder "diarize" (Warten auf die Sprechererkennung nach Whisper)
+    - "segment": neues Segment; Schlüssel "entry" (final_transcript-Eintrag),
+      "line" (formatierte Zeile), "progress" (0..1, Segment-Ende / Audiodauer).
+      Mit Anonymisierung kommen die Segmente in Gruppen von
+      STREAM_ANONYMIZE_BATCH (ein nlp.pipe-Aufruf pro Gruppe)
+    - "speakers": Diarization ist fertig; "lines" enthält alle bisherigen Zeilen
+      neu formatiert (jetzt mit Sprechern)
+    - "done": "text" (vollständiger Text) und "debug" (wie bei transcribe_audio,
+      inkl. "final_transcript")
+    Ohne "off" läuft die Diarization parallel im Hintergrund; bis sie fertig ist,
+    werden Segmente ohne Sprecher geliefert. Die Spans in debug["spans"]
+    enthalten nur die Arbeit der Pipeline, nicht die Zeit beim Verbraucher
+    zwischen den Ereignissen.
+    """
+    if parallel_mode not in PARALLEL_MODES:
+        raise ValueError(f"Unbekannter parallel_mode: {parallel_mode} (erlaubt: {PARALLEL_MODES})")
+
+    debug = {}
+    whisper = resolve_whisper_settings(model_size, compute_type, use_profile)
+    debug["whisper_settings"] = whisper
+    engine = select_engine(diarization_quality)
+    tracer = Tracer(instrument, labels={"model_size": whisper["model_size"], "mode": "stream"})
+    whisper_params = _stage_params("whisper", whisper, preprocessing_enabled, vad_enabled,
+                                   low_memory=low_memory)
+    diar_params = _stage_params("diarization", whisper, preprocessing_enabled, vad_enabled, engine,
+                                low_memory=low_memory)
+    cache, audio_hash, cached_transcript, cached_diar = _cache_lookup(
+        file_path, use_cache, whisper_params,
+        diar_params if diarization_enabled and not force_dummy else None
+    )
+    need_whisper = cached_transcript is None
+    need_diar = diarization_enabled and cached_diar is None
+    debug["cache"] = {
+        "whisper": "miss" if need_whisper else "hit",
+        "diarization": ("miss" if need_diar else "hit") if diarization_enabled else "off",
+    }
+    yield {"event": "stage", "stage": "prepare"}
+    speech_map = None
+    if need_whisper or need_diar:
+        with tracer.span("preprocessing"):
+            audio, created_temp = _prepare_audio(file_path, preprocessing_enabled, low_memory)
+        speech_audio, speech_map = _apply_vad(audio, vad_enabled, tracer)
+    else:
+        audio, created_temp = file_path, None
+        speech_audio = audio
+    debug["vad"] = _vad_debug(vad_enabled, speech_map)
+    device = default_device()
+    diar_kwargs = {"force_dummy": force_dummy, "hf_token": hf_token, "engine": engine}
+    map_speaker = _make_speaker_mapper(force_dummy)
+    t_total = time.perf_counter()
+
+    diar_future = None
+    if need_diar and parallel_mode != "off":
+        diar_future = _start_diarization(parallel_mode, tracer, speech_audio, diar_kwargs)
+
+    transcript_segments = []
     final_transcript = []
-    for seg in transcript_segments:
-        text = seg["text"]
-        
-        # Anonymizer anwenden (wenn aktiviert)
-        if anonymizer_enabled:
+    diar_segments = cached_diar
+    diar_s = 0.0
+
+    def _collect_diarization(block):
+        nonlocal diar_segments, diar_s
+        if diar_future is not None:
+            if not block and not diar_future.done():
+                return False
             try:
-                text = anonymize_text(text)
+                diar_segments, diar_s = diar_future.result()
+                _record_process_diarization(parallel_mode, tracer, diar_segments, diar_s)
             except Exception as e:
-                print(f"[WARNUNG] Anonymizer fehlgeschlagen: {e}; Originaltext wird verwendet")
-        
-        # Sprecher-Mapping (nur wenn Diarization aktiviert)
-        if diarization_enabled and diar_segments:
-            speaker_label = find_speaker_for_time(diar_segments, seg["start"])
-            mapped = map_speaker(speaker_label)
-            final_transcript.append({
-                "speaker_label": speaker_label,
-                "mapped": mapped,
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": text,
-                "has_speaker": True
-            })
-
-            
+                print(f"[FEHLER] Diarization fehlgeschlagen: {e}; Fallback wird genutzt")
+                diar_segments = fallback_diarization(audio)
         else:
-            # KEINE Sprecher-Info, nur Text
-            final_transcript.append({
-                "start": seg["start"],
-                "end": seg["end"],
-                "text": text,
-                "has_speaker": False
-            })
-
-    # 5️⃣ temporäre Datei löschen
-    try:
-        if created_temp and created_temp != file_path:
-            os.remove(created_temp)
-    except Exception:
-        pass
+            diar_segments, diar_s = _timed(_diarize_traced, tracer, speech_audio, **diar_kwargs)
+        diar_segments = _map_diarization(speech_map, diar_segments)
+        print("[INFO] Diarization Segmente erhalten:", len(diar_segments))
+        if not force_dummy:
+            _cache_store(cache, audio_hash, "diarization", diar_params, diar_segments)
+        return True
+
+    def _speakers_event():
+        # Bisherige Einträge mit Sprechern versehen
+        with tracer.accumulate("formatting"):
+            index = SpeakerIndex(diar_segments)
+            labels = index.assign(transcript_segments)
+            for i, (seg, label) in enumerate(zip(transcript_segments, labels)):
+                final_transcript[i] = _build_entry(seg, final_transcript[i]["text"], label, map_speaker)
+            return index, {
+                "event": "speakers",
+                "lines": [format_segment_line(s, timestamps_enabled, force_dummy) for s in final_transcript],
+            }
 
-    # 6️⃣ Ausgabe formatieren
-    lines = []
-    for s in final_transcript:
-        # Zeitstempel-Prefix (nur wenn aktiviert)
-        timestamp_prefix = f"[{s['start']:.2f}-{s['end']:.2f}] " if timestamps_enabled else ""
-        
-        if s.get("has_speaker", False):
-            # MIT Sprecher-Segmentierung
-            dummy_prefix = "[DUMMY-Fallback] " if force_dummy else ""
-            lines.append(f"{dummy_prefix}{timestamp_prefix}{s['mapped']}: {s['text']}")
+    try:
+        yield {"event": "stage", "stage": "transcribe"}
+        if need_whisper:
+            with tracer.span("model_load"):
+                _load_whisper(whisper, device)
+            segments, duration = _iter_whisper(speech_audio, whisper, device)
+            segments = tracer.meter(segments, "transcription")
+            if speech_map is not None:
+                segments = (speech_map.map_segment(seg) for seg in segments)
+                duration = speech_map.original_s
         else:
-            # OHNE Sprecher-Segmentierung
-            lines.append(f"{timestamp_prefix}{s['text']}")
+            segments = iter(cached_transcript)
+            duration = cached_transcript[-1]["end"] if cached_transcript else 0.0
+        t_whisper = time.perf_counter()
+        # Diarization aus dem Cache: Sprecher sind von Anfang an bekannt
+        index = SpeakerIndex(diar_segments) if diar_segments else None
+        pending = []
+
+        def _emit_batch():
+            # Anonymisierung gebündelt über nlp.pipe, danach Segment für Segment liefern
+            nonlocal index
+            batch = pending[:]
+            pending.clear()
+            texts = [seg["text"] for seg in batch]
+            if anonymizer_enabled and batch:
+                with tracer.accumulate("anonymization"):
+                    try:
+                        texts = anonymize_texts(texts)
+                    except Exception as e:
+                        print(f"[WARNUNG] Anonymizer fehlgeschlagen: {e}; Originaltext wird verwendet")
 
-    return ("\n".join(lines), debug if return_debug else None)
\ No newline at end of file
+            for seg, text in zip(batch, texts):
+                if index is None and diar_future is not None and _collect_diarization(block=False):
+                    index, event = _speakers_event()
+                    yield event
+
+                with tracer.accumulate("formatting"):
+                    label = index.assign([seg])[0] if index is not None else None
+                    entry = _build_entry(seg, text, label, map_speaker)
+                    transcript_segments.append(seg)
+                    final_transcript.append(entry)
+                    progress = min(1.0, seg["end"] / duration) if duration > 0 else 0.0
+                    line = format_segment_line(entry, timestamps_enabled, force_dummy)
+                yield {
+                    "event": "segment",
+                    "entry": entry,
+                    "line": line,
+                    "progress": progress,
+                }
+
+        batch_size = STREAM_ANONYMIZE_BATCH if anonymizer_enabled else 1
+        for seg in segments:
+            pending.append(seg)
+            if len(pending) >= batch_size:
+                yield from _emit_batch()
+        yield from _emit_batch()
+        whisper_s = time.perf_counter() - t_whisper if need_whisper else 0.0
+        tracer.close("transcription", segments=len(transcript_segments))
+        tracer.close("anonymization", segments=len(transcript_segments))
+        print(f"[OK] Transkription abgeschlossen: {len(transcript_segments)} Segmente")
+        if need_whisper:
+            _cache_store(cache, audio_hash, "whisper", whisper_params, transcript_segments)
+
+        if need_diar and index is None:
+            yield {"event": "stage", "stage": "diarize"}
+            _collect_diarization(block=True)
+            if diar_segments:
+                index, event = _speakers_event()
+                yield event
+    finally:
+        # Auch bei close() (Abbruch in jobs.py): Hintergrund-Diarization nicht weiterlaufen lassen
+        _await_diarization(diar_future)
+        _remove_temp(created_temp, file_path)
+
+    total = time.perf_counter() - t_total
+    debug["transcript_segments"] = transcript_segments.copy()
+    debug["diar_segments"] = diar_segments.copy() if diarization_enabled and diar_segments else []
+    debug["diarization_engine"] = _diarization_engine(diar_segments) if diarization_enabled else None
+    debug["timings"] = {
+        "parallel_mode": parallel_mode if need_whisper and need_diar else "off",
+        "whisper_s": whisper_s,
+        "diarization_s": diar_s,
+        "total_s": total,
+        "overlap_s": max(0.0, whisper_s + diar_s - total),
+    }
+    with tracer.accumulate("formatting"):
+        lines = [format_segment_line(s, timestamps_enabled, force_dummy) for s in final_transcript]
+        text = "\n".join(lines)
+    tracer.close("formatting", segments=len(final_transcript))
+    debug["final_transcript"] = final_transcript
+    debug["spans"] = tracer.finish()
+    yield {"event": "done", "text": text, "debug": debug}
@@ -0,0 +1,300 @@
+# modules/tuning.py
+
+import argparse
+import json
+import os
+import platform
+import sys
+import threading
+import time
+
+PROFILE_DIR = os.environ.get(
+    "TRANSKRIPTOR_PROFILE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "transkriptor", "profiles"),
+)
+
+# Werte ohne Profil (entspricht dem bisherigen Verhalten)
+DEFAULT_WHISPER = {
+    "model_size": "large",
+    "compute_type": "default",
+    "beam_size": 5,
+    "cpu_threads": 0,
+    "num_workers": 1,
+}
+
+# Erlaubte Wortfehlerrate gegenüber der genauesten Konfiguration
+PREFERENCES = {"speed": 0.25, "balanced": 0.10, "accuracy": 0.0}
+
+DEFAULT_MODELS = ["small", "medium", "large"]
+COMPUTE_TYPES = {
+    "cpu": ["int8", "float32"],
+    "cuda": ["int8_float16", "float16", "float32"],
+}
+# Genauigkeit der compute_types (höher = genauer), für die Wahl der Referenz
+_PRECISION = {"int8": 0, "int8_float16": 1, "float16": 2, "float32": 3}
+_MODEL_ORDER = ["tiny", "base", "small", "medium", "large", "large-v2", "large-v3"]
+
+_lock = threading.Lock()
+_profiles = {}      # Pfad -> (mtime, Profil)
+
+
+# ---------------------------------------------------------
+# HARDWARE + PROFIL
+# ---------------------------------------------------------
+def hardware_info():
+    """Merkmale, an denen ein Profil hängt; ändern sie sich, wird es ignoriert."""
+    from .model_registry import default_device
+    device = default_device()
+    info = {
+        "machine": platform.machine(),
+        "system": platform.system(),
+        "cpu_count": os.cpu_count() or 1,
+        "device": device,
+    }
+    if device == "cuda":
+        try:
+            import torch
+            info["gpu"] = torch.cuda.get_device_name(0)
+        except Exception:
+            info["gpu"] = "unknown"
+    return info
+
+
+def profile_path(host=None):
+    return os.path.join(PROFILE_DIR, f"{host or platform.node() or 'localhost'}.json")
+
+
+def load_profile(path=None):
+    """
+    Lädt das Profil dieses Rechners (gecacht, bei geänderter Datei neu
+    gelesen). None, wenn keines existiert oder es zu anderer Hardware gehört.
+    """
+    path = path or profile_path()
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+    with _lock:
+        cached = _profiles.get(path)
+        if cached and cached[0] == mtime:
+            return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            profile = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"[WARNUNG] Tuning-Profil unlesbar ({path}): {e}")
+        profile = None
+    if profile is not None and profile.get("hardware") != hardware_info():
+        print("[WARNUNG] Tuning-Profil passt nicht zur aktuellen Hardware und wird ignoriert; "
+              "bitte neu kalibrieren (python tune.py)")
+        profile = None
+    with _lock:
+        _profiles[path] = (mtime, profile)
+    return profile
+
+
+def save_profile(profile, path=None):
+    path = path or profile_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(profile, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+    return path
+
+
+def _settings_of(result):
+    return {k: result[k] for k in DEFAULT_WHISPER}
+
+
+def _pick(results, max_wer, model_size=None):
+    """Schnellste Konfiguration mit WER <= max_wer (optional nur für ein Modell)."""
+    rows = [r for r in results if "error" not in r and (model_size is None or r["model_size"] == model_size)]
+    if not rows:
+        return None
+    good = [r for r in rows if r["wer"] <= max_wer + 1e-9]
+    return min(good or rows, key=lambda r: r["rtf"])
+
+
+def resolve_whisper_settings(model_size="auto", compute_type="default", use_profile=True):
+    """
+    Whisper-Einstellungen für einen Lauf. Vorrang: explizite Werte des
+    Aufrufers, dann das Tuning-Profil dieses Rechners, dann DEFAULT_WHISPER.
+    model_size="auto" übernimmt das Modell aus dem Profil; bei festem Modell
+    werden die für dieses Modell gemessenen besten Werte genutzt.
+    compute_type="default" gilt als "nicht festgelegt".
+    Rückgabe: dict wie DEFAULT_WHISPER plus "source" ("profile"/"default").
+    """
+    settings = dict(DEFAULT_WHISPER)
+    if model_size and model_size != "auto":
+        settings["model_size"] = model_size
+    source = "default"
+
+    profile = load_profile() if use_profile else None
+    if profile:
+        fixed_model = model_size if model_size and model_size != "auto" else None
+        best = _pick(profile.get("results", []), profile.get("max_wer", 0.0), fixed_model)
+        if best is not None:
+            settings.update(_settings_of(best))
+            source = "profile"
+
+    if compute_type and compute_type != "default":
+        settings["compute_type"] = compute_type
+    settings["source"] = source
+    return settings
+
+
+# ---------------------------------------------------------
+# KALIBRIERUNG
+# ---------------------------------------------------------
+def word_error_rate(reference, hypothesis):
+    """Wortfehlerrate (Levenshtein auf Wortebene, Groß-/Kleinschreibung egal)."""
+    ref = reference.lower().split()
+    hyp = hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    prev = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        cur = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (r != h))
+        prev = cur
+    return prev[-1] / len(ref)
+
+
+def candidate_configs(device, models=None, compute_types=None, threads=None, beams=(1, 5)):
+    """Alle zu messenden Kombinationen; die genaueste zuerst (dient als Referenz)."""
+    cores = os.cpu_count() or 1
+    models = models or DEFAULT_MODELS
+    compute_types = compute_types or COMPUTE_TYPES.get(device, COMPUTE_TYPES["cpu"])
+    if threads is None:
+        threads = sorted({cores, max(1, cores // 2)}, reverse=True) if device == "cpu" else [0]
+    configs = [
+        {"model_size": m, "compute_type": c, "beam_size": b, "cpu_threads": t, "num_workers": 1}
+        for m in models for c in compute_types for t in threads for b in beams
+    ]
+    configs.sort(key=lambda c: (
+        -(_MODEL_ORDER.index(c["model_size"]) if c["model_size"] in _MODEL_ORDER else 0),
+        -_PRECISION.get(c["compute_type"], 0),
+        -c["beam_size"],
+        -c["cpu_threads"],
+    ))
+    return configs
+
+
+def _measure(samples, duration, config, device, repeats):
+    from .model_registry import get_model
+    t0 = time.perf_counter()
+    model = get_model(config["model_size"], device=device, compute_type=config["compute_type"],
+                      cpu_threads=config["cpu_threads"], num_workers=config["num_workers"])
+    load_s = time.perf_counter() - t0
+    best = None
+    text = ""
+    for _ in range(max(1, repeats)):
+        t0 = time.perf_counter()
+        segments, _ = model.transcribe(samples, beam_size=config["beam_size"])
+        text = " ".join(s.text.strip() for s in segments)
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return {"load_s": load_s, "wall_s": best, "rtf": best / duration, "text": text}
+
+
+def calibrate(clip_path, preference="balanced", max_wer=None, models=None, compute_types=None,
+              threads=None, beams=(1, 5), repeats=1, reference_text=None, save=True):
+    """
+    Misst alle Kandidaten auf einem kurzen Referenz-Clip und speichert das
+    Profil für diesen Rechner. Genauigkeit = WER gegenüber reference_text
+    oder, falls nicht angegeben, gegenüber der genauesten Konfiguration.
+    Gewählt wird die schnellste Konfiguration mit WER <= max_wer
+    (Standard aus `preference`: speed/balanced/accuracy).
+    """
+    from .audio import load_audio
+    from .model_registry import clear, default_device
+
+    max_wer = PREFERENCES[preference] if max_wer is None else max_wer
+    device = default_device()
+    audio = load_audio(clip_path)
+    configs = candidate_configs(device, models, compute_types, threads, beams)
+    print(f"[INFO] Kalibrierung: {len(configs)} Konfigurationen auf {audio.duration:.1f}s Audio ({device})")
+
+    results = []
+    for n, config in enumerate(configs, 1):
+        row = dict(config)
+        try:
+            row.update(_measure(audio.samples, audio.duration, config, device, repeats))
+        except Exception as e:
+            row["error"] = f"{type(e).__name__}: {e}"
+            print(f"[WARNUNG] ({n}/{len(configs)}) {config}: {row['error']}")
+            results.append(row)
+            continue
+        if reference_text is None:
+            # Erste erfolgreiche (= genaueste) Konfiguration ist die Referenz
+            reference_text = row["text"]
+        row["wer"] = word_error_rate(reference_text, row["text"])
+        print(f"[INFO] ({n}/{len(configs)}) {config['model_size']}/{config['compute_type']} "
+              f"threads={config['cpu_threads']} beam={config['beam_size']}: "
+              f"RTF {row['rtf']:.3f}, WER {row['wer']:.1%}")
+        results.append(row)
+        # Modelle nicht alle gleichzeitig im Speicher halten
+        clear()
+
+    best = _pick(results, max_wer)
+    if best is None:
+        raise RuntimeError("Keine Konfiguration konnte gemessen werden")
+    profile = {
+        "host": platform.node(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "hardware": hardware_info(),
+        "clip": os.path.abspath(clip_path),
+        "clip_s": audio.duration,
+        "preference": preference,
+        "max_wer": max_wer,
+        "best": _settings_of(best),
+        "results": [{k: v for k, v in r.items() if k != "text"} for r in results],
+    }
+    print(f"[OK] Beste Konfiguration: {profile['best']} (RTF {best['rtf']:.3f}, WER {best['wer']:.1%})")
+    if save:
+        print(f"[OK] Profil gespeichert: {save_profile(profile)}")
+    return profile
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Kalibriert Whisper auf diesem Rechner und speichert das beste Profil."
+    )
+    parser.add_argument("clip", nargs="?", help="Kurzer Referenz-Clip (z.B. 30-60 s Sprache)")
+    parser.add_argument("--preference", choices=list(PREFERENCES), default="balanced",
+                        help="Abwägung Geschwindigkeit/Genauigkeit")
+    parser.add_argument("--max-wer", type=float, help="Erlaubte Wortfehlerrate (überschreibt --preference)")
+    parser.add_argument("--models", nargs="+", default=DEFAULT_MODELS)
+    parser.add_argument("--compute-types", nargs="+", help="Standard: passend zum Gerät")
+    parser.add_argument("--threads", type=int, nargs="+", help="cpu_threads-Kandidaten (nur CPU)")
+    parser.add_argument("--beams", type=int, nargs="+", default=[1, 5])
+    parser.add_argument("--repeats", type=int, default=1, help="Läufe pro Konfiguration (Minimum zählt)")
+    parser.add_argument("--reference-text", help="Textdatei mit der korrekten Transkription des Clips")
+    parser.add_argument("--show", action="store_true", help="Gespeichertes Profil anzeigen")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        profile = load_profile()
+        if profile is None:
+            print(f"Kein gültiges Profil unter {profile_path()}")
+            return 1
+        print(json.dumps({k: profile[k] for k in ("host", "created", "preference", "max_wer", "best")},
+                         ensure_ascii=False, indent=2))
+        return 0
+    if not args.clip:
+        parser.error("Referenz-Clip fehlt")
+
+    reference_text = None
+    if args.reference_text:
+        with open(args.reference_text, "r", encoding="utf-8") as f:
+            reference_text = f.read()
+    calibrate(args.clip, preference=args.preference, max_wer=args.max_wer, models=args.models,
+              compute_types=args.compute_types, threads=args.threads, beams=args.beams,
+              repeats=args.repeats, reference_text=reference_text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# modules/vad.py
+
+import bisect
+
+import numpy as np
+
+from .audio import AudioBuffer, SAMPLE_RATE
+
+FRAME_S = 0.03              # Frame-Länge für die Energie
+MARGIN_DB = 12.0            # Sprache = so viel über dem Grundrauschen
+MIN_LEVEL_DB = -55.0        # darunter ist es immer Stille (dBFS)
+MIN_SPEECH_S = 0.25         # kürzere Sprach-Inseln sind Knackser/Störgeräusche
+MIN_SILENCE_S = 0.6         # kürzere Pausen bleiben erhalten (Sprechpausen im Satz)
+PAD_S = 0.2                 # Rand um jede Sprachregion (Wortanfänge/-enden)
+GAP_S = 0.1                 # Stille zwischen den Regionen im verdichteten Puffer
+MIN_SKIP_FRACTION = 0.05    # lohnt sich erst ab so viel übersprungenem Audio
+
+
+def detect_speech(samples, sample_rate=SAMPLE_RATE, frame_s=FRAME_S, margin_db=MARGIN_DB,
+                  min_level_db=MIN_LEVEL_DB, min_speech_s=MIN_SPEECH_S,
+                  min_silence_s=MIN_SILENCE_S, pad_s=PAD_S):
+    """
+    Energie-basierte Sprachaktivitätserkennung. Die Schwelle liegt
+    `margin_db` über dem Grundrauschen (10. Perzentil der Frame-Energie),
+    mindestens aber bei `min_level_db`.
+    Rückgabe: Liste von (start, end) in Samples, sortiert und disjunkt.
+    """
+    n = len(samples)
+    frame = max(1, int(frame_s * sample_rate))
+    n_frames = n // frame
+    if n_frames == 0:
+        return [(0, n)] if n else []
+
+    framed = samples[:n_frames * frame].reshape(n_frames, frame).astype(np.float64)
+    db = 10.0 * np.log10(np.mean(framed ** 2, axis=1) + 1e-12)
+    threshold = max(min_level_db, float(np.percentile(db, 10)) + margin_db)
+    voiced = db > threshold
+
+    # Übergänge -> (start, end) Frame-Indizes
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], voiced.astype(np.int8), [0]))))
+    runs = list(zip(edges[::2], edges[1::2]))
+
+    # Kurze Pausen schließen, dann kurze Inseln verwerfen
+    merged = []
+    max_gap = int(min_silence_s / frame_s)
+    for start, end in runs:
+        if merged and start - merged[-1][1] < max_gap:
+            merged[-1] = (merged[-1][0], end)
+        else:
+            merged.append((start, end))
+    min_len = max(1, int(min_speech_s / frame_s))
+    pad = int(pad_s * sample_rate)
+
+    regions = []
+    for start, end in merged:
+        if end - start < min_len:
+            continue
+        s = max(0, start * frame - pad)
+        e = min(n, end * frame + pad)
+        if regions and s <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], e)
+        else:
+            regions.append((s, e))
+    return regions
+
+
+class SpeechMap:
+    """
+    Zuordnung zwischen Zeiten im verdichteten Puffer (nur Sprache) und im
+    Original. Jede Region: (Start im Original, Ende im Original, Start im
+    verdichteten Puffer), alles in Sekunden.
+    """
+
+    def __init__(self, regions, original_s, gap_s=GAP_S):
+        self.regions = regions
+        self.original_s = original_s
+        self.gap_s = gap_s
+        self._compact_starts = [r[2] for r in regions]
+
+    @property
+    def speech_s(self):
+        return sum(end - start for start, end, _ in self.regions)
+
+    @property
+    def compact_s(self):
+        return self.speech_s + self.gap_s * max(0, len(self.regions) - 1)
+
+    def to_original(self, t, is_end=False):
+        """
+        Zeit im verdichteten Puffer -> Originalzeit. Zeiten in einer
+        eingefügten Lücke fallen auf das Ende der Region davor; ein Ende
+        genau auf einer Regionsgrenze gehört zur vorherigen Region.
+        """
+        if not self.regions:
+            return t
+        find = bisect.bisect_left if is_end else bisect.bisect_right
+        i = max(0, find(self._compact_starts, t) - 1)
+        start, end, compact_start = self.regions[i]
+        return min(end, start + max(0.0, t - compact_start))
+
+    def map_segment(self, seg):
+        """Kopie von `seg` mit Start/Ende in Originalzeit."""
+        mapped = dict(seg)
+        mapped["start"] = self.to_original(seg["start"])
+        mapped["end"] = max(mapped["start"], self.to_original(seg["end"], is_end=True))
+        return mapped
+
+    def map_segments(self, segments):
+        return [self.map_segment(seg) for seg in segments]
+
+    def stats(self):
+        skipped = max(0.0, self.original_s - self.speech_s)
+        return {
+            "original_s": self.original_s,
+            "speech_s": self.speech_s,
+            "processed_s": self.compact_s,
+            "regions": len(self.regions),
+            "skipped_fraction": skipped / self.original_s if self.original_s else 0.0,
+            # Whisper und Diarization skalieren etwa linear mit der Audiolänge
+            "expected_speedup": self.original_s / self.compact_s if self.compact_s else 1.0,
+        }
+
+
+def compact(audio, regions, gap_s=GAP_S):
+    """
+    Verdichteter AudioBuffer aus den Sprachregionen (getrennt durch kurze
+    Stille) und die passende SpeechMap.
+    """
+    sr = audio.sample_rate
+    gap = np.zeros(int(gap_s * sr), dtype=np.float32)
+    parts = []
+    mapping = []
+    pos = 0
+    for i, (start, end) in enumerate(regions):
+        if i:
+            parts.append(gap)
+            pos += len(gap)
+        start, end = int(start), int(end)
+        parts.append(audio.samples[start:end])
+        mapping.append((start / sr, end / sr, pos / sr))
+        pos += end - start
+    samples = np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+    speech_map = SpeechMap(mapping, audio.duration, gap_s=len(gap) / sr)
+    buffer = AudioBuffer(samples, sr, source_path=audio.source_path,
+                         metadata=dict(audio.metadata, vad=True))
+    return buffer, speech_map
+
+
+def apply_vad(audio, min_skip_fraction=MIN_SKIP_FRACTION, **params):
+    """
+    Sprach-Vorfilter für die Pipeline: Rückgabe (Audio für Whisper und
+    Diarization, SpeechMap oder None). Bleibt weniger als
+    `min_skip_fraction` Stille übrig oder wird keine Sprache gefunden,
+    geht das Original unverändert weiter (SpeechMap None).
+    """
+    regions = detect_speech(audio.samples, audio.sample_rate, **params)
+    speech_s = sum(end - start for start, end in regions) / audio.sample_rate
+    if not regions or audio.duration <= 0 or 1.0 - speech_s / audio.duration < min_skip_fraction:
+        print(f"[INFO] VAD: {speech_s:.1f}s Sprache von {audio.duration:.1f}s – Original wird verwendet")
+        return audio, None
+    buffer, speech_map = compact(audio, regions)
+    stats = speech_map.stats()
+    print(f"[INFO] VAD: {stats['regions']} Sprachregionen, {stats['skipped_fraction']:.0%} übersprungen "
+          f"({audio.duration:.1f}s -> {buffer.duration:.1f}s)")
+    return buffer, speech_map
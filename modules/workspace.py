@@ -0,0 +1,290 @@
+# modules/workspace.py
+
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+import weakref
+
+WORKSPACE_DIR = os.environ.get(
+    "TRANSKRIPTOR_WORKSPACE_DIR",
+    os.path.join(tempfile.gettempdir(), "transkriptor", "workspace"),
+)
+QUOTA_MB = int(os.environ.get("TRANSKRIPTOR_WORKSPACE_QUOTA_MB", "4096"))
+ACTIVE_MARKER = ".active."      # + PID: Verzeichnis wird von diesem Prozess benutzt
+
+
+def _pid_alive(pid):
+    if os.name == "nt":
+        # os.kill(pid, 0) würde unter Windows den Prozess beenden
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except OSError:
+        return True
+    return True
+
+
+class Workspace:
+    """
+    Verwaltet alle Zwischendateien (Aufnahmen, Uploads, Preprocessing) in
+    einem Verzeichnis pro Besitzer ("owner": Sitzung, Upload, Prozess).
+    - hold()/release() zählen, wer einen Besitzer gerade benutzt; benutzte
+      Verzeichnisse tragen eine Markierungsdatei mit der PID, damit auch
+      andere Prozesse (batch.py-Worker) sie nicht löschen.
+    - Überschreitet der Platzbedarf die Quote, werden nicht benutzte
+      Verzeichnisse gelöscht, das am längsten unbenutzte zuerst (LRU).
+    - Beim Prozessende werden alle selbst angelegten Verzeichnisse entfernt;
+      Reste abgestürzter Prozesse fallen bei der nächsten Verdrängung weg.
+    """
+
+    def __init__(self, root=WORKSPACE_DIR, quota_bytes=QUOTA_MB * 1024 * 1024):
+        self.root = os.path.abspath(root)
+        self.quota_bytes = quota_bytes
+        self.scratch = f"scratch-{os.getpid()}"     # Temp-Dateien ohne eigenen Besitzer
+        self.evicted = 0
+        self.evicted_bytes = 0
+        self._lock = threading.RLock()
+        self._holds = {}        # owner -> Anzahl Benutzer in diesem Prozess
+        self._discard = set()   # nach dem letzten release() löschen
+        self._created = set()   # von diesem Prozess angelegt (Aufräumen beim Beenden)
+        os.makedirs(self.root, exist_ok=True)
+
+    # --- Verzeichnisse und Dateien -----------------------------------
+    def owner_dir(self, owner, create=True):
+        path = os.path.join(self.root, owner)
+        if create and not os.path.isdir(path):
+            os.makedirs(path, exist_ok=True)
+            with self._lock:
+                self._created.add(owner)
+        return path
+
+    def owner_of(self, path):
+        """Besitzer einer Datei im Arbeitsbereich, sonst None."""
+        rel = os.path.relpath(os.path.abspath(path), self.root)
+        if rel.startswith(os.pardir) or os.path.isabs(rel) or os.sep not in rel:
+            return None
+        return rel.split(os.sep, 1)[0]
+
+    def new_file(self, owner=None, suffix=".wav", reserve_bytes=0):
+        """
+        Legt eine leere Datei für `owner` an (Standard: Scratch-Bereich dieses
+        Prozesses) und gibt den Pfad zurück. Vorher wird die Quote geprüft;
+        reserve_bytes = erwartete Größe der neuen Datei.
+        """
+        if owner is None:
+            owner = self.scratch
+            with self._lock:
+                if owner not in self._holds:
+                    self.hold(owner)    # bleibt bis Prozessende benutzt
+        self.enforce_quota(reserve_bytes)
+        fd, path = tempfile.mkstemp(dir=self.owner_dir(owner), suffix=suffix)
+        os.close(fd)
+        return path
+
+    def remove_file(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    # --- Benutzung ----------------------------------------------------
+    def _marker(self, owner):
+        return os.path.join(self.root, owner, f"{ACTIVE_MARKER}{os.getpid()}")
+
+    def hold(self, owner):
+        """Markiert `owner` als benutzt (wird nicht verdrängt)."""
+        with self._lock:
+            count = self._holds.get(owner, 0)
+            self._holds[owner] = count + 1
+            self._discard.discard(owner)
+            if count == 0:
+                self.owner_dir(owner)
+                open(self._marker(owner), "w").close()
+        return owner
+
+    def hold_path(self, path):
+        """hold() für den Besitzer von `path`; None, wenn die Datei nicht im Arbeitsbereich liegt."""
+        owner = self.owner_of(path)
+        return self.hold(owner) if owner else None
+
+    def release(self, owner, discard=False):
+        """
+        Gibt eine Benutzung frei. Danach darf das Verzeichnis verdrängt werden;
+        mit discard=True wird es gelöscht, sobald niemand es mehr benutzt.
+        """
+        if owner is None:
+            return
+        with self._lock:
+            count = self._holds.get(owner, 0) - 1
+            if discard:
+                self._discard.add(owner)
+            if count > 0:
+                self._holds[owner] = count
+                return
+            self._holds.pop(owner, None)
+            try:
+                os.remove(self._marker(owner))
+                # Verzeichnis-mtime = letzte Benutzung (für LRU)
+                os.utime(self.owner_dir(owner, create=False), None)
+            except OSError:
+                pass
+            if owner in self._discard:
+                self.remove(owner)
+
+    def remove(self, owner):
+        """Löscht das Verzeichnis von `owner` sofort."""
+        with self._lock:
+            self._holds.pop(owner, None)
+            self._discard.discard(owner)
+            self._created.discard(owner)
+            shutil.rmtree(self.owner_dir(owner, create=False), ignore_errors=True)
+
+    def _active(self, owner, names):
+        if self._holds.get(owner):
+            return True
+        for name in names:
+            if name.startswith(ACTIVE_MARKER):
+                try:
+                    pid = int(name[len(ACTIVE_MARKER):])
+                except ValueError:
+                    continue
+                if pid != os.getpid() and _pid_alive(pid):
+                    return True
+        return False
+
+    # --- Platzbedarf und Verdrängung ----------------------------------
+    def _scan(self):
+        """(owner, Bytes, Dateien, letzte Benutzung, benutzt) pro Verzeichnis."""
+        rows = []
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return rows
+        for entry in entries:
+            if not entry.is_dir(follow_symlinks=False):
+                continue
+            size = files = 0
+            last_used = entry.stat().st_mtime
+            names = []
+            for root, _, filenames in os.walk(entry.path):
+                for name in filenames:
+                    names.append(name)
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except OSError:
+                        continue
+                    if not name.startswith(ACTIVE_MARKER):
+                        size += st.st_size
+                        files += 1
+                    last_used = max(last_used, st.st_mtime)
+            rows.append((entry.name, size, files, last_used, self._active(entry.name, names)))
+        return rows
+
+    def usage(self):
+        """Aktueller Platzbedarf: gesamt, Quote, Verdrängungen und Details pro Besitzer."""
+        with self._lock:
+            rows = self._scan()
+            return {
+                "root": self.root,
+                "bytes": sum(r[1] for r in rows),
+                "quota_bytes": self.quota_bytes,
+                "evicted": self.evicted,
+                "evicted_bytes": self.evicted_bytes,
+                "owners": {
+                    owner: {"bytes": size, "files": files, "last_used": last_used, "active": active}
+                    for owner, size, files, last_used, active in rows
+                },
+            }
+
+    def enforce_quota(self, reserve_bytes=0):
+        """
+        Löscht nicht benutzte Verzeichnisse (LRU), bis Belegung + reserve_bytes
+        in die Quote passen. Gibt die Anzahl freigegebener Bytes zurück.
+        """
+        with self._lock:
+            rows = self._scan()
+            total = sum(r[1] for r in rows)
+            if total + reserve_bytes <= self.quota_bytes:
+                return 0
+            freed = 0
+            for owner, size, _, last_used, active in sorted(rows, key=lambda r: r[3]):
+                if total + reserve_bytes - freed <= self.quota_bytes:
+                    break
+                if active:
+                    continue
+                self.remove(owner)
+                freed += size
+                self.evicted += 1
+                self.evicted_bytes += size
+                print(f"[INFO] Arbeitsbereich: '{owner}' entfernt ({size / 1e6:.1f} MB, "
+                      f"zuletzt benutzt vor {time.time() - last_used:.0f}s)")
+            if total + reserve_bytes - freed > self.quota_bytes:
+                print(f"[WARNUNG] Arbeitsbereich über der Quote ({(total - freed) / 1e6:.0f} MB belegt, "
+                      f"{self.quota_bytes / 1e6:.0f} MB erlaubt); alle Dateien sind in Benutzung")
+            return freed
+
+    def cleanup(self):
+        """Entfernt alle von diesem Prozess angelegten Verzeichnisse (beim Beenden)."""
+        with self._lock:
+            for owner in list(self._created):
+                self.remove(owner)
+
+
+def _close_session(workspace, owner, held):
+    for other in held:
+        workspace.release(other)
+    held.clear()
+    workspace.release(owner, discard=True)
+
+
+class SessionWorkspace:
+    """
+    Dateien einer App-Sitzung. Aufnahmen liegen im eigenen Verzeichnis, die
+    aktuell benutzten Uploads werden gehalten. Endet die Sitzung (das Objekt
+    wird freigegeben) oder wird close() aufgerufen, wird das Verzeichnis
+    gelöscht und die Uploads werden zur Verdrängung freigegeben.
+    """
+
+    def __init__(self, workspace=None):
+        self.workspace = workspace or get_workspace()
+        self.owner = self.workspace.hold(f"session-{uuid.uuid4().hex[:12]}")
+        self._held = []     # weitere gehaltene Besitzer (Uploads)
+        self._finalizer = weakref.finalize(self, _close_session, self.workspace, self.owner, self._held)
+
+    def new_file(self, suffix=".wav"):
+        return self.workspace.new_file(self.owner, suffix)
+
+    def use(self, owner):
+        """Hält `owner` (z.B. einen Upload) und gibt die bisher gehaltenen frei."""
+        if owner in self._held:
+            return
+        self.release_all()
+        if owner and owner != self.owner:
+            self._held.append(self.workspace.hold(owner))
+
+    def release_all(self):
+        while self._held:
+            self.workspace.release(self._held.pop())
+
+    def close(self):
+        self._finalizer()
+
+
+_default_workspace = None
+_workspace_lock = threading.Lock()
+
+
+def get_workspace():
+    """Prozessweite Standard-Instanz; räumt beim Prozessende auf."""
+    global _default_workspace
+    with _workspace_lock:
+        if _default_workspace is None:
+            _default_workspace = Workspace()
+            atexit.register(_default_workspace.cleanup)
+        return _default_workspace
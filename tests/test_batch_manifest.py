@@ -0,0 +1,182 @@
+# tests/test_batch_manifest.py
+
+import json
+import os
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from modules import batch
+
+SETTINGS = dict(batch.DEFAULT_SETTINGS)
+
+
+@pytest.fixture
+def audio(tmp_path):
+    path = tmp_path / "in" / "a.wav"
+    path.parent.mkdir()
+    path.write_bytes(b"RIFF....WAVE")
+    return str(path)
+
+
+def _done_entry(input_path, out_dir):
+    outputs = {"txt": os.path.join(out_dir, "a.wav.txt")}
+    with open(outputs["txt"], "w", encoding="utf-8") as f:
+        f.write("text")
+    return {
+        "input": input_path,
+        "status": "done",
+        "input_fingerprint": batch._fingerprint(input_path),
+        "settings": SETTINGS,
+        "outputs": outputs,
+    }
+
+
+def test_should_process_by_status(audio):
+    assert batch.should_process(None, audio, SETTINGS)
+    assert batch.should_process({"status": "pending"}, audio, SETTINGS)
+    # "running" bleibt nach einem Absturz des Hauptprozesses stehen
+    assert batch.should_process({"status": "running"}, audio, SETTINGS)
+    assert not batch.should_process({"status": "failed"}, audio, SETTINGS)
+    assert batch.should_process({"status": "failed"}, audio, SETTINGS, retry_failed=True)
+
+
+def test_done_entry_is_skipped_until_something_changes(audio, tmp_path):
+    entry = _done_entry(audio, str(tmp_path))
+    assert batch.is_done(entry, audio, SETTINGS)
+    assert not batch.should_process(entry, audio, SETTINGS)
+
+    assert not batch.is_done(entry, audio, dict(SETTINGS, model_size="small"))
+
+    os.utime(audio, (0, 12345))
+    assert not batch.is_done(entry, audio, SETTINGS)
+
+
+def test_done_entry_with_missing_output_is_redone(audio, tmp_path):
+    entry = _done_entry(audio, str(tmp_path))
+    os.remove(entry["outputs"]["txt"])
+    assert batch.should_process(entry, audio, SETTINGS)
+
+
+def test_corrupt_manifest_is_backed_up(tmp_path):
+    (tmp_path / batch.MANIFEST_NAME).write_text("{kaputt", encoding="utf-8")
+    assert batch.load_manifest(str(tmp_path)) == {"files": {}}
+    assert any(name.startswith(batch.MANIFEST_NAME + ".corrupt-") for name in os.listdir(tmp_path))
+
+
+def test_output_base_keeps_extension(tmp_path):
+    assert batch.output_base(str(tmp_path), "a.wav") != batch.output_base(str(tmp_path), "a.mp3")
+
+
+class _InlineExecutor:
+    """Führt submit() sofort im Testprozess aus (statt in Worker-Prozessen)."""
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def submit(self, fn, *args):
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except BaseException as e:
+            future.set_exception(e)
+        return future
+
+
+def _fake_process_file(crash=(), fail=()):
+    calls = []
+
+    def process_file(key, input_path, out_dir, settings):
+        calls.append(key)
+        if key in crash:
+            raise BrokenProcessPool("Worker beendet")
+        if key in fail:
+            raise ValueError("defekte Datei")
+        base = batch.output_base(out_dir, key)
+        with open(base + ".txt", "w", encoding="utf-8") as f:
+            f.write(key)
+        return {"outputs": {"txt": base + ".txt"}, "timings": {"wall_s": 0.0}, "segments": 0}
+
+    return process_file, calls
+
+
+def test_crashed_worker_is_resumed_but_failed_file_is_not(tmp_path, monkeypatch):
+    inputs = []
+    for name in ("a.wav", "b.wav", "c.wav"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        inputs.append((name, str(path)))
+    out_dir = str(tmp_path / "out")
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", _InlineExecutor)
+
+    process_file, calls = _fake_process_file(crash={"b.wav"}, fail={"c.wav"})
+    monkeypatch.setattr(batch, "process_file", process_file)
+    manifest = batch.run_batch(inputs, out_dir)
+    status = {key: entry["status"] for key, entry in manifest["files"].items()}
+    assert status == {"a.wav": "done", "b.wav": "pending", "c.wav": "failed"}
+
+    # Das Manifest auf der Platte entspricht dem Rückgabewert
+    with open(os.path.join(out_dir, batch.MANIFEST_NAME), encoding="utf-8") as f:
+        assert json.load(f)["files"]["b.wav"]["status"] == "pending"
+
+    process_file, calls = _fake_process_file()
+    monkeypatch.setattr(batch, "process_file", process_file)
+    manifest = batch.run_batch(inputs, out_dir)
+    assert calls == ["b.wav"]
+    assert manifest["files"]["b.wav"]["status"] == "done"
+    assert manifest["files"]["b.wav"]["attempts"] == 2
+
+    process_file, calls = _fake_process_file()
+    monkeypatch.setattr(batch, "process_file", process_file)
+    manifest = batch.run_batch(inputs, out_dir, retry_failed=True)
+    assert calls == ["c.wav"]
+    assert {entry["status"] for entry in manifest["files"].values()} == {"done"}
+
+
+def test_file_that_keeps_crashing_the_worker_is_given_up(tmp_path, monkeypatch):
+    path = tmp_path / "gift.wav"
+    path.write_bytes(b"x")
+    inputs = [("gift.wav", str(path))]
+    out_dir = str(tmp_path / "out")
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", _InlineExecutor)
+    process_file, calls = _fake_process_file(crash={"gift.wav"})
+    monkeypatch.setattr(batch, "process_file", process_file)
+
+    for crashes in range(1, batch.MAX_WORKER_CRASHES):
+        entry = batch.run_batch(inputs, out_dir)["files"]["gift.wav"]
+        assert (entry["status"], entry["crashes"]) == ("pending", crashes)
+    entry = batch.run_batch(inputs, out_dir)["files"]["gift.wav"]
+    assert (entry["status"], entry["crashes"]) == ("failed", batch.MAX_WORKER_CRASHES)
+
+    batch.run_batch(inputs, out_dir)
+    assert len(calls) == batch.MAX_WORKER_CRASHES
+
+    # --retry-failed beginnt die Zählung neu
+    entry = batch.run_batch(inputs, out_dir, retry_failed=True)["files"]["gift.wav"]
+    assert (entry["status"], entry["crashes"]) == ("pending", 1)
+
+
+def test_previously_crashed_files_run_last(tmp_path, monkeypatch):
+    inputs = []
+    for name in ("a.wav", "b.wav", "c.wav"):
+        path = tmp_path / name
+        path.write_bytes(name.encode())
+        inputs.append((name, str(path)))
+    out_dir = str(tmp_path / "out")
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", _InlineExecutor)
+
+    process_file, _ = _fake_process_file(crash={"a.wav"})
+    monkeypatch.setattr(batch, "process_file", process_file)
+    batch.run_batch(inputs[:1], out_dir)
+
+    process_file, calls = _fake_process_file()
+    monkeypatch.setattr(batch, "process_file", process_file)
+    batch.run_batch(inputs, out_dir)
+    assert calls == ["b.wav", "c.wav", "a.wav"]
@@ -0,0 +1,64 @@
+# tests/test_chunked.py
+
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from modules import chunked
+from modules.audio import SAMPLE_RATE
+
+
+class _InlineExecutor:
+    """Ersatz für ProcessPoolExecutor: führt submit() sofort aus und zählt die Pools."""
+
+    created = []
+
+    def __init__(self, max_workers, **kwargs):
+        self.max_workers = max_workers
+        self.initargs = kwargs.get("initargs")
+        _InlineExecutor.created.append(self)
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+        return future
+
+    def shutdown(self, wait=True):
+        pass
+
+
+@pytest.fixture
+def inline_pool(monkeypatch):
+    _InlineExecutor.created = []
+    monkeypatch.setattr(chunked, "ProcessPoolExecutor", _InlineExecutor)
+    monkeypatch.setattr(chunked, "_pools", {})
+    monkeypatch.setattr(chunked, "_transcribe_chunk", lambda offset, samples: [
+        {"start": offset, "end": offset + len(samples) / SAMPLE_RATE, "text": f"chunk {offset:.0f}"}
+    ])
+    monkeypatch.setattr(chunked.os, "cpu_count", lambda: 8)
+    return _InlineExecutor.created
+
+
+def test_short_and_long_files_share_one_pool(inline_pool):
+    short = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    long = np.zeros(200 * SAMPLE_RATE, dtype=np.float32)
+
+    segments, stats = chunked.transcribe_chunked(short, workers=4, chunk_s=60.0)
+    assert stats["chunks"] == 1 and stats["active_workers"] == 1
+    segments, stats = chunked.transcribe_chunked(long, workers=4, chunk_s=60.0)
+    assert stats["chunks"] > 1
+
+    assert len(inline_pool) == 1
+    assert inline_pool[0].max_workers == 4
+    assert inline_pool[0].initargs[0]["cpu_threads"] == 2
+    assert stats["cpu_threads_per_worker"] == 2
+
+
+def test_other_settings_get_their_own_pool(inline_pool):
+    samples = np.zeros(10 * SAMPLE_RATE, dtype=np.float32)
+    chunked.transcribe_chunked(samples, workers=4)
+    chunked.transcribe_chunked(samples, workers=2)
+    assert [p.max_workers for p in inline_pool] == [4, 2]
+    # Der unbenutzte Pool der ersten Konfiguration wurde beendet
+    assert [workers for workers, _ in chunked._pools] == [2]
@@ -0,0 +1,81 @@
+# tests/test_export.py
+
+import io
+import json
+
+import pytest
+
+from modules import export
+
+ENTRIES = [
+    {"start": 0.0, "end": 1.5, "text": "Guten Tag.", "has_speaker": True,
+     "speaker_label": "SPEAKER_00", "mapped": "Person 1"},
+    {"start": 3599.9996, "end": 3725.25, "text": "Über eine Stunde später.", "has_speaker": False},
+]
+
+
+@pytest.mark.parametrize("seconds, sep, expected", [
+    (0.0, ",", "00:00:00,000"),
+    (1.5, ".", "00:00:01.500"),
+    (59.9994, ",", "00:00:59,999"),
+    (59.9996, ",", "00:01:00,000"),      # Rundung läuft in die Minute über
+    (3599.9996, ".", "01:00:00.000"),    # ... und in die Stunde
+    (3725.25, ",", "01:02:05,250"),
+    (36000.0, ".", "10:00:00.000"),
+    (-0.2, ",", "00:00:00,000"),
+])
+def test_clock(seconds, sep, expected):
+    assert export._clock(seconds, sep) == expected
+
+
+def test_srt_uses_commas_and_speaker_prefix():
+    text = export.export_bytes(ENTRIES, "srt").decode("utf-8")
+    assert text == (
+        "1\n00:00:00,000 --> 00:00:01,500\nPerson 1: Guten Tag.\n\n"
+        "2\n01:00:00,000 --> 01:02:05,250\nÜber eine Stunde später.\n\n"
+    )
+
+
+def test_vtt_uses_dots_and_voice_tags():
+    text = export.export_bytes(ENTRIES, "vtt").decode("utf-8")
+    assert text.startswith("WEBVTT\n\n")
+    assert "1\n00:00:00.000 --> 00:00:01.500\n<v Person 1>Guten Tag.\n\n" in text
+    assert "2\n01:00:00.000 --> 01:02:05.250\nÜber eine Stunde später.\n\n" in text
+    assert "," not in text.split("\n")[3]
+
+
+def test_json_is_valid_and_complete():
+    data = json.loads(export.export_bytes(ENTRIES, "json", meta={"model": "large"}))
+    assert data["meta"] == {"model": "large"}
+    assert [s["id"] for s in data["segments"]] == [1, 2]
+    assert data["segments"][0]["speaker"] == "Person 1"
+    assert data["segments"][1]["speaker"] is None
+    assert data["segments"][1]["start"] == 3600.0
+    assert json.loads(export.export_bytes([], "json")) == {"segments": []}
+
+
+def test_txt_matches_app_lines():
+    text = export.export_bytes(ENTRIES, "txt", timestamps_enabled=True).decode("utf-8")
+    assert text.splitlines() == [
+        "[0.00-1.50] Person 1: Guten Tag.",
+        "[3600.00-3725.25] Über eine Stunde später.",
+    ]
+
+
+@pytest.mark.parametrize("fmt", sorted(export.FORMATS))
+def test_streamed_output_matches_export_bytes(fmt, tmp_path):
+    expected = export.export_bytes(ENTRIES, fmt)
+    assert "".join(export.iter_export(ENTRIES, fmt)).encode("utf-8") == expected
+
+    buffer = io.BytesIO()
+    assert export.write_export(ENTRIES, fmt, buffer) == len(expected)
+    assert buffer.getvalue() == expected
+
+    path = tmp_path / export.export_filename(fmt)
+    assert export.write_export(ENTRIES, fmt, path) == len(expected)
+    assert path.read_bytes() == expected
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        export.export_bytes(ENTRIES, "docx")
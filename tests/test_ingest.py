@@ -0,0 +1,152 @@
+# tests/test_ingest.py
+
+import io
+import os
+import struct
+
+import numpy as np
+import pytest
+import soundfile as sf
+
+from modules import ingest
+from modules.ingest import WavStreamDecoder, ingest_upload, sniff_format
+from modules.workspace import Workspace
+
+
+def _wav_bytes(samples, sample_rate, subtype):
+    buffer = io.BytesIO()
+    sf.write(buffer, samples, sample_rate, format="WAV", subtype=subtype)
+    return buffer.getvalue()
+
+
+def _with_chunk_before_data(data, chunk_id=b"LIST", payload=b"INFOISFT\x05\x00\x00\x00test\x00"):
+    """Fügt vor dem data-Chunk einen weiteren Chunk (ungerade Länge + Füllbyte) ein."""
+    pos = data.index(b"data")
+    extra = chunk_id + struct.pack("<I", len(payload)) + payload + b"\x00" * (len(payload) & 1)
+    out = data[:pos] + extra + data[pos:]
+    return out[:4] + struct.pack("<I", len(out) - 8) + out[8:]
+
+
+def _decode(data, piece):
+    decoder = WavStreamDecoder()
+    parts = []
+    for pos in range(0, len(data), piece):
+        samples = decoder.feed(data[pos:pos + piece])
+        if samples is not None:
+            parts.append(samples)
+    return decoder, np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+def _tone(n, channels=1):
+    t = np.arange(n) / 100.0
+    mono = (0.5 * np.sin(t)).astype(np.float32)
+    return mono if channels == 1 else np.stack([mono, -0.5 * mono], axis=1)
+
+
+@pytest.mark.parametrize("piece", [7, 100, 4096, 1 << 20])
+def test_pcm16_mono(piece):
+    data = _wav_bytes(_tone(5001), 22050, "PCM_16")
+    decoder, samples = _decode(data, piece)
+    expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+    assert decoder.supported
+    assert (decoder.sample_rate, decoder.channels, decoder.codec) == (22050, 1, "pcm_16bit")
+    np.testing.assert_array_equal(samples, expected)
+
+
+@pytest.mark.parametrize("piece", [13, 4096])
+def test_float32_stereo_is_mixed_to_mono(piece):
+    data = _wav_bytes(_tone(3000, channels=2), 48000, "FLOAT")
+    decoder, samples = _decode(data, piece)
+    expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+    assert (decoder.sample_rate, decoder.channels, decoder.codec) == (48000, 2, "float_32bit")
+    np.testing.assert_allclose(samples, expected.mean(axis=1), atol=1e-7)
+
+
+def test_pcm24():
+    data = _wav_bytes(_tone(1000), 16000, "PCM_24")
+    decoder, samples = _decode(data, 64)
+    expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+    assert decoder.codec == "pcm_24bit"
+    np.testing.assert_allclose(samples, expected, atol=1e-7)
+
+
+@pytest.mark.parametrize("piece", [5, 1000])
+def test_extra_chunk_before_data(piece):
+    data = _with_chunk_before_data(_wav_bytes(_tone(2000), 16000, "PCM_16"))
+    decoder, samples = _decode(data, piece)
+    expected, _ = sf.read(io.BytesIO(data), dtype="float32")
+    assert decoder.codec == "pcm_16bit"
+    assert len(samples) == 2000
+    np.testing.assert_array_equal(samples, expected)
+
+
+def test_unsupported_codec_is_left_to_the_full_decoder():
+    decoder, samples = _decode(_wav_bytes(_tone(1000), 8000, "ULAW"), 256)
+    assert not decoder.supported
+    assert decoder.codec == "mulaw"
+    assert len(samples) == 0
+
+
+def test_sniff_format():
+    assert sniff_format(_wav_bytes(_tone(10), 16000, "PCM_16")) == ("wav", "unknown")
+    assert sniff_format(b"fLaC\x00\x00") == ("flac", "flac")
+    assert sniff_format(b"ID3\x04") == ("mp3", "mp3")
+    assert sniff_format(b"\x00\x00\x00\x20ftypM4A ") == ("mp4", "unknown")
+    assert sniff_format(b"garbage") == ("unknown", "unknown")
+
+
+class _Stream:
+    """Nicht seekbarer Upload (nur read())."""
+
+    def __init__(self, data):
+        self._buffer = io.BytesIO(data)
+
+    def read(self, n=-1):
+        return self._buffer.read(n)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    return Workspace(str(tmp_path / "ws"))
+
+
+def test_ingest_decodes_wav_in_the_same_pass(workspace, monkeypatch):
+    data = _wav_bytes(_tone(44100), 44100, "PCM_16")
+    monkeypatch.setattr(ingest, "_decode_after_copy", lambda *a: pytest.fail("zweiter Durchlauf"))
+    record = ingest_upload(io.BytesIO(data), name="aufnahme.wav", workspace=workspace)
+    assert not record.reused
+    assert (record.container, record.codec, record.size) == ("wav", "pcm_16bit", len(data))
+    assert os.path.basename(record.path) == record.sha256 + ".wav"
+    info = sf.info(record.decoded_path)
+    assert (info.samplerate, info.channels, info.frames) == (16000, 1, 16000)
+    assert record.pipeline_path == record.decoded_path
+
+
+@pytest.mark.parametrize("wrap", [io.BytesIO, _Stream])
+def test_duplicate_ingest_returns_cached_paths(workspace, monkeypatch, wrap):
+    data = _with_chunk_before_data(_wav_bytes(_tone(8000), 16000, "PCM_16"))
+    first = ingest_upload(io.BytesIO(data), name="a.wav", workspace=workspace)
+    upload_dir = os.path.dirname(first.path)
+    before = sorted(os.listdir(upload_dir))
+
+    new_files = []
+    original_new_file = workspace.new_file
+    monkeypatch.setattr(workspace, "new_file",
+                        lambda *a, **k: new_files.append(a) or original_new_file(*a, **k))
+    second = ingest_upload(wrap(data), name="b.wav", workspace=workspace)
+
+    assert second.reused
+    assert (second.path, second.decoded_path, second.sha256) == (first.path, first.decoded_path, first.sha256)
+    assert second.name == "b.wav"
+    assert sorted(os.listdir(upload_dir)) == before
+    # Seekbar: nur gehasht, nichts kopiert; nicht seekbar: eine Kopie, aber nichts dekodiert
+    assert len(new_files) == (0 if wrap is io.BytesIO else 1)
+
+
+def test_missing_decoded_file_is_recreated_from_the_stored_original(workspace):
+    data = _wav_bytes(_tone(8000), 16000, "PCM_16")
+    first = ingest_upload(io.BytesIO(data), workspace=workspace)
+    os.remove(first.decoded_path)
+    second = ingest_upload(io.BytesIO(data), workspace=workspace)
+    assert second.path == first.path
+    assert os.path.exists(second.decoded_path)
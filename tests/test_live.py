@@ -0,0 +1,60 @@
+# tests/test_live.py
+
+from types import SimpleNamespace
+
+import numpy as np
+
+from modules.audio import SAMPLE_RATE
+from modules.live import LiveTranscriber
+
+
+class _StubModel:
+    """Liefert pro Lauf die Segmente, die `segments_for(Fensterlänge)` zurückgibt."""
+
+    def __init__(self, segments_for):
+        self.segments_for = segments_for
+        self.windows = []
+
+    def transcribe(self, audio, **kwargs):
+        window_s = len(audio) / SAMPLE_RATE
+        self.windows.append(window_s)
+        segments = [SimpleNamespace(start=s, end=e, text=t) for s, e, t in self.segments_for(window_s)]
+        return iter(segments), None
+
+
+def _feed_seconds(transcriber, seconds, chunk_s=1.0):
+    new = []
+    chunk = np.zeros(int(chunk_s * SAMPLE_RATE), dtype=np.float32)
+    for _ in range(int(seconds / chunk_s)):
+        new.extend(transcriber.feed(chunk))
+    return new
+
+
+def test_single_long_segment_is_committed_not_dropped():
+    # Ein Segment über das ganze Fenster, Ende immer innerhalb von commit_lag_s
+    model = _StubModel(lambda w: [(0.0, w - 0.2, "ein sehr langer Satz")])
+    transcriber = LiveTranscriber(model=model, step_s=1.0, commit_lag_s=1.5, max_window_s=5.0)
+    new = _feed_seconds(transcriber, 8)
+    assert [s["text"] for s in new] == ["ein sehr langer Satz"]
+    assert new[0]["start"] == 0.0
+    # Das Fenster wurde hinter dem bestätigten Segment abgeschnitten
+    assert transcriber.stats()["pending_s"] < 5.0
+
+
+def test_silence_is_dropped_when_window_is_too_long():
+    model = _StubModel(lambda w: [])
+    transcriber = LiveTranscriber(model=model, step_s=1.0, commit_lag_s=1.5, max_window_s=5.0)
+    assert _feed_seconds(transcriber, 8) == []
+    assert transcriber.committed == []
+    assert max(model.windows) <= 6.0
+    assert transcriber.stats()["pending_s"] <= 5.0
+
+
+def test_stable_segments_are_committed_with_absolute_times():
+    model = _StubModel(lambda w: [(0.0, 1.0, "hallo"), (1.0, w, "welt")] if w >= 3.0 else [])
+    transcriber = LiveTranscriber(model=model, step_s=1.0, commit_lag_s=1.5, max_window_s=15.0)
+    new = _feed_seconds(transcriber, 3)
+    assert new == [{"start": 0.0, "end": 1.0, "text": "hallo"}]
+    assert transcriber.tentative == "welt"
+    assert transcriber.stats()["received_s"] == 3.0
+    assert transcriber._buffer_offset == 1.0
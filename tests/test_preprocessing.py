@@ -0,0 +1,69 @@
+# tests/test_preprocessing.py
+
+import numpy as np
+import pytest
+import soundfile as sf
+from scipy.signal import resample_poly
+
+from modules.preprocessing import TARGET_SR, StreamingResampler, preprocess_audio_blockwise
+
+
+def _signal(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    x = 0.4 * np.sin(2 * np.pi * t / 97.0) + 0.2 * rng.standard_normal(n)
+    return x.astype(np.float32)
+
+
+def _one_shot(x, sr_in, sr_out):
+    from math import gcd
+    g = gcd(sr_in, sr_out)
+    return resample_poly(x, sr_out // g, sr_in // g).astype(np.float32)
+
+
+def _streamed(x, resampler, feed):
+    out = []
+    for pos in range(0, len(x), feed):
+        out.extend(resampler.process(x[pos:pos + feed]))
+    out.extend(resampler.flush())
+    return np.concatenate(out) if out else np.zeros(0, dtype=np.float32)
+
+
+@pytest.mark.parametrize("sr_in", [44100, 48000, 22050, 8000, 16000])
+@pytest.mark.parametrize("chunk, feed", [(5000, 1237), (4097, 10007), (65536, 333)])
+def test_streaming_resampler_matches_one_shot(sr_in, chunk, feed):
+    # Länge ist kein Vielfaches von Chunk, Zulieferung oder `down`
+    x = _signal(3 * chunk + 1111)
+    expected = _one_shot(x, sr_in, TARGET_SR)
+    y = _streamed(x, StreamingResampler(sr_in, TARGET_SR, chunk=chunk), feed)
+    assert len(y) == len(expected)
+    np.testing.assert_allclose(y, expected, atol=1e-4)
+
+
+def test_streaming_resampler_short_input_only_in_flush():
+    x = _signal(300)
+    resampler = StreamingResampler(44100, TARGET_SR, chunk=4096)
+    assert resampler.process(x) == []
+    y = np.concatenate(resampler.flush())
+    np.testing.assert_allclose(y, _one_shot(x, 44100, TARGET_SR), atol=1e-4)
+
+
+@pytest.mark.parametrize("block_frames", [5000, 12345])
+def test_blockwise_preprocessing_matches_one_shot(tmp_path, block_frames):
+    sr_in = 44100
+    left = _signal(sr_in * 2 + 777, seed=1) * 2.0     # Spitzen > 1.0 -> Normalisierung greift
+    right = _signal(sr_in * 2 + 777, seed=2)
+    source = tmp_path / "in.wav"
+    sf.write(source, np.stack([left, right], axis=1), sr_in, subtype="FLOAT")
+
+    out = preprocess_audio_blockwise(str(source), output_path=str(tmp_path / "out.wav"),
+                                     block_frames=block_frames)
+    y, sr = sf.read(out, dtype="float32")
+
+    mono = (left + right) / 2
+    gain = 0.95 / np.max(np.abs(mono))
+    expected = np.clip(_one_shot(mono, sr_in, TARGET_SR) * gain, -1.0, 1.0)
+    assert sr == TARGET_SR
+    assert len(y) == len(expected)
+    # PCM16: bis auf Quantisierung gleich
+    np.testing.assert_allclose(y, expected, atol=2.0 / 32768)
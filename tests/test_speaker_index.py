@@ -0,0 +1,68 @@
+# tests/test_speaker_index.py
+
+import math
+
+import numpy as np
+
+from modules.speaker_index import SpeakerIndex
+
+DIAR = [
+    {"start": 0.0, "end": 5.0, "speaker": "SPEAKER_00"},
+    {"start": 5.0, "end": 9.0, "speaker": "SPEAKER_01"},
+    {"start": 12.0, "end": 15.0, "speaker": "SPEAKER_00"},
+]
+
+
+def _seg(start, end):
+    return {"start": start, "end": end, "text": "x"}
+
+
+def test_assign_picks_largest_overlap():
+    index = SpeakerIndex(DIAR)
+    segments = [_seg(0.5, 4.0), _seg(4.0, 8.0), _seg(11.0, 14.0)]
+    assert index.assign(segments) == ["SPEAKER_00", "SPEAKER_01", "SPEAKER_00"]
+
+
+def test_zero_length_segment_falls_back_to_start_time():
+    index = SpeakerIndex(DIAR)
+    assert index.assign([_seg(2.0, 2.0), _seg(7.0, 7.0)]) == ["SPEAKER_00", "SPEAKER_01"]
+
+
+def test_zero_length_segment_on_boundary_goes_to_first_speaker():
+    # Grenzen sind inklusive: bei 5.0 sprechen beide, der zuerst genannte gewinnt
+    index = SpeakerIndex(DIAR)
+    assert index.assign([_seg(5.0, 5.0)]) == ["SPEAKER_00"]
+
+
+def test_segment_without_any_speaker_is_unknown():
+    index = SpeakerIndex(DIAR)
+    assert index.assign([_seg(10.0, 11.0), _seg(20.0, 20.0)]) == ["Unbekannt", "Unbekannt"]
+    assert index.assign([_seg(10.0, 11.0)], unknown="?") == ["?"]
+
+
+def test_touching_segment_without_overlap_uses_start_time():
+    # Endet genau dort, wo SPEAKER_00 wieder beginnt: Überlappung 0, Start in keiner Region
+    index = SpeakerIndex(DIAR)
+    assert index.assign([_seg(9.5, 12.0)]) == ["Unbekannt"]
+    assert index.assign([_seg(9.0, 12.0)]) == ["SPEAKER_01"]
+
+
+def test_overlapping_turns_of_one_speaker_are_not_counted_twice():
+    index = SpeakerIndex([
+        {"start": 0.0, "end": 4.0, "speaker": "A"},
+        {"start": 2.0, "end": 6.0, "speaker": "A"},
+        {"start": 0.0, "end": 5.0, "speaker": "B"},
+    ])
+    coverage = index.coverage([0.0], [6.0])
+    np.testing.assert_allclose(coverage, [[6.0, 5.0]])
+    assert index.assign([_seg(0.0, 6.0)]) == ["A"]
+
+
+def test_empty_inputs():
+    assert SpeakerIndex(DIAR).assign([]) == []
+    assert SpeakerIndex([]).assign([_seg(0.0, 1.0)]) == ["Unbekannt"]
+
+
+def test_infinite_end_from_dummy_fallback():
+    index = SpeakerIndex([{"start": 0.0, "end": math.inf, "speaker": "SPEAKER_00"}])
+    assert index.assign([_seg(3.0, 4.0), _seg(1e6, 1e6)]) == ["SPEAKER_00", "SPEAKER_00"]
@@ -0,0 +1,72 @@
+# tests/test_vad_speech_map.py
+
+import numpy as np
+import pytest
+
+from modules.audio import AudioBuffer
+from modules.vad import SpeechMap, compact
+
+# Original: Sprache 1.0–3.0 s und 5.0–6.0 s. Verdichtet: 0.0–2.0, Lücke 2.0–2.1, 2.1–3.1
+REGIONS = [(1.0, 3.0, 0.0), (5.0, 6.0, 2.1)]
+
+
+@pytest.fixture
+def speech_map():
+    return SpeechMap(REGIONS, original_s=8.0, gap_s=0.1)
+
+
+def test_times_inside_regions(speech_map):
+    assert speech_map.to_original(0.0) == pytest.approx(1.0)
+    assert speech_map.to_original(0.5) == pytest.approx(1.5)
+    assert speech_map.to_original(2.6) == pytest.approx(5.5)
+
+
+def test_time_in_gap_falls_back_to_previous_region_end(speech_map):
+    assert speech_map.to_original(2.05) == pytest.approx(3.0)
+    assert speech_map.to_original(2.05, is_end=True) == pytest.approx(3.0)
+
+
+def test_region_boundary_depends_on_is_end(speech_map):
+    # Ein Start auf der Grenze gehört zur folgenden Region, ein Ende zur vorherigen
+    assert speech_map.to_original(2.1) == pytest.approx(5.0)
+    assert speech_map.to_original(2.1, is_end=True) == pytest.approx(3.0)
+    assert speech_map.to_original(0.0, is_end=True) == pytest.approx(1.0)
+
+
+def test_time_past_the_end_is_clamped(speech_map):
+    assert speech_map.to_original(10.0) == pytest.approx(6.0)
+    assert speech_map.to_original(10.0, is_end=True) == pytest.approx(6.0)
+
+
+def test_map_segment(speech_map):
+    seg = {"start": 1.5, "end": 2.1, "text": "hallo"}
+    mapped = speech_map.map_segment(seg)
+    assert mapped == {"start": pytest.approx(2.5), "end": pytest.approx(3.0), "text": "hallo"}
+    assert seg["start"] == 1.5      # Original bleibt unverändert
+
+
+def test_map_segment_across_gap_spans_both_regions(speech_map):
+    mapped = speech_map.map_segment({"start": 1.0, "end": 2.6})
+    assert (mapped["start"], mapped["end"]) == (pytest.approx(2.0), pytest.approx(5.5))
+
+
+def test_map_segment_in_gap_never_ends_before_start(speech_map):
+    mapped = speech_map.map_segment({"start": 2.05, "end": 2.1})
+    assert mapped["start"] == pytest.approx(3.0)
+    assert mapped["end"] >= mapped["start"]
+
+
+def test_without_regions_times_are_unchanged():
+    assert SpeechMap([], original_s=4.0).to_original(1.25) == 1.25
+
+
+def test_compact_round_trip():
+    sr = 1000
+    audio = AudioBuffer(np.arange(8 * sr, dtype=np.float32), sr)
+    buffer, speech_map = compact(audio, [(1 * sr, 3 * sr), (5 * sr, 6 * sr)], gap_s=0.1)
+    assert buffer.duration == pytest.approx(speech_map.compact_s)
+    assert speech_map.stats()["skipped_fraction"] == pytest.approx(5.0 / 8.0)
+    # Jede verdichtete Probe stammt von der zurückgerechneten Originalzeit
+    for t in (0.0, 1.5, 2.1, 2.9):
+        original = speech_map.to_original(t)
+        assert buffer.samples[int(round(t * sr))] == audio.samples[int(round(original * sr))]
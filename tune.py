@@ -0,0 +1,13 @@
+# tune.py – Kalibriert Whisper auf diesem Rechner (Hardware-Profil)
+#
+#   python tune.py referenz.wav --preference balanced
+#   python tune.py --show
+#
+# Details und Optionen: python tune.py --help (Logik in modules/tuning.py)
+
+import sys
+
+from modules.tuning import main
+
+if __name__ == "__main__":
+    sys.exit(main())